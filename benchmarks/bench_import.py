@@ -0,0 +1,109 @@
+"""
+Measures bank statement import throughput (rows/sec) on synthetic LHV statements.
+
+Compares the legacy path (hydrate every row as a Transaction and session.add_all)
+against the chunked Core executemany path used by import_transactions.
+
+Usage:
+    uv run python benchmarks/bench_import.py --rows 100000 --rows 1000000
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="budy-bench-"))
+# Keep the benchmark away from the real budy.db; must be set before budy is imported.
+os.environ["BUDY_DB_URL"] = f"sqlite:///{WORK_DIR / 'bootstrap.db'}"
+
+from sqlalchemy import Engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from budy.config import settings
+from budy.importer import BaseBankImporter
+from budy.services.transaction import import_transactions
+
+PAYEES = ["Rimi", "Selver", "Prisma", "Bolt", "Wolt", "Netflix", "Elisa", "Circle K"]
+
+
+def write_statement(path: Path, rows: int) -> None:
+    """Writes a synthetic LHV statement with the given number of debit rows."""
+    rng = random.Random(rows)
+    start = date(2015, 1, 1)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "Kuupäev",
+                "Saaja/maksja nimi",
+                "Selgitus",
+                "Summa",
+                "Deebet/Kreedit (D/C)",
+            ]
+        )
+        for i in range(rows):
+            payee = rng.choice(PAYEES)
+            writer.writerow(
+                [
+                    (start + timedelta(days=i // 50)).isoformat(),
+                    f"{payee} {rng.randint(1, 40)}",
+                    f"Card payment {payee.lower()} #{i}",
+                    f"{rng.uniform(1, 250):.2f}",
+                    "D",
+                ]
+            )
+
+
+def fresh_engine(name: str) -> Engine:
+    """Creates an empty file-backed database for a single run."""
+    db_path = WORK_DIR / name
+    db_path.unlink(missing_ok=True)
+    engine = create_engine(f"sqlite:///{db_path}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def run_orm(path: Path) -> float:
+    """The pre-chunking path: materialize every Transaction and add_all them."""
+    engine = fresh_engine("orm.db")
+    start = time.perf_counter()
+    importer = BaseBankImporter(**settings.banks["lhv"].model_dump())
+    transactions = importer.process_file(path)
+    with Session(engine) as session:
+        session.add_all(transactions)
+        session.commit()
+    return time.perf_counter() - start
+
+
+def run_core(path: Path) -> float:
+    """The current path: stream chunks and insert them with Core executemany."""
+    engine = fresh_engine("core.db")
+    start = time.perf_counter()
+    with Session(engine) as session:
+        import_transactions(
+            session=session, bank_name="lhv", file_path=path, dry_run=False
+        )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, action="append")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'path':>6} {'seconds':>9} {'rows/sec':>12}")
+    for rows in args.rows or [100_000, 1_000_000]:
+        path = WORK_DIR / f"statement_{rows}.csv"
+        write_statement(path, rows)
+        for name, runner in (("orm", run_orm), ("core", run_core)):
+            elapsed = runner(path)
+            print(f"{rows:>10,} {name:>6} {elapsed:>9.2f} {rows / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
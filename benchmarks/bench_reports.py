@@ -0,0 +1,132 @@
+"""
+Compares the SQL and polars report engines on a synthetic ledger.
+
+Each report is computed by both engines, timed, and checked to give the same result.
+
+Usage:
+    uv run python benchmarks/bench_reports.py --rows 1000000
+"""
+
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="budy-bench-"))
+# Keep the benchmark away from the real budy.db; must be set before budy is imported.
+os.environ["BUDY_DB_URL"] = f"sqlite:///{WORK_DIR / 'ledger.db'}"
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from budy.database import engine
+from budy.schemas import Category, Transaction, VolatilityGrouping
+from budy.services import analytics, report
+from budy.services.snapshot import refresh_snapshot
+
+PAYEES = ["Rimi", "Selver", "Prisma", "Bolt", "Wolt", "Netflix", "Elisa", "Circle K"]
+START = date(2015, 1, 1)
+
+REPORTS = {
+    "month": lambda service, session: service.generate_monthly_report_data(
+        session=session, target_month=6, target_year=2020
+    ),
+    "years": lambda service, session: service.get_multi_year_report_data(
+        session=session, start_year=2015, end_year=2024
+    ),
+    "payees": lambda service, session: service.get_top_payees(
+        session=session, year=None, limit=10
+    ),
+    "weekday": lambda service, session: service.get_weekday_report_data(
+        session=session
+    ),
+    "volatility": lambda service, session: service.get_volatility_report_data(
+        session=session, year=None
+    ),
+    "volatility/category": lambda service, session: (
+        service.get_group_volatility_report_data(
+            session=session, year=None, by=VolatilityGrouping.category
+        )
+    ),
+    "volatility/payee": lambda service, session: (
+        service.get_group_volatility_report_data(
+            session=session, year=None, by=VolatilityGrouping.payee
+        )
+    ),
+}
+
+
+def fill_ledger(rows: int) -> None:
+    """Inserts synthetic transactions spread over ten years, in chunks."""
+    rng = random.Random(rows)
+    with Session(engine) as session:
+        categories = [Category(name=f"Category {i}") for i in range(12)]
+        session.add_all(categories)
+        session.commit()
+        category_ids = [None] + [category.id for category in categories]
+
+        days = (date(2024, 12, 31) - START).days
+        for offset in range(0, rows, 50_000):
+            session.execute(
+                insert(Transaction),
+                [
+                    {
+                        "amount": int(rng.lognormvariate(7, 1)) + 1,
+                        "entry_date": START + timedelta(days=rng.randint(0, days)),
+                        "receiver": f"{rng.choice(PAYEES)} {rng.randint(1, 40)}",
+                        "category_id": rng.choice(category_ids),
+                        "is_self": rng.random() < 0.01,
+                    }
+                    for _ in range(min(50_000, rows - offset))
+                ],
+            )
+        session.commit()
+
+
+def same(a, b) -> bool:
+    """Compares report results, allowing floats to differ by rounding."""
+    if hasattr(a, "model_dump"):
+        return same(a.model_dump(), b.model_dump())
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(map(same, a, b))
+    if isinstance(a, float):
+        return math.isclose(a, b, rel_tol=1e-9)
+    return a == b
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fill_ledger(args.rows)
+    print(f"Generated {args.rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+    # The polars engine reads the memory-mapped snapshot, which is built once up front
+    start = time.perf_counter()
+    with Session(engine) as session:
+        refresh_snapshot(session=session)
+    print(f"Built the ledger snapshot in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'report':>20} {'sql':>9} {'polars':>9} {'same':>6}")
+    for name, run in REPORTS.items():
+        results, timings = [], []
+        for service in (report, analytics):
+            with Session(engine) as session:
+                start = time.perf_counter()
+                results.append(run(service, session))
+                timings.append(time.perf_counter() - start)
+        print(
+            f"{name:>20} {timings[0]:>8.2f}s {timings[1]:>8.2f}s {same(*results)!s:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
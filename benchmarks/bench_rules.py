@@ -0,0 +1,74 @@
+"""
+Measures auto-categorization cost on a synthetic LHV statement.
+
+Compares the per-row Python loop over every CategoryRule against the compiled
+RuleMatcher evaluated inside the polars lazy scan.
+
+Usage:
+    uv run python benchmarks/bench_rules.py --rows 50000 --rules 300
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+from bench_import import PAYEES, WORK_DIR, write_statement
+
+from budy.config import settings
+from budy.importer import BaseBankImporter
+from budy.matcher import compile_rules
+
+
+def make_rules(count: int) -> list[tuple[str, int]]:
+    """Builds mostly non-matching rules, with the real payees at the end of the priority order."""
+    rng = random.Random(count)
+    rules = [(f"merchant-{rng.randrange(10**6):06d}", i % 20 + 1) for i in range(count)]
+    return rules + [(payee.lower(), i + 1) for i, payee in enumerate(PAYEES)]
+
+
+def run_python_loop(path: Path, rules: list[tuple[str, int]]) -> list[int | None]:
+    """The pre-matcher path: collect rows, then test every rule against every row."""
+    importer = BaseBankImporter(**settings.banks["lhv"].model_dump())
+    categories = []
+    for row in importer.scan(path).collect().iter_rows(named=True):
+        text_to_match = f"{row['receiver'] or ''} {row['description'] or ''}".lower()
+        category_id = None
+        for pattern, rule_category_id in rules:
+            if pattern in text_to_match:
+                category_id = rule_category_id
+                break
+        categories.append(category_id)
+    return categories
+
+
+def run_polars(path: Path, rules: list[tuple[str, int]]) -> list[int | None]:
+    """The current path: the compiled matcher runs as an expression inside the lazy scan."""
+    importer = BaseBankImporter(**settings.banks["lhv"].model_dump())
+    matcher = compile_rules(tuple(rules))
+    return importer.scan(path, matcher=matcher).collect()["category_id"].to_list()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--rules", type=int, default=300)
+    args = parser.parse_args()
+
+    path = WORK_DIR / f"statement_{args.rows}.csv"
+    write_statement(path, args.rows)
+    rules = make_rules(args.rules)
+
+    results = {}
+    print(f"{'engine':>8} {'seconds':>9} {'rows/sec':>12}")
+    for name, runner in (("python", run_python_loop), ("polars", run_polars)):
+        start = time.perf_counter()
+        results[name] = runner(path, rules)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8} {elapsed:>9.2f} {args.rows / elapsed:>12,.0f}")
+
+    assert results["python"] == results["polars"], "engines disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,132 @@
-from sqlalchemy import text
+from rich.console import Console
+from sqlalchemy import inspect, text
 from sqlalchemy.exc import OperationalError
-from sqlmodel import SQLModel
+from sqlmodel import Session, SQLModel
 from typer import Typer
 
 from budy.budgets import app as budgets_app
 from budy.categories import app as categories_app
 from budy.database import engine
+from budy.db import app as db_app
 from budy.reports import app as reports_app
+from budy.services.report import rebuild_monthly_totals
+from budy.services.transaction import rebuild_search_index, refresh_self_transfers
 from budy.setup import run_setup
 from budy.transactions import app as transactions_app
+from budy.views.messages import render_warning
 
+# Columns added after a table was first released, as (table, column, column definition).
+ADDED_COLUMNS = [
+    ("transaction", "category_id", "INTEGER REFERENCES category(id)"),
+    ("transaction", "fingerprint", "VARCHAR"),
+    ("transaction", "is_self", "BOOLEAN NOT NULL DEFAULT 0"),
+    ("data_version", "ledger_rewritten", "INTEGER NOT NULL DEFAULT 0"),
+]
 
-def _run_migrations():
-    """Simple migration logic to add columns if they are missing."""
+# Indexes replaced by wider ones that serve the same queries, as (table, index) pairs.
+SUPERSEDED_INDEXES = [
+    ("transaction", "ix_transaction_receiver"),
+    ("budget", "ix_budget_target_month"),
+    ("budget", "ix_budget_target_year"),
+]
+
+
+def _run_migrations() -> list[tuple[str, str]]:
+    """Simple migration logic to add columns if they are missing. Returns the added (table, column) pairs."""
+    added = []
     try:
         with engine.connect() as conn:
-            # Check for category_id in transaction table
-            try:
-                conn.execute(text("SELECT category_id FROM 'transaction' LIMIT 1"))
-            except OperationalError as e:
-                # Check if it's a missing column error
-                if "no such column" in str(e).lower():
-                    conn.execute(
-                        text(
-                            "ALTER TABLE 'transaction' ADD COLUMN category_id INTEGER REFERENCES category(id)"
+            for table, column, definition in ADDED_COLUMNS:
+                try:
+                    conn.execute(text(f"SELECT {column} FROM '{table}' LIMIT 1"))
+                except OperationalError as e:
+                    # Check if it's a missing column error
+                    if "no such column" in str(e).lower():
+                        conn.execute(
+                            text(
+                                f"ALTER TABLE '{table}' ADD COLUMN {column} {definition}"
+                            )
                         )
-                    )
-                    conn.commit()
+                        conn.commit()
+                        added.append((table, column))
     except Exception:
         # If DB file doesn't exist or other issues, let create_all handle it
         pass
+    return added
+
+
+def _drop_superseded_indexes(*, keep_tables: set[str]):
+    """Drops indexes that wider ones have replaced, so writes no longer maintain them."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, index in SUPERSEDED_INDEXES:
+            if table in keep_tables or not inspector.has_table(table):
+                continue
+            if index in {existing["name"] for existing in inspector.get_indexes(table)}:
+                conn.execute(text(f"DROP INDEX {index}"))
+
+
+def _has_duplicate_budgets() -> bool:
+    """Checks whether a month has several budgets, which older versions allowed."""
+    inspector = inspect(engine)
+    if not inspector.has_table("budget") or "ix_budget_year_month" in {
+        index["name"] for index in inspector.get_indexes("budget")
+    }:
+        return False
+
+    with engine.connect() as conn:
+        return (
+            conn.execute(
+                text(
+                    "SELECT 1 FROM budget GROUP BY target_year, target_month "
+                    "HAVING count(*) > 1 LIMIT 1"
+                )
+            ).first()
+            is not None
+        )
 
 
-_run_migrations()
+def _create_missing_indexes(*, skip_tables: set[str]):
+    """Creates indexes that create_all skips because their table already exists."""
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name in skip_tables:
+            continue
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+added_columns = _run_migrations()
+missing_rollups = not inspect(engine).has_table("monthly_totals")
+missing_search_index = not inspect(engine).has_table("transaction_fts")
+# Duplicate budgets are never deleted behind the user's back. Until they are resolved, the budget
+# table keeps its old indexes instead of getting the unique one.
+pending_tables = {"budget"} if _has_duplicate_budgets() else set()
+_drop_superseded_indexes(keep_tables=pending_tables)
 SQLModel.metadata.create_all(engine)
+_create_missing_indexes(skip_tables=pending_tables)
+
+if pending_tables:
+    Console(stderr=True).print(
+        render_warning(
+            message="Some months have more than one budget. "
+            "Run 'budy db dedupe-budgets' to review them and keep the newest of each."
+        )
+    )
+
+if missing_rollups:
+    # The triggers only track changes from now on, so history is rolled up once.
+    with Session(engine) as session:
+        rebuild_monthly_totals(session=session)
+
+if missing_search_index:
+    # Like the rollup, the index only follows changes once its triggers exist.
+    with Session(engine) as session:
+        rebuild_search_index(session=session)
+
+if ("transaction", "is_self") in added_columns:
+    # Self-transfers used to be recognized at report time, so existing rows still need their flag.
+    with Session(engine) as session:
+        refresh_self_transfers(session=session)
 
 app = Typer(no_args_is_help=True)
 
@@ -41,6 +134,7 @@ app.add_typer(transactions_app, name="transactions")
 app.add_typer(budgets_app, name="budgets")
 app.add_typer(categories_app, name="categories")
 app.add_typer(reports_app, name="reports")
+app.add_typer(db_app, name="db")
 
 app.command(name="setup")(run_setup)
 
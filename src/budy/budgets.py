@@ -4,10 +4,11 @@ from typing import Annotated, Optional
 from rich.console import Console
 from rich.prompt import Confirm
 from sqlmodel import Session
-from typer import Exit, Option, Typer, confirm
+from typer import BadParameter, Exit, Option, Typer, confirm
 
 from budy.config import settings
 from budy.database import engine
+from budy.reports import parse_year_range
 from budy.services.budget import (
     generate_budgets_suggestions,
     get_budget,
@@ -148,6 +149,14 @@ def generate_budgets(
             help="Target year.",
         ),
     ] = None,
+    years: Annotated[
+        str | None,
+        Option(
+            "--years",
+            metavar="START-END",
+            help="Range of target years, e.g. 2025-2027.",
+        ),
+    ] = None,
     force: Annotated[
         bool,
         Option(
@@ -167,24 +176,35 @@ def generate_budgets(
     """
     Auto-generate monthly budgets based on historical transaction data.
     """
+    if year and years:
+        raise BadParameter("Use either --year or --years, not both.")
+
     target_year = year or date.today().year
+    start_year, end_year = (
+        parse_year_range(years) if years else (target_year, target_year)
+    )
+    target_years = list(range(start_year, end_year + 1))
+    label = f"{start_year}-{end_year}" if end_year > start_year else str(start_year)
 
     console.print(
-        f"Analyzing spending history to generate budgets for [bold]{target_year}[/]..."
+        f"Analyzing spending history to generate budgets for [bold]{label}[/]..."
     )
 
     with Session(engine) as session:
         suggestions = generate_budgets_suggestions(
-            session=session, target_year=target_year, force=force
+            session=session, target_years=target_years, force=force
         )
 
     if not suggestions:
-        console.print(
-            render_warning(message=f"No suggestions found for {target_year}.")
-        )
+        console.print(render_warning(message=f"No suggestions found for {label}."))
         return
 
-    console.print(render_budget_preview(suggestions=suggestions, year=target_year))
+    for preview_year in target_years:
+        year_suggestions = [s for s in suggestions if s.year == preview_year]
+        if year_suggestions:
+            console.print(
+                render_budget_preview(suggestions=year_suggestions, year=preview_year)
+            )
 
     if not auto_approve and not Confirm.ask("Save these budgets?"):
         console.print("[dim]Operation cancelled.[/]")
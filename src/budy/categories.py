@@ -4,8 +4,10 @@ from rich.console import Console
 from sqlmodel import Session
 from typer import Argument, Exit, Option, Typer, confirm
 
+from budy.config import settings
 from budy.database import engine
 from budy.services.category import (
+    apply_rules,
     create_category,
     create_rule,
     delete_category,
@@ -13,7 +15,11 @@ from budy.services.category import (
     get_categories,
     get_rules,
 )
-from budy.views.category import render_category_list, render_rule_list
+from budy.views.category import (
+    render_category_list,
+    render_rule_hits,
+    render_rule_list,
+)
 from budy.views.messages import render_error, render_success, render_warning
 
 app = Typer(no_args_is_help=True)
@@ -154,3 +160,53 @@ def delete_rule_cmd(
         raise Exit(1)
 
     console.print(render_success(message=f"Deleted rule [bold]#{rule_id}[/]"))
+
+
+@rules_app.command(name="apply")
+def apply_rules_cmd(
+    only_uncategorized: Annotated[
+        bool,
+        Option(
+            "--only-uncategorized",
+            "-u",
+            help="Only categorize transactions that have no category yet.",
+        ),
+    ] = False,
+    year: Annotated[
+        int | None,
+        Option(
+            "--year",
+            "-y",
+            min=settings.min_year,
+            max=settings.max_year,
+            help="Only re-categorize transactions from this year.",
+        ),
+    ] = None,
+    dry_run: Annotated[
+        bool,
+        Option(
+            help="Show how many transactions each rule matches without saving.",
+        ),
+    ] = False,
+):
+    """Re-apply auto-categorization rules to existing transactions."""
+    with Session(engine) as session:
+        result = apply_rules(
+            session=session,
+            only_uncategorized=only_uncategorized,
+            year=year,
+            dry_run=dry_run,
+        )
+
+    if not result.hits:
+        console.print(render_warning(message="No transactions matched any rule."))
+        return
+
+    console.print(render_rule_hits(result=result, dry_run=dry_run))
+
+    if dry_run:
+        console.print("[yellow]Dry run active. No changes made to database.[/]")
+    else:
+        console.print(
+            render_success(message=f"Re-categorized {result.updated} transactions.")
+        )
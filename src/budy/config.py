@@ -20,6 +20,11 @@ class BankConfig(BaseModel):
     debit_value: str = "D"
     receiver_col: Optional[str] = None
     description_col: Optional[str] = None
+    # strftime-style format of the date column, e.g. "%d.%m.%Y". Inferred per value when unset.
+    date_format: str | None = None
+    # Polars dtype names by column header, e.g. {"Summa": "Float64"}. When set, the file is parsed
+    # with these types (other columns as String) instead of inferring a schema from the data.
+    column_types: dict[str, str] = Field(default_factory=dict)
 
 
 class Settings(BaseModel):
@@ -29,6 +34,10 @@ class Settings(BaseModel):
     currency_symbol: str = "$"
     min_year: int = 1900
     max_year: int = 2100
+    # Number of parsed rows written to the database per chunk during imports.
+    import_batch_size: int = 10000
+    # Number of report results kept in the on-disk cache before the least recently used are evicted.
+    report_cache_entries: int = 256
     first_name: str | None = None
     last_name: str | None = None
     # Default configurations for major Estonian banks.
@@ -43,6 +52,8 @@ class Settings(BaseModel):
                 debit_credit_col="Deebet/Kreedit (D/C)",
                 receiver_col="Saaja/maksja nimi",
                 description_col="Selgitus",
+                date_format="%Y-%m-%d",
+                column_types={"Summa": "Float64"},
             ),
             "seb": BankConfig(
                 delimiter=";",
@@ -52,6 +63,8 @@ class Settings(BaseModel):
                 debit_credit_col="Deebet/Kreedit (D/C)",
                 receiver_col="Saaja/maksja nimi",
                 description_col="Selgitus",
+                date_format="%d.%m.%Y",
+                column_types={"Summa": "Float64"},
             ),
             "swedbank": BankConfig(
                 delimiter=";",
@@ -61,6 +74,8 @@ class Settings(BaseModel):
                 debit_credit_col="Deebet/Kreedit",
                 receiver_col="Saaja/Maksja",
                 description_col="Selgitus",
+                date_format="%d.%m.%Y",
+                column_types={"Summa": "Float64"},
             ),
         }
     )
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 
+from sqlalchemy import event
 from sqlmodel import create_engine
 from typer import get_app_dir
 
@@ -23,3 +24,15 @@ if ":memory:" in target_db_url:
     pool_class = StaticPool
 
 engine = create_engine(target_db_url, connect_args=connect_args, poolclass=pool_class)
+
+
+@event.listens_for(engine, "connect")
+def _register_functions(dbapi_connection, connection_record):
+    """Registers Python helpers as SQL functions on every new connection."""
+    # SQLite's lower() only folds ASCII letters, while rule matching uses str.lower().
+    dbapi_connection.create_function(
+        "unicode_lower",
+        1,
+        lambda value: value.lower() if value is not None else None,
+        deterministic=True,
+    )
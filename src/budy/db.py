@@ -0,0 +1,189 @@
+from datetime import datetime
+from typing import Annotated
+
+from rich.console import Console
+from rich.prompt import Confirm
+from sqlmodel import Session
+from typer import Exit, Option, Typer
+
+from budy.database import engine
+from budy.services.budget import get_duplicate_budgets, remove_duplicate_budgets
+from budy.services.cache import clear_report_cache
+from budy.services.report import rebuild_monthly_totals
+from budy.services.snapshot import refresh_snapshot
+from budy.services.transaction import (
+    backfill_fingerprints,
+    rebuild_search_index,
+    refresh_self_transfers,
+)
+from budy.transactions import get_bank_names
+from budy.views.budget import render_removed_budgets
+from budy.views.messages import render_error, render_success, render_warning
+
+app = Typer(no_args_is_help=True)
+console = Console()
+
+
+@app.command(name="backfill-fingerprints")
+def run_backfill_fingerprints(
+    bank: Annotated[
+        str,
+        Option(
+            "--bank",
+            "-b",
+            prompt=True,
+            help="The bank the existing transactions were imported from.",
+            autocompletion=get_bank_names,
+        ),
+    ],
+    start_date: Annotated[
+        datetime | None,
+        Option(
+            "--from",
+            formats=["%Y-%m-%d", "%Y/%m/%d"],
+            help="Only fingerprint transactions on or after this date (YYYY-MM-DD).",
+        ),
+    ] = None,
+    end_date: Annotated[
+        datetime | None,
+        Option(
+            "--to",
+            formats=["%Y-%m-%d", "%Y/%m/%d"],
+            help="Only fingerprint transactions on or before this date (YYYY-MM-DD).",
+        ),
+    ] = None,
+) -> None:
+    """
+    Fingerprint previously imported transactions so re-imports skip them.
+
+    Transactions do not record which bank they came from, so run this once per bank. If you imported
+    statements from several banks, limit each run with --from and --to to the dates that bank's
+    statements cover. Transactions added by hand are skipped.
+    """
+    try:
+        with Session(engine) as session:
+            updated, candidates = backfill_fingerprints(
+                session=session,
+                bank_name=bank,
+                start_date=start_date.date() if start_date else None,
+                end_date=end_date.date() if end_date else None,
+            )
+    except ValueError as e:
+        console.print(render_error(message=str(e)))
+        raise Exit(1)
+
+    if not candidates:
+        console.print(
+            render_warning(message="No imported transactions are left to fingerprint.")
+        )
+        return
+
+    console.print(
+        render_success(message=f"Fingerprinted [bold]{updated}[/] transactions.")
+    )
+
+    if updated < candidates:
+        console.print(
+            render_warning(
+                message=f"{candidates - updated} transactions duplicate already imported rows and were left as-is."
+            )
+        )
+
+
+@app.command(name="dedupe-budgets")
+def run_dedupe_budgets(
+    auto_approve: Annotated[
+        bool,
+        Option(
+            "--yes",
+            help="Skip confirmation prompt.",
+        ),
+    ] = False,
+) -> None:
+    """Keep only the newest budget of each month, so budgets can be looked up by a unique index."""
+    with Session(engine) as session:
+        duplicates = get_duplicate_budgets(session=session)
+
+    if not duplicates:
+        console.print(render_success(message="Every month has at most one budget."))
+        return
+
+    console.print(render_removed_budgets(budgets=duplicates))
+    if not auto_approve and not Confirm.ask(
+        f"Delete these {len(duplicates)} budgets, keeping the newest of each month?"
+    ):
+        console.print("[dim]Operation cancelled.[/]")
+        return
+
+    with Session(engine) as session:
+        removed = remove_duplicate_budgets(session=session)
+
+    console.print(
+        render_success(message=f"Removed [bold]{len(removed)}[/] duplicate budgets.")
+    )
+
+
+@app.command(name="refresh-self-transfers")
+def run_refresh_self_transfers() -> None:
+    """Re-check which transactions are transfers to yourself, e.g. after editing your name in the config."""
+    with Session(engine) as session:
+        self_transfers = refresh_self_transfers(session=session)
+
+    console.print(
+        render_success(
+            message=f"Flagged [bold]{self_transfers}[/] transactions as transfers between your own accounts."
+        )
+    )
+
+
+@app.command(name="rebuild-rollups")
+def run_rebuild_rollups() -> None:
+    """Recompute the monthly spending totals that reports and budgets read from."""
+    with Session(engine) as session:
+        rows = rebuild_monthly_totals(session=session)
+
+    console.print(render_success(message=f"Rebuilt [bold]{rows}[/] monthly totals."))
+
+
+@app.command(name="rebuild-search")
+def run_rebuild_search() -> None:
+    """Rebuild the full-text index that transaction searches use."""
+    with Session(engine) as session:
+        indexed = rebuild_search_index(session=session)
+
+    console.print(
+        render_success(message=f"Indexed [bold]{indexed}[/] transactions for search.")
+    )
+
+
+@app.command(name="clear-cache")
+def run_clear_cache() -> None:
+    """Delete the cached report results."""
+    entries = clear_report_cache()
+    console.print(render_success(message=f"Deleted [bold]{entries}[/] cached reports."))
+
+
+@app.command(name="snapshot")
+def run_snapshot() -> None:
+    """Rebuild the columnar snapshot of the transactions that the polars engine and exports read."""
+    try:
+        with Session(engine) as session:
+            result = refresh_snapshot(session=session, force=True)
+    except ValueError as e:
+        console.print(render_error(message=str(e)))
+        raise Exit(1)
+
+    console.print(
+        render_success(
+            message=f"Snapshot rebuilt with [bold]{result.rows}[/] transactions."
+        )
+    )
+
+
+@app.callback()
+def callback():
+    """Maintain the budy database."""
+
+
+if __name__ == "__main__":
+    app()
@@ -1,10 +1,34 @@
+import codecs
+import csv
+import re
+from collections.abc import Iterator
+from datetime import date
 from pathlib import Path
 from typing import Optional
 
+import polars as pl
+from polars.datatypes import is_polars_dtype
 from sqlmodel import SQLModel
 
+from budy.config import BankConfig
+from budy.matcher import RuleMatcher
 from budy.schemas import Transaction
 
+# Encodings that the polars CSV scanner can read natively without decoding the file in Python first.
+STREAMING_ENCODINGS = {"utf-8": "utf8", "utf8": "utf8", "utf8-lossy": "utf8-lossy"}
+
+# Bank detection only reads the start of a file.
+SNIFF_BYTES = 4096
+DECIMAL_COMMA = re.compile(r"\d,\d{1,2}$")
+DECIMAL_POINT = re.compile(r"\d\.\d{1,2}$")
+
+
+def _dates_are_grouped(lf: pl.LazyFrame) -> bool:
+    """Checks that the rows of each date are adjacent, reading only the date column."""
+    dates = pl.col("entry_date")
+    runs = dates.rle_id().max().fill_null(-1) + 1
+    return lf.select(runs == dates.n_unique()).collect().item()
+
 
 class BaseBankImporter(SQLModel):
     """Base class for bank statement importers. Defines common configuration and file processing logic."""
@@ -23,83 +47,363 @@ class BaseBankImporter(SQLModel):
     receiver_col: Optional[str] = None
     description_col: Optional[str] = None
 
-    def process_file(self, file_path: Path) -> list[Transaction]:
-        """Processes a bank statement CSV file and returns a list of Transaction objects."""
-        import polars as pl
+    # Optional explicit parsing, which skips type and date format inference
+    date_format: str | None = None
+    column_types: dict[str, str] = {}
+
+    def _schema_overrides(self) -> dict[str, pl.DataType]:
+        """Resolves the configured column type names to polars dtypes."""
+        overrides = {}
+        for column, type_name in self.column_types.items():
+            dtype = getattr(pl, type_name, None)
+            if not is_polars_dtype(dtype):
+                raise ValueError(f"Unknown type '{type_name}' for column '{column}'")
+            overrides[column] = dtype()
+        return overrides
 
+    def scan(
+        self,
+        file_path: Path,
+        *,
+        matcher: RuleMatcher | None = None,
+        since: date | None = None,
+        group_by_date: bool = False,
+    ) -> pl.LazyFrame:
+        """
+        Builds a lazy query over a bank statement CSV file.
+        The resulting frame has the columns entry_date, amount, receiver, description and category_id.
+        Categories are matched inside the query when a matcher is given, and left null otherwise.
+        Rows dated before since are filtered out inside the query, so they are never materialized.
+        With group_by_date, the rows of each date are adjacent and otherwise in file order.
+        """
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        try:
-            df = pl.read_csv(
-                file_path,
-                separator=self.delimiter,
-                decimal_comma=(self.decimal == ","),
-                encoding=self.encoding,
-                infer_schema_length=10000,
-            )
+        # With explicit column types the file is parsed in a single typed pass: the listed columns get
+        # their dtype and everything else stays a string. Otherwise polars infers types from the data.
+        csv_options = {
+            "separator": self.delimiter,
+            "decimal_comma": self.decimal == ",",
+        }
+        if self.column_types:
+            csv_options["infer_schema"] = False
+            csv_options["schema_overrides"] = self._schema_overrides()
+        else:
+            csv_options["infer_schema_length"] = 10000
+
+        encoding = STREAMING_ENCODINGS.get(self.encoding.lower())
+        if encoding:
+            lf = pl.scan_csv(file_path, encoding=encoding, **csv_options)
+        else:
+            # The scanner only understands UTF-8, so other encodings are decoded eagerly by read_csv.
+            lf = pl.read_csv(file_path, encoding=self.encoding, **csv_options).lazy()
 
-            required_cols = {self.date_col, self.amount_col, self.debit_credit_col}
+        columns = lf.collect_schema().names()
+        required_cols = {self.date_col, self.amount_col, self.debit_credit_col}
 
-            if not required_cols.issubset(df.columns):
-                missing = required_cols - set(df.columns)
-                raise ValueError(f"CSV missing required columns: {missing}")
+        if not required_cols.issubset(columns):
+            missing = required_cols - set(columns)
+            raise ValueError(f"CSV missing required columns: {missing}")
 
-            # Start building the lazy query
-            q = df.lazy().filter(
-                pl.col(self.debit_credit_col).str.strip_chars().str.to_uppercase()
-                == self.debit_value
+        q = lf.filter(
+            pl.col(self.debit_credit_col).str.strip_chars().str.to_uppercase()
+            == self.debit_value
+        )
+
+        # 1. Parse Date (a known format avoids trying several formats on every value). A known format is
+        # applied strictly, so a file in another format fails instead of having all its rows dropped.
+        q = q.with_columns(
+            pl.col(self.date_col)
+            .str.strptime(
+                pl.Date, format=self.date_format, strict=self.date_format is not None
             )
+            .alias("parsed_date")
+        )
+
+        # 2. Parse Amount (handle cents)
+        # We must .round() before casting to Int64 to handle floating point imprecision.
+        # E.g., 19.999999 should become 20, not truncated to 19.
+        q = q.with_columns(
+            (pl.col(self.amount_col).abs() * 100)
+            .round()
+            .cast(pl.Int64)
+            .alias("amount_cents")
+        )
 
-            # 1. Parse Date
+        # 3. Parse Receiver (Optional)
+        if self.receiver_col and self.receiver_col in columns:
             q = q.with_columns(
-                pl.col(self.date_col)
-                .str.strptime(pl.Date, strict=False)
-                .alias("parsed_date")
+                pl.col(self.receiver_col).fill_null("").alias("receiver_val")
             )
+        else:
+            q = q.with_columns(pl.lit(None).cast(pl.String).alias("receiver_val"))
 
-            # 2. Parse Amount (handle cents)
-            # We must .round() before casting to Int64 to handle floating point imprecision.
-            # E.g., 19.999999 should become 20, not truncated to 19.
+        # 4. Parse Description (Optional)
+        if self.description_col and self.description_col in columns:
             q = q.with_columns(
-                (pl.col(self.amount_col).abs() * 100)
-                .round()
-                .cast(pl.Int64)
-                .alias("amount_cents")
+                pl.col(self.description_col).fill_null("").alias("desc_val")
+            )
+        else:
+            q = q.with_columns(pl.lit(None).cast(pl.String).alias("desc_val"))
+
+        # 5. Skip already imported history (Optional)
+        if since:
+            q = q.filter(pl.col("parsed_date") >= since)
+
+        # 6. Apply auto-categorization rules (Optional)
+        if matcher:
+            category = matcher.expr(pl.col("receiver_val"), pl.col("desc_val"))
+        else:
+            category = pl.lit(None, dtype=pl.Int64)
+
+        # Final Selection
+        parsed = (
+            q.drop_nulls(subset=["parsed_date", "amount_cents"])
+            .filter(pl.col("amount_cents") > 0)
+            .select(
+                pl.col("parsed_date").alias("entry_date"),
+                pl.col("amount_cents").alias("amount"),
+                # Empty strings are stored as NULL, matching manually added transactions.
+                pl.when(pl.col("receiver_val") != "")
+                .then(pl.col("receiver_val"))
+                .alias("receiver"),
+                pl.when(pl.col("desc_val") != "")
+                .then(pl.col("desc_val"))
+                .alias("description"),
+                category.alias("category_id"),
             )
+        )
+
+        # Statements sorted by date in either direction are already grouped and keep streaming.
+        # Others are sorted, stably, which holds the parsed file in memory.
+        if group_by_date and not _dates_are_grouped(parsed):
+            parsed = parsed.sort("entry_date", maintain_order=True)
+        return parsed
+
+    def count_before(self, file_path: Path, day: date) -> int:
+        """Counts the expenses in a bank statement CSV file dated before day, reading only the columns needed."""
+        return (
+            self.scan(file_path)
+            .filter(pl.col("entry_date") < day)
+            .select(pl.len())
+            .collect()
+            .item()
+        )
+
+    def _conversion_error(self, file_path: Path, error: Exception) -> ValueError:
+        """Explains a value that the configured date format or column types could not read."""
+        # The first line names the column and the values; the rest are hints about polars' own API
+        reason = str(error).splitlines()[0]
+        return ValueError(
+            f"Could not read {file_path.name}: {reason}. "
+            "Check the date_format and column_types configured for this bank."
+        )
+
+    def iter_batches(
+        self,
+        file_path: Path,
+        *,
+        batch_size: int,
+        matcher: RuleMatcher | None = None,
+        since: date | None = None,
+    ) -> Iterator[pl.DataFrame]:
+        """
+        Streams a bank statement CSV file in chunks of at most batch_size parsed rows, grouped by date.
+        Only one chunk is materialized at a time, so memory use does not grow with the file size.
+        """
+        try:
+            lf = self.scan(file_path, matcher=matcher, since=since, group_by_date=True)
+            for batch in lf.collect_batches(chunk_size=batch_size):
+                if batch.height:
+                    yield batch
+        except FileNotFoundError:
+            raise
+        except pl.exceptions.InvalidOperationError as e:
+            raise self._conversion_error(file_path, e) from e
+        except Exception as e:
+            raise RuntimeError(f"Error parsing CSV: {e}") from e
 
-            # 3. Parse Receiver (Optional)
-            if self.receiver_col and self.receiver_col in df.columns:
-                q = q.with_columns(
-                    pl.col(self.receiver_col).fill_null("").alias("receiver_val")
-                )
-            else:
-                q = q.with_columns(pl.lit(None).cast(pl.String).alias("receiver_val"))
-
-            # 4. Parse Description (Optional)
-            if self.description_col and self.description_col in df.columns:
-                q = q.with_columns(
-                    pl.col(self.description_col).fill_null("").alias("desc_val")
-                )
-            else:
-                q = q.with_columns(pl.lit(None).cast(pl.String).alias("desc_val"))
-
-            # Final Selection
-            result = (
-                q.drop_nulls(subset=["parsed_date", "amount_cents"])
-                .filter(pl.col("amount_cents") > 0)
-                .select(["parsed_date", "amount_cents", "receiver_val", "desc_val"])
-            ).collect()
-
-            return [
-                Transaction(
-                    entry_date=row["parsed_date"],
-                    amount=row["amount_cents"],
-                    receiver=row["receiver_val"] or None,
-                    description=row["desc_val"] or None,
-                )
-                for row in result.to_dicts()
-            ]
+    def read_file(
+        self,
+        file_path: Path,
+        *,
+        matcher: RuleMatcher | None = None,
+        since: date | None = None,
+    ) -> pl.DataFrame:
+        """Parses a whole bank statement CSV file into a DataFrame with the columns produced by scan()."""
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
 
+        try:
+            return self.scan(file_path, matcher=matcher, since=since).collect()
+        except pl.exceptions.InvalidOperationError as e:
+            raise self._conversion_error(file_path, e) from e
         except Exception as e:
             raise RuntimeError(f"Error parsing CSV: {e}") from e
+
+    def write_arrow(
+        self,
+        file_path: Path,
+        target: Path,
+        *,
+        matcher: RuleMatcher | None = None,
+        since: date | None = None,
+    ) -> None:
+        """
+        Parses a bank statement CSV file into an Arrow IPC file at target, with the columns produced by scan()
+        and the rows grouped by date.
+        Rows are streamed to the target, so the parsed file is never held in memory as a whole.
+        """
+        try:
+            self.scan(
+                file_path, matcher=matcher, since=since, group_by_date=True
+            ).sink_ipc(target)
+        except FileNotFoundError:
+            raise
+        except pl.exceptions.InvalidOperationError as e:
+            raise self._conversion_error(file_path, e) from e
+        except Exception as e:
+            raise RuntimeError(f"Error parsing CSV: {e}") from e
+
+    def process_file(
+        self, file_path: Path, *, matcher: RuleMatcher | None = None
+    ) -> list[Transaction]:
+        """Processes a bank statement CSV file and returns a list of Transaction objects."""
+        result = self.read_file(file_path, matcher=matcher)
+
+        return [
+            Transaction(
+                entry_date=row["entry_date"],
+                amount=row["amount"],
+                receiver=row["receiver"],
+                description=row["description"],
+                category_id=row["category_id"],
+            )
+            for row in result.iter_rows(named=True)
+        ]
+
+
+class StatementSniff(SQLModel):
+    """What the first few kilobytes of a statement file reveal about its format."""
+
+    encoding: str
+    delimiter: str
+    columns: list[str]
+    rows: list[list[str]]
+
+    def decimal(self, column: str) -> str | None:
+        """Guesses the decimal separator used in a column, or None if its sampled values are whole numbers."""
+        if column not in self.columns:
+            return None
+
+        index = self.columns.index(column)
+        values = [row[index].strip() for row in self.rows if len(row) > index]
+        if any(DECIMAL_COMMA.search(value) for value in values):
+            return ","
+        if any(DECIMAL_POINT.search(value) for value in values):
+            return "."
+        return None
+
+
+def sniff_statement(
+    file_path: Path, *, encodings: list[str], delimiters: list[str]
+) -> StatementSniff:
+    """
+    Reads the start of a CSV file and works out its encoding, delimiter and header.
+    Encodings are tried in order, and the delimiter that splits the header into the most columns wins.
+    """
+    with open(file_path, "rb") as f:
+        data = f.read(SNIFF_BYTES)
+
+    for encoding in encodings:
+        try:
+            # Not final, since the sample may end in the middle of a multi-byte character
+            text = codecs.getincrementaldecoder(encoding)().decode(data, final=False)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError(f"Could not decode {file_path.name}.")
+
+    lines = text.removeprefix("\ufeff").splitlines()
+    if len(data) == SNIFF_BYTES:
+        # The last line was most likely cut off
+        lines = lines[:-1]
+    if not lines:
+        raise ValueError(f"{file_path.name} is empty.")
+
+    delimiter = max(
+        delimiters, key=lambda d: len(next(csv.reader(lines[:1], delimiter=d)))
+    )
+    rows = list(csv.reader(lines, delimiter=delimiter))
+
+    return StatementSniff(
+        encoding=_codec_name(encoding),
+        delimiter=delimiter,
+        columns=[column.strip() for column in rows[0]],
+        rows=rows[1:],
+    )
+
+
+def build_header_index(
+    banks: dict[str, BankConfig],
+) -> dict[str, list[tuple[str, frozenset[str]]]]:
+    """Indexes the header signature of each bank, i.e. the set of columns it reads, by delimiter."""
+    index: dict[str, list[tuple[str, frozenset[str]]]] = {}
+    for name, config in banks.items():
+        columns = {
+            config.date_col,
+            config.amount_col,
+            config.debit_credit_col,
+            config.receiver_col,
+            config.description_col,
+        }
+        index.setdefault(config.delimiter, []).append(
+            (name, frozenset(columns - {None}))
+        )
+    return index
+
+
+def detect_bank(file_path: Path, *, banks: dict[str, BankConfig]) -> str:
+    """
+    Picks the configured bank whose export format matches a statement file, judging by its first few kilobytes.
+    A bank matches when its delimiter and columns fit the header and its decimal separator fits the amounts.
+    Remaining ties go to the bank with the sniffed encoding, then to the one that reads the most columns.
+    """
+    index = build_header_index(banks)
+    codec_names = {name: _codec_name(config.encoding) for name, config in banks.items()}
+    encodings = list(dict.fromkeys(["utf-8", *filter(None, codec_names.values())]))
+    sniff = sniff_statement(file_path, encodings=encodings, delimiters=list(index))
+
+    header = set(sniff.columns)
+    scores = {}
+    for name, columns in index[sniff.delimiter]:
+        config = banks[name]
+        if not columns <= header or sniff.decimal(config.amount_col) not in (
+            None,
+            config.decimal,
+        ):
+            continue
+        scores[name] = (codec_names[name] == sniff.encoding, len(columns))
+
+    if not scores:
+        raise ValueError(
+            f"Could not detect the bank of {file_path.name}. Use --bank to choose one."
+        )
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    tied = [name for name in ranked if scores[name] == scores[ranked[0]]]
+    if len(tied) > 1:
+        raise ValueError(
+            f"{file_path.name} matches several banks ({', '.join(tied)}). Use --bank to choose one."
+        )
+
+    return ranked[0]
+
+
+def _codec_name(encoding: str) -> str | None:
+    """Normalizes an encoding name, or returns None if Python has no such codec (e.g. polars' utf8-lossy)."""
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
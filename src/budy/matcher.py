@@ -0,0 +1,80 @@
+from functools import lru_cache
+
+import polars as pl
+from sqlmodel import SQLModel
+
+
+class RuleMatcher(SQLModel):
+    """
+    Auto-categorization rules compiled into a single multi-pattern matcher.
+    Matching runs every pattern at once (Aho-Corasick inside polars) and keeps first-match-wins semantics.
+    """
+
+    # Distinct non-empty patterns and the position of the first rule that uses each one
+    patterns: list[str] = []
+    priorities: dict[str, int] = {}
+    # Category assigned by the rule at each position
+    category_ids: list[int] = []
+    # Category of an empty pattern, which matches every transaction
+    default_category_id: int | None = None
+
+    def expr(self, receiver: pl.Expr, description: pl.Expr) -> pl.Expr:
+        """Returns an expression that yields the matched category ID, or null if no rule matches."""
+        if not self.patterns:
+            return pl.lit(self.default_category_id, dtype=pl.Int64)
+
+        return self.rule_expr(receiver, description).replace_strict(
+            dict(enumerate(self.category_ids)),
+            default=self.default_category_id,
+            return_dtype=pl.Int64,
+        )
+
+    def rule_expr(self, receiver: pl.Expr, description: pl.Expr) -> pl.Expr:
+        """
+        Returns an expression that yields the position of the first matching rule, or null if no rule matches.
+        Positions count the compiled rules in priority order, and an empty pattern is last.
+        """
+        default = (
+            len(self.category_ids) if self.default_category_id is not None else None
+        )
+        if not self.patterns:
+            return pl.lit(default, dtype=pl.UInt32)
+
+        # Combine receiver and description for matching
+        text_to_match = pl.concat_str(
+            [receiver.fill_null(""), pl.lit(" "), description.fill_null("")]
+        ).str.to_lowercase()
+
+        # All overlapping matches are needed, since the earliest rule wins rather than the leftmost match.
+        first_rule = (
+            text_to_match.str.extract_many(self.patterns, overlapping=True)
+            .list.eval(
+                pl.element().replace_strict(self.priorities, return_dtype=pl.UInt32)
+            )
+            .list.min()
+        )
+        return first_rule.fill_null(default) if default is not None else first_rule
+
+
+@lru_cache(maxsize=8)
+def compile_rules(rules: tuple[tuple[str, int], ...]) -> RuleMatcher:
+    """Compiles (pattern, category_id) pairs, in priority order, into a RuleMatcher."""
+    priorities: dict[str, int] = {}
+    category_ids: list[int] = []
+    default_category_id = None
+
+    for pattern, category_id in rules:
+        if not pattern:
+            # An empty pattern matches everything, so no later rule can ever apply.
+            default_category_id = category_id
+            break
+
+        priorities.setdefault(pattern, len(category_ids))
+        category_ids.append(category_id)
+
+    return RuleMatcher(
+        patterns=list(priorities),
+        priorities=priorities,
+        category_ids=category_ids,
+        default_category_id=default_category_id,
+    )
@@ -0,0 +1,87 @@
+from functools import lru_cache
+
+import polars as pl
+
+from budy.config import settings
+
+# Every character str.strip() removes, so receivers are trimmed alike in Python, SQL and polars
+WHITESPACE = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004"
+    "\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000"
+)
+
+
+def get_name_variants(name: str) -> set[str]:
+    """Generates variants of a name (lowercase, initials, mixed forms)."""
+    clean_name = name.strip().lower()
+    parts = clean_name.split()
+
+    if not parts:
+        return {clean_name}
+
+    # Banks often format names inconsistently in statement descriptions (e.g., "J. Smith" vs "J.Smith" vs "J Smith").
+    # We generate all common variations to ensure we can identify the user regardless of how the bank formatted the receiver field.
+    variants = {clean_name}
+
+    # 1. All Initials (e.g. "khl", "k.h.l.", "k. h. l.")
+    initials_chars = [p[0] for p in parts]
+    variants.add("".join(initials_chars))
+    variants.add(".".join(initials_chars) + ".")
+    variants.add(". ".join(initials_chars) + ".")
+
+    if len(parts) > 1:
+        last_name = parts[-1]
+        first_names = parts[:-1]
+        first_initials_chars = [p[0] for p in first_names]
+
+        # 2. First name initial + Last name full (e.g. "k laurits", "k. laurits")
+        first_initial = first_names[0][0]
+        variants.add(f"{first_initial} {last_name}")
+        variants.add(f"{first_initial}. {last_name}")
+        variants.add(f"{first_initial}.{last_name}")
+
+        # 3. All first names initialed + Last name full (e.g. "k. h. laurits")
+        if len(first_names) > 1:
+            # "kh laurits"
+            variants.add(f"{''.join(first_initials_chars)} {last_name}")
+            # "k. h. laurits"
+            dotted_spaced = ". ".join(first_initials_chars) + "."
+            variants.add(f"{dotted_spaced} {last_name}")
+            # "k.h. laurits"
+            dotted_tight = ".".join(first_initials_chars) + "."
+            variants.add(f"{dotted_tight} {last_name}")
+
+    return variants
+
+
+@lru_cache(maxsize=8)
+def _user_name_variants(first_name: str, last_name: str) -> frozenset[str]:
+    """Precomputes the normalized name variants that identify transfers to the user."""
+    return frozenset(get_name_variants(f"{first_name} {last_name}"))
+
+
+def get_user_name_variants() -> frozenset[str]:
+    """Returns the user's name variants, or an empty set if no name is configured."""
+    if not settings.first_name or not settings.last_name:
+        return frozenset()
+    return _user_name_variants(settings.first_name, settings.last_name)
+
+
+def is_self_receiver(receiver: str | None) -> bool:
+    """Checks if the receiver is the configured user, i.e. the transaction is a transfer to oneself."""
+    if not receiver:
+        return False
+    return receiver.strip().lower() in get_user_name_variants()
+
+
+def self_receiver_expr(receiver: pl.Expr) -> pl.Expr:
+    """Vectorized is_self_receiver, for flagging whole batches of imported rows."""
+    variants = get_user_name_variants()
+    if not variants:
+        return pl.lit(False)
+    return (
+        receiver.str.strip_chars(WHITESPACE)
+        .str.to_lowercase()
+        .is_in(list(variants))
+        .fill_null(False)
+    )
@@ -0,0 +1,174 @@
+import calendar
+import shlex
+from collections.abc import Callable
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import ColumnElement, Executable, literal_column, true
+from sqlmodel import Session, col, select
+
+from budy.schemas import (
+    MIN_INDEXED_TERM,
+    Category,
+    QueryPlanStep,
+    Transaction,
+    transaction_fts,
+)
+
+FILTER_HELP = """Filters, all of which must match. Prefix one with - to negate it.
+
+  amount:25  amount:10..50  amount:>100  amount:<=9.99
+  date:2024  date:2024-03  date:2024-01..2024-06  date:>=2024-05-01
+  category:Food  category:Food,Transport
+  payee:rimi  payee:"circle k"
+  is:self  is:uncategorized"""
+
+Bounds = tuple[object, object]
+
+
+def _amount_bounds(value: str) -> Bounds:
+    """Converts an amount in dollars/euros to cents, as both ends of its range."""
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        amount = None
+    if amount is None or not amount.is_finite():
+        raise ValueError(f"'{value}' is not an amount.")
+
+    cents = int(amount * 100)
+    return cents, cents
+
+
+def _date_bounds(value: str) -> Bounds:
+    """Returns the first and last day of a year (YYYY), month (YYYY-MM) or day (YYYY-MM-DD)."""
+    parts = value.split("-")
+    try:
+        numbers = [int(part) for part in parts]
+        if len(numbers) == 1:
+            return date(numbers[0], 1, 1), date(numbers[0], 12, 31)
+        if len(numbers) == 2:
+            year, month = numbers
+            return date(year, month, 1), date(
+                year, month, calendar.monthrange(year, month)[1]
+            )
+        if len(numbers) == 3:
+            day = date(*numbers)
+            return day, day
+    except ValueError:
+        pass
+    raise ValueError(f"'{value}' is not a date like 2024, 2024-03 or 2024-03-15.")
+
+
+def _range(
+    column: ColumnElement, value: str, bounds: Callable[[str], Bounds]
+) -> ColumnElement[bool]:
+    """
+    Compiles a value, a comparison such as ">=10", or an inclusive range such as "10..50" into
+    plain comparisons on the column, which an index on it can serve.
+    """
+    for op in (">=", "<=", ">", "<"):
+        if value.startswith(op):
+            low, high = bounds(value[len(op) :])
+            return {
+                ">=": column >= low,
+                "<=": column <= high,
+                ">": column > high,
+                "<": column < low,
+            }[op]
+
+    if ".." in value:
+        start, _, end = value.partition("..")
+        if not start and not end:
+            raise ValueError("A range needs at least one end, e.g. 10.. or ..50.")
+        if not start:
+            return column <= bounds(end)[1]
+        if not end:
+            return column >= bounds(start)[0]
+        return column.between(bounds(start)[0], bounds(end)[1])
+
+    low, high = bounds(value)
+    return column == low if low == high else column.between(low, high)
+
+
+def _category(value: str) -> ColumnElement[bool]:
+    """Matches transactions in any of the comma-separated categories, by name regardless of case."""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if not names:
+        raise ValueError("category: needs a category name.")
+    return col(Transaction.category_id).in_(
+        select(Category.id).where(col(Category.name).collate("NOCASE").in_(names))
+    )
+
+
+def _payee(value: str) -> ColumnElement[bool]:
+    """Matches transactions whose receiver contains the text, regardless of case."""
+    if not value:
+        raise ValueError("payee: needs some text to look for.")
+    if len(value) < MIN_INDEXED_TERM:
+        return col(Transaction.receiver).icontains(value, autoescape=True)
+
+    # Looked up in the receiver column of the full-text index instead of scanning every receiver
+    phrase = '"' + value.replace('"', '""') + '"'
+    return col(Transaction.id).in_(
+        select(transaction_fts.c.rowid).where(
+            literal_column("transaction_fts").match(f"receiver : {phrase}")
+        )
+    )
+
+
+def _flag(value: str) -> ColumnElement[bool]:
+    """Matches self-transfers or uncategorized transactions."""
+    if value == "self":
+        return col(Transaction.is_self) == true()
+    if value == "uncategorized":
+        return col(Transaction.category_id).is_(None)
+    raise ValueError(f"'is:{value}' is not a filter. Use is:self or is:uncategorized.")
+
+
+FIELDS: dict[str, Callable[[str], ColumnElement[bool]]] = {
+    "amount": lambda value: _range(col(Transaction.amount), value, _amount_bounds),
+    "date": lambda value: _range(col(Transaction.entry_date), value, _date_bounds),
+    "category": _category,
+    "payee": _payee,
+    "is": _flag,
+}
+
+
+def compile_filter(expression: str) -> list[ColumnElement[bool]]:
+    """
+    Compiles a filter expression such as "amount:>20 date:2024 -category:Rent" into WHERE clauses
+    on the transaction table. Values are bound as parameters, never pasted into the SQL.
+    Raises ValueError, with a message meant for the user, if the expression is not valid.
+    """
+    try:
+        terms = shlex.split(expression)
+    except ValueError:
+        raise ValueError("The filter has an unclosed quote.")
+
+    clauses = []
+    for term in terms:
+        negated = term.startswith("-")
+        field, sep, value = term.removeprefix("-").partition(":")
+        if not sep or field not in FIELDS:
+            raise ValueError(
+                f"'{term}' is not a filter. Use one of: "
+                + ", ".join(f"{name}:" for name in FIELDS)
+            )
+
+        clause = FIELDS[field](value.strip())
+        # IS NOT 1 also keeps rows where the clause is NULL, e.g. uncategorized ones for -category:Food
+        clauses.append(clause.is_not(true()) if negated else clause)
+    return clauses
+
+
+def explain_query(*, session: Session, stmt: Executable) -> list[QueryPlanStep]:
+    """Asks SQLite how it would run a statement, without running it."""
+    # Values are inlined, as IN lists only get their placeholders at execution
+    sql = stmt.compile(
+        dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+    return [
+        QueryPlanStep(id=step_id, parent=parent, detail=detail)
+        for step_id, parent, _, detail in plan
+    ]
@@ -1,27 +1,27 @@
-from datetime import date
+import shlex
+from datetime import date, datetime
+from types import ModuleType
 from typing import Annotated, Optional
 
 from rich.console import Console
 from sqlmodel import Session
-from typer import Argument, Option, Typer
+from typer import Argument, BadParameter, Option, Typer
 
 from budy.config import settings
 from budy.database import engine
-from budy.services.report import (
-    generate_monthly_report_data,
-    get_top_payees,
-    get_volatility_report_data,
-    get_weekday_report_data,
-    get_yearly_report_data,
-)
+from budy.schemas import PageCursor, ReportEngine, VolatilityGrouping
+from budy.services import analytics, report
+from budy.services.cache import cached_report
 from budy.services.transaction import search_transactions
 from budy.views.budget import (
     render_budget_status,
 )
 from budy.views.messages import (
+    render_next_page,
     render_warning,
 )
 from budy.views.report import (
+    render_group_volatility_report,
     render_payee_ranking,
     render_search_results,
     render_volatility_report,
@@ -33,6 +33,11 @@ app = Typer(no_args_is_help=True)
 console = Console()
 
 
+def get_report_service(engine: ReportEngine) -> ModuleType:
+    """Picks the module whose report functions run on the chosen engine."""
+    return analytics if engine == ReportEngine.polars else report
+
+
 @app.command(name="month")
 def show_monthly_report(
     month: Annotated[
@@ -49,15 +54,42 @@ def show_monthly_report(
             help="Target year.",
         ),
     ] = None,
+    report_engine: Annotated[
+        ReportEngine,
+        Option(
+            "--engine",
+            help="Compute the report in SQLite, or in memory with polars.",
+        ),
+    ] = ReportEngine.sql,
+    no_cache: Annotated[
+        bool,
+        Option(
+            "--no-cache",
+            help="Recompute the report instead of reusing a cached result.",
+        ),
+    ] = False,
 ) -> None:
     """Show the budget status report for a specific month."""
     today = date.today()
     target_month = month or today.month
     target_year = year or today.year
 
+    service = get_report_service(report_engine)
     with Session(engine) as session:
-        data = generate_monthly_report_data(
-            session=session, target_month=target_month, target_year=target_year
+        data = cached_report(
+            session=session,
+            name="month",
+            # The current month's forecast depends on today's date
+            params={
+                "month": target_month,
+                "year": target_year,
+                "today": today,
+                "engine": report_engine.value,
+            },
+            compute=lambda: service.generate_monthly_report_data(
+                session=session, target_month=target_month, target_year=target_year
+            ),
+            use_cache=not no_cache,
         )
 
     if not data.budget:
@@ -76,7 +108,9 @@ def show_monthly_report(
 def run_search(
     query: Annotated[
         str,
-        Argument(help="Keyword to search for (in receiver or description)."),
+        Argument(
+            help="Words to search for in the receiver or description. End a word with * to match word starts only."
+        ),
     ],
     limit: Annotated[
         int,
@@ -87,18 +121,37 @@ def run_search(
             help="Maximum number of results to display.",
         ),
     ] = 20,
+    after: Annotated[
+        str | None,
+        Option(
+            "--after",
+            metavar="CURSOR",
+            help="Continue from the cursor printed below the previous page.",
+        ),
+    ] = None,
 ) -> None:
-    """Search transactions by keyword in receiver or description."""
+    """Search transactions by keywords in receiver or description, best matches first."""
     with Session(engine) as session:
-        results = search_transactions(session=session, query=query, limit=limit)
+        page = search_transactions(
+            session=session, query=query, limit=limit, after=parse_cursor(after)
+        )
 
-    if not results:
+    if not page.results:
         console.print(
             render_warning(message=f"No transactions found matching '{query}'.")
         )
         return
 
-    console.print(render_search_results(results=results, query=query, limit=limit))
+    console.print(render_search_results(results=page.results, query=query, limit=limit))
+    if page.next_cursor:
+        console.print(
+            render_next_page(
+                command=f"budy reports search {shlex.quote(query)} "
+                f"--limit {limit} --after {page.next_cursor.encode()}"
+            ),
+            # The cursor must stay on one line to be copied
+            soft_wrap=True,
+        )
 
 
 @app.command(name="payees")
@@ -129,11 +182,37 @@ def show_top_payees(
             help="Sort by transaction count instead of total amount.",
         ),
     ] = False,
+    report_engine: Annotated[
+        ReportEngine,
+        Option(
+            "--engine",
+            help="Compute the report in SQLite, or in memory with polars.",
+        ),
+    ] = ReportEngine.sql,
+    no_cache: Annotated[
+        bool,
+        Option(
+            "--no-cache",
+            help="Recompute the report instead of reusing a cached result.",
+        ),
+    ] = False,
 ) -> None:
     """Rank payees by total spending or frequency."""
+    service = get_report_service(report_engine)
     with Session(engine) as session:
-        top_payees = get_top_payees(
-            session=session, year=year, limit=limit, by_count=by_count
+        top_payees = cached_report(
+            session=session,
+            name="payees",
+            params={
+                "year": year,
+                "limit": limit,
+                "by_count": by_count,
+                "engine": report_engine.value,
+            },
+            compute=lambda: service.get_top_payees(
+                session=session, year=year, limit=limit, by_count=by_count
+            ),
+            use_cache=not no_cache,
         )
 
     if not top_payees:
@@ -156,10 +235,59 @@ def show_volatility_report(
             help="Target year.",
         ),
     ] = None,
+    by: Annotated[
+        VolatilityGrouping | None,
+        Option(
+            "--by",
+            help="Compare each transaction with its own category or payee instead of all spending.",
+        ),
+    ] = None,
+    min_samples: Annotated[
+        int,
+        Option(
+            "--min-samples",
+            min=2,
+            help="Fewest transactions needed to judge what is unusual for a group.",
+        ),
+    ] = 10,
+    report_engine: Annotated[
+        ReportEngine,
+        Option(
+            "--engine",
+            help="Compute the report in SQLite, or in memory with polars.",
+        ),
+    ] = ReportEngine.sql,
 ) -> None:
     """Analyze spending volatility and outliers."""
+    service = get_report_service(report_engine)
     with Session(engine) as session:
-        data = get_volatility_report_data(session=session, year=year)
+        if by:
+            group_data = service.get_group_volatility_report_data(
+                session=session, year=year, by=by, min_samples=min_samples
+            )
+        else:
+            data = service.get_volatility_report_data(
+                session=session, year=year, min_samples=min_samples
+            )
+
+    if by:
+        if not group_data:
+            console.print(
+                render_warning(
+                    message=f"No {by.value} has at least {min_samples} transactions."
+                )
+            )
+            return
+        if not group_data.outliers:
+            console.print(
+                render_warning(
+                    message=f"No transactions stand out within their {by.value}."
+                )
+            )
+            return
+
+        console.print(render_group_volatility_report(data=group_data, year=year))
+        return
 
     if not data:
         console.print(render_warning(message="No transactions found."))
@@ -169,10 +297,50 @@ def show_volatility_report(
 
 
 @app.command(name="weekday")
-def show_weekday_report() -> None:
+def show_weekday_report(
+    year: Annotated[
+        int | None,
+        Option(
+            "--year",
+            "-y",
+            min=settings.min_year,
+            max=settings.max_year,
+            help="Target year.",
+        ),
+    ] = None,
+    start_date: Annotated[
+        datetime | None,
+        Option(
+            "--from",
+            formats=["%Y-%m-%d", "%Y/%m/%d"],
+            help="Only include transactions on or after this date (YYYY-MM-DD).",
+        ),
+    ] = None,
+    end_date: Annotated[
+        datetime | None,
+        Option(
+            "--to",
+            formats=["%Y-%m-%d", "%Y/%m/%d"],
+            help="Only include transactions on or before this date (YYYY-MM-DD).",
+        ),
+    ] = None,
+    report_engine: Annotated[
+        ReportEngine,
+        Option(
+            "--engine",
+            help="Compute the report in SQLite, or in memory with polars.",
+        ),
+    ] = ReportEngine.sql,
+) -> None:
     """Analyze spending habits by day of the week."""
+    service = get_report_service(report_engine)
     with Session(engine) as session:
-        report_data = get_weekday_report_data(session=session)
+        report_data = service.get_weekday_report_data(
+            session=session,
+            year=year,
+            start_date=start_date.date() if start_date else None,
+            end_date=end_date.date() if end_date else None,
+        )
 
     if not report_data:
         console.print(render_warning(message="No transactions found to analyze."))
@@ -181,6 +349,31 @@ def show_weekday_report() -> None:
     console.print(render_weekday_report(report_data=report_data))
 
 
+def parse_cursor(value: str | None) -> PageCursor | None:
+    """Parses a page cursor printed by a previous command."""
+    if not value:
+        return None
+    try:
+        return PageCursor.decode(value)
+    except ValueError:
+        raise BadParameter(f"'{value}' is not a page cursor.")
+
+
+def parse_year_range(value: str) -> tuple[int, int]:
+    """Parses a year range such as "2022-2024", or a single year."""
+    start, _, end = value.partition("-")
+    try:
+        start_year, end_year = int(start), int(end or start)
+    except ValueError:
+        raise BadParameter(f"'{value}' is not a year range like 2022-2024.")
+
+    if not settings.min_year <= start_year <= end_year <= settings.max_year:
+        raise BadParameter(
+            f"Years must be ascending and between {settings.min_year} and {settings.max_year}."
+        )
+    return start_year, end_year
+
+
 @app.command(name="year")
 def show_yearly_report(
     year: Annotated[
@@ -193,17 +386,60 @@ def show_yearly_report(
             help="Target year.",
         ),
     ] = None,
+    years: Annotated[
+        str | None,
+        Option(
+            "--years",
+            metavar="START-END",
+            help="Range of years to show, e.g. 2022-2024.",
+        ),
+    ] = None,
+    report_engine: Annotated[
+        ReportEngine,
+        Option(
+            "--engine",
+            help="Compute the report in SQLite, or in memory with polars.",
+        ),
+    ] = ReportEngine.sql,
+    no_cache: Annotated[
+        bool,
+        Option(
+            "--no-cache",
+            help="Recompute the report instead of reusing a cached result.",
+        ),
+    ] = False,
 ):
-    """Show the budget status report for a specific year."""
+    """Show the budget status report for a specific year or range of years."""
+    if year and years:
+        raise BadParameter("Use either --year or --years, not both.")
+
     target_year = year or date.today().year
+    start_year, end_year = (
+        parse_year_range(years) if years else (target_year, target_year)
+    )
 
+    service = get_report_service(report_engine)
     with Session(engine) as session:
-        monthly_reports = get_yearly_report_data(session=session, year=target_year)
+        reports = cached_report(
+            session=session,
+            name="year",
+            params={
+                "start": start_year,
+                "end": end_year,
+                "today": date.today(),
+                "engine": report_engine.value,
+            },
+            compute=lambda: service.get_multi_year_report_data(
+                session=session, start_year=start_year, end_year=end_year
+            ),
+            use_cache=not no_cache,
+        )
 
-    console.print(f"\n[bold underline]Yearly Overview: {target_year}[/]\n")
-    console.print(
-        render_yearly_report(monthly_reports=monthly_reports, year=target_year)
-    )
+    for report_year, monthly_reports in reports.items():
+        console.print(f"\n[bold underline]Yearly Overview: {report_year}[/]\n")
+        console.print(
+            render_yearly_report(monthly_reports=monthly_reports, year=report_year)
+        )
 
 
 @app.callback()
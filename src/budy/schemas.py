@@ -1,5 +1,9 @@
+import base64
 from datetime import date
+from enum import Enum
+from typing import Self
 
+from sqlalchemy import DDL, JSON, Column, Index, column, event, table
 from sqlmodel import Field, SQLModel
 
 
@@ -22,21 +26,183 @@ class CategoryRule(SQLModel, table=True):
 class Transaction(SQLModel, table=True):
     """Class that defines all transactions."""
 
+    # Covering indexes, from which the reports read everything they need without visiting the table:
+    # spending over a date range, and spending per receiver.
+    __table_args__ = (
+        Index(
+            "ix_transaction_date_amount",
+            "entry_date",
+            "amount",
+            "category_id",
+            "is_self",
+        ),
+        Index(
+            "ix_transaction_receiver_amount",
+            "receiver",
+            "entry_date",
+            "amount",
+            "is_self",
+        ),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     amount: int
+    # Also indexed on its own, as (entry_date, id) is the order history and searches are paged in
     entry_date: date = Field(index=True)
-    receiver: str | None = Field(default=None, index=True)
+    receiver: str | None = Field(default=None)
     description: str | None = Field(default=None)
     category_id: int | None = Field(default=None, foreign_key="category.id")
+    # Stable hash of an imported row, used to skip rows that were already imported.
+    fingerprint: str | None = Field(default=None, unique=True, index=True)
+    # Whether the receiver is the user, i.e. money moved between their own accounts. Reports leave these out.
+    is_self: bool = Field(default=False, index=True)
+
+
+class MonthlyTotals(SQLModel, table=True):
+    """Spending rolled up per month, category and self-transfer flag, kept current by triggers."""
+
+    __tablename__ = "monthly_totals"
+
+    year: int = Field(primary_key=True)
+    month: int = Field(primary_key=True)
+    # 0 for uncategorized transactions, as NULL would never match in upserts
+    category_id: int = Field(default=0, primary_key=True)
+    is_self: bool = Field(default=False, primary_key=True)
+    total: int = 0
+    count: int = 0
+
+
+def _rollup_upsert(row: str, sign: str) -> str:
+    """Adds (sign "+") or removes (sign "-") the NEW or OLD transaction row to its monthly total."""
+    upsert = f"""
+        INSERT INTO monthly_totals (year, month, category_id, is_self, total, count)
+        VALUES (
+            CAST(strftime('%%Y', {row}.entry_date) AS INTEGER),
+            CAST(strftime('%%m', {row}.entry_date) AS INTEGER),
+            ifnull({row}.category_id, 0),
+            {row}.is_self,
+            {sign}{row}.amount,
+            {sign}1
+        )
+        ON CONFLICT (year, month, category_id, is_self) DO UPDATE SET
+            total = total + excluded.total,
+            count = count + excluded.count;
+    """
+    if sign == "+":
+        return upsert
+
+    # Removing a month's last row leaves an empty total behind
+    return f"""{upsert}
+        DELETE FROM monthly_totals
+        WHERE year = CAST(strftime('%%Y', {row}.entry_date) AS INTEGER)
+            AND month = CAST(strftime('%%m', {row}.entry_date) AS INTEGER)
+            AND category_id = ifnull({row}.category_id, 0)
+            AND is_self = {row}.is_self
+            AND count = 0;
+    """
+
+
+# Created with IF NOT EXISTS on every create_all, so databases created before the rollup get them too.
+for _trigger in (
+    f"""CREATE TRIGGER IF NOT EXISTS monthly_totals_insert
+    AFTER INSERT ON "transaction" BEGIN {_rollup_upsert("NEW", "+")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS monthly_totals_delete
+    AFTER DELETE ON "transaction" BEGIN {_rollup_upsert("OLD", "-")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS monthly_totals_update
+    AFTER UPDATE OF amount, entry_date, category_id, is_self ON "transaction" BEGIN
+    {_rollup_upsert("OLD", "-")} {_rollup_upsert("NEW", "+")} END""",
+):
+    event.listen(SQLModel.metadata, "after_create", DDL(_trigger))
+
+
+# Full-text index over receiver and description. The trigram tokenizer matches any substring of at
+# least three characters, and the index stores no copy of the text (content="transaction").
+transaction_fts = table("transaction_fts", column("rowid"), column("rank"))
+# The trigram tokenizer cannot look up anything shorter
+MIN_INDEXED_TERM = 3
+
+for _ddl in (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transaction_fts USING fts5(
+    receiver, description, content="transaction", content_rowid="id", tokenize="trigram")""",
+    """CREATE TRIGGER IF NOT EXISTS transaction_fts_insert
+    AFTER INSERT ON "transaction" BEGIN
+        INSERT INTO transaction_fts (rowid, receiver, description)
+        VALUES (NEW.id, NEW.receiver, NEW.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transaction_fts_delete
+    AFTER DELETE ON "transaction" BEGIN
+        INSERT INTO transaction_fts (transaction_fts, rowid, receiver, description)
+        VALUES ('delete', OLD.id, OLD.receiver, OLD.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transaction_fts_update
+    AFTER UPDATE OF receiver, description ON "transaction" BEGIN
+        INSERT INTO transaction_fts (transaction_fts, rowid, receiver, description)
+        VALUES ('delete', OLD.id, OLD.receiver, OLD.description);
+        INSERT INTO transaction_fts (rowid, receiver, description)
+        VALUES (NEW.id, NEW.receiver, NEW.description);
+    END""",
+):
+    event.listen(SQLModel.metadata, "after_create", DDL(_ddl))
+
+# Not part of the metadata, so drop_all would otherwise leave an index of rows that no longer exist
+event.listen(
+    SQLModel.metadata, "before_drop", DDL("DROP TABLE IF EXISTS transaction_fts")
+)
+
+
+class DataVersion(SQLModel, table=True):
+    """Single-row counter bumped by every write, so cached reports can tell when they are stale."""
+
+    __tablename__ = "data_version"
+
+    id: int = Field(default=1, primary_key=True)
+    # Random per database, so results cached for a deleted and recreated database never match
+    epoch: str
+    version: int = 0
+    # Version of the last write that changed or deleted existing transactions, rather than only adding new ones
+    ledger_rewritten: int = 0
+
+
+event.listen(
+    SQLModel.metadata,
+    "after_create",
+    DDL(
+        "INSERT OR IGNORE INTO data_version (id, epoch, version, ledger_rewritten) "
+        "VALUES (1, lower(hex(randomblob(16))), 0, 0)"
+    ),
+)
+
+
+class ImportWatermark(SQLModel, table=True):
+    """High-water mark of the statements imported from a bank."""
+
+    bank: str = Field(primary_key=True)
+    last_date: date
+    # Fingerprints of the imported rows dated last_date
+    boundary_fingerprints: list[str] = Field(
+        default_factory=list, sa_column=Column(JSON, nullable=False)
+    )
 
 
 class Budget(SQLModel, table=True):
     """Class that defines all budgets."""
 
+    # One budget per month, also found by year alone
+    __table_args__ = (
+        Index("ix_budget_year_month", "target_year", "target_month", unique=True),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     amount: int
-    target_month: int = Field(index=True)
-    target_year: int = Field(index=True)
+    target_month: int
+    target_year: int
+
+
+class ReportEngine(str, Enum):
+    """Where reports are computed: in SQLite, or in memory with polars."""
+
+    sql = "sql"
+    polars = "polars"
 
 
 class ForecastData(SQLModel):
@@ -66,6 +232,32 @@ class VolatilityReportData(SQLModel):
     outliers: list[Transaction]
 
 
+class VolatilityGrouping(str, Enum):
+    """Groups whose own spending pattern a transaction is compared against."""
+
+    category = "category"
+    payee = "payee"
+
+
+class GroupOutlierItem(SQLModel):
+    """Represents a transaction that is unusually large for its category or payee."""
+
+    transaction: Transaction
+    group_name: str
+    group_avg: float
+    group_stdev: float
+    z_score: float
+
+
+class GroupVolatilityReportData(SQLModel):
+    """Represents data for a per-category or per-payee volatility report."""
+
+    by: VolatilityGrouping
+    group_count: int
+    total_count: int
+    outliers: list[GroupOutlierItem]
+
+
 class WeekdayReportItem(SQLModel):
     """Represents a single item in a weekday spending report."""
 
@@ -84,6 +276,108 @@ class PayeeRankingItem(SQLModel):
     avg: int
 
 
+class PageCursor(SQLModel):
+    """Position of the last row of a page, from which the next page continues."""
+
+    entry_date: date
+    id: int
+    # Search rank of the row, when pages are ordered by relevance first
+    rank: float | None = None
+
+    def encode(self) -> str:
+        """Packs the cursor into a short opaque token for the command line."""
+        rank = "" if self.rank is None else repr(self.rank)
+        packed = f"{self.entry_date.isoformat()}|{self.id}|{rank}"
+        return base64.urlsafe_b64encode(packed.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> Self:
+        """Unpacks a token made by encode(). Raises ValueError if it is not one."""
+        packed = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        entry_date, row_id, rank = packed.split("|")
+        return cls.model_validate(
+            {"entry_date": entry_date, "id": row_id, "rank": rank or None}
+        )
+
+
+class TransactionPage(SQLModel):
+    """Represents a page of transaction history, grouped by date."""
+
+    days: list[tuple[date, list[Transaction]]]
+    # None on the last page
+    next_cursor: PageCursor | None = None
+
+
+class SearchPage(SQLModel):
+    """Represents a page of search or query results."""
+
+    results: list[Transaction]
+    # None on the last page
+    next_cursor: PageCursor | None = None
+
+
+class QueryPlanStep(SQLModel):
+    """Represents one step of SQLite's plan for a query, as shown by EXPLAIN QUERY PLAN."""
+
+    id: int
+    parent: int
+    detail: str
+
+    @property
+    def full_scan(self) -> bool:
+        """Whether the step may read every row of a table, directly or by walking all of an index."""
+        # "SCAN t USING [COVERING] INDEX" only stops early when a LIMIT is met, which the plan does not
+        # show, so only SEARCH steps are known to be bounded. Virtual tables index themselves.
+        return self.detail.startswith("SCAN ") and not (
+            "VIRTUAL TABLE" in self.detail or self.detail == "SCAN CONSTANT ROW"
+        )
+
+
+class ImportResult(SQLModel):
+    """Represents the running totals of a bank statement import."""
+
+    filename: str = ""
+    bank: str = ""
+    count: int = 0
+    total: int = 0
+    skipped: int = 0
+    batches: int = 0
+    first_id: int | None = None
+    last_id: int | None = None
+    parse_seconds: float = 0.0
+    write_seconds: float = 0.0
+    # Rows dated before this were left out, thanks to the bank's watermark
+    since: date | None = None
+    # Expenses in the file dated before since, which were neither imported nor checked against the ledger
+    older: int = 0
+
+
+class SnapshotResult(SQLModel):
+    """Represents the outcome of refreshing the ledger snapshot."""
+
+    rows: int
+    parts: int
+    appended: int = 0
+    rebuilt: bool = False
+
+
+class RuleHitItem(SQLModel):
+    """Represents how many transactions a single rule matched."""
+
+    rule_id: int
+    pattern: str
+    category_name: str
+    hits: int
+    changes: int
+
+
+class RuleApplyResult(SQLModel):
+    """Represents the outcome of re-applying rules to existing transactions."""
+
+    hits: list[RuleHitItem]
+    updated: int
+
+
 class BudgetSuggestion(SQLModel):
     """Represents a budget suggestion for a specific month."""
 
@@ -0,0 +1,280 @@
+import calendar
+from datetime import date
+
+import polars as pl
+from sqlmodel import Session, col, desc, select
+
+from budy.names import WHITESPACE
+from budy.schemas import (
+    Budget,
+    Category,
+    GroupOutlierItem,
+    GroupVolatilityReportData,
+    MonthlyReportData,
+    PayeeRankingItem,
+    Transaction,
+    VolatilityGrouping,
+    VolatilityReportData,
+    WeekdayReportItem,
+)
+from budy.services.report import (
+    OUTLIER_Z_SCORE,
+    _build_monthly_report,
+    _build_yearly_reports,
+    _get_budgets,
+)
+from budy.services.snapshot import scan_ledger
+
+# The report functions below mirror those in budy.services.report, but compute the statistics in memory
+# with polars, reading the ledger from its memory-mapped columnar snapshot instead of SQLite.
+
+LEDGER_COLUMNS = ["id", "entry_date", "amount", "receiver", "category_id"]
+
+
+def load_ledger(
+    *, session: Session, filters: list[pl.Expr] | None = None
+) -> pl.DataFrame:
+    """Loads the columns reports need into a DataFrame, leaving out transfers between the user's own accounts."""
+    return (
+        scan_ledger(session=session)
+        .filter(pl.col("is_self").not_(), *(filters or []))
+        .select(LEDGER_COLUMNS)
+        .collect()
+    )
+
+
+def _date_filter(start: date, end: date) -> list[pl.Expr]:
+    """Limits the ledger to the transactions between two dates, inclusive."""
+    return [pl.col("entry_date").is_between(start, end)]
+
+
+def _year_filters(year: int | None) -> list[pl.Expr]:
+    """Limits the ledger to a single year, or not at all."""
+    if not year:
+        return []
+    return _date_filter(date(year, 1, 1), date(year, 12, 31))
+
+
+def _payee_name() -> pl.Expr:
+    """The receiver with surrounding whitespace trimmed, or "Unknown", as in the SQL reports."""
+    name = pl.col("receiver").str.strip_chars(WHITESPACE)
+    return pl.when(name != "").then(name).otherwise(pl.lit("Unknown"))
+
+
+def generate_monthly_report_data(
+    *,
+    session: Session,
+    target_month: int,
+    target_year: int,
+) -> MonthlyReportData:
+    """Generates data for the monthly budget status report."""
+    budget = session.exec(
+        select(Budget).where(
+            Budget.target_year == target_year,
+            Budget.target_month == target_month,
+        )
+    ).first()
+
+    _, last_day = calendar.monthrange(target_year, target_month)
+    ledger = load_ledger(
+        session=session,
+        filters=_date_filter(
+            date(target_year, target_month, 1),
+            date(target_year, target_month, last_day),
+        ),
+    )
+
+    return _build_monthly_report(
+        budget=budget,
+        total_spent=ledger["amount"].sum(),
+        target_month=target_month,
+        target_year=target_year,
+        today=date.today(),
+    )
+
+
+def get_multi_year_report_data(
+    *, session: Session, start_year: int, end_year: int
+) -> dict[int, list[MonthlyReportData]]:
+    """Gathers the yearly report of every year in a range, keyed by year."""
+    ledger = load_ledger(
+        session=session,
+        filters=_date_filter(date(start_year, 1, 1), date(end_year, 12, 31)),
+    )
+    monthly_totals = ledger.group_by(
+        pl.col("entry_date").dt.year().alias("year"),
+        pl.col("entry_date").dt.month().alias("month"),
+    ).agg(pl.col("amount").sum())
+    totals = {(y, m): total for y, m, total in monthly_totals.iter_rows()}
+
+    return _build_yearly_reports(
+        budgets=_get_budgets(session=session, start_year=start_year, end_year=end_year),
+        totals=totals,
+        start_year=start_year,
+        end_year=end_year,
+    )
+
+
+def get_top_payees(
+    *,
+    session: Session,
+    year: int | None,
+    limit: int,
+    by_count: bool = False,
+) -> list[PayeeRankingItem]:
+    """Ranks payees by total spending or transaction count."""
+    ledger = load_ledger(session=session, filters=_year_filters(year))
+    ranking = (
+        ledger.group_by(_payee_name().alias("name"))
+        .agg(pl.col("amount").sum().alias("total"), pl.len().alias("count"))
+        .sort(["count" if by_count else "total", "name"], descending=[True, False])
+        .head(limit)
+        .with_columns((pl.col("total") // pl.col("count")).alias("avg"))
+    )
+
+    return [PayeeRankingItem(**row) for row in ranking.iter_rows(named=True)]
+
+
+def get_volatility_report_data(
+    *, session: Session, year: int | None, min_samples: int = 10
+) -> VolatilityReportData | None:
+    """Calculates spending volatility and identifies outliers."""
+    ledger = load_ledger(session=session, filters=_year_filters(year))
+
+    # A minimum sample size is required to calculate a meaningful standard deviation and avoid flagging normal transactions as outliers in sparse datasets.
+    if ledger.height < min_samples:
+        return None
+
+    avg_amount = ledger["amount"].mean()
+    stdev = ledger["amount"].std() or 0.0
+    threshold = avg_amount + (OUTLIER_Z_SCORE * stdev)
+
+    outlier_ids = (
+        ledger.filter(pl.col("amount") > threshold)
+        .sort("amount", descending=True)
+        .head(5)["id"]
+        .to_list()
+    )
+    outliers = session.exec(
+        select(Transaction)
+        .where(col(Transaction.id).in_(outlier_ids))
+        .order_by(desc(Transaction.amount))
+    ).all()
+
+    return VolatilityReportData(
+        total_count=ledger.height,
+        avg_amount=avg_amount,
+        stdev_amount=stdev,
+        outliers=list(outliers),
+    )
+
+
+def get_group_volatility_report_data(
+    *,
+    session: Session,
+    year: int | None,
+    by: VolatilityGrouping,
+    min_samples: int = 10,
+    limit: int = 10,
+) -> GroupVolatilityReportData | None:
+    """
+    Identifies transactions that are outliers within their own category or payee.
+    Each group's mean and standard deviation are window expressions over the group key.
+    """
+    if by == VolatilityGrouping.category:
+        group_key = pl.col("category_id").fill_null(0)
+    else:
+        group_key = _payee_name()
+
+    amount = pl.col("amount")
+    scored = (
+        load_ledger(session=session, filters=_year_filters(year))
+        .with_columns(group_key.alias("group_key"))
+        .with_columns(
+            pl.len().over("group_key").alias("n"),
+            amount.mean().over("group_key").alias("mean"),
+            amount.std().over("group_key").alias("stdev"),
+        )
+        .filter(pl.col("n") >= min_samples)
+    )
+
+    if not scored.height:
+        return None
+
+    outliers = (
+        scored.filter(pl.col("stdev") > 0, amount > pl.col("mean"))
+        .with_columns(((amount - pl.col("mean")) / pl.col("stdev")).alias("z_score"))
+        .filter(pl.col("z_score") > OUTLIER_Z_SCORE)
+        .sort("z_score", descending=True)
+        .head(limit)
+    )
+
+    transactions = {
+        transaction.id: transaction
+        for transaction in session.exec(
+            select(Transaction).where(col(Transaction.id).in_(outliers["id"].to_list()))
+        )
+    }
+    category_names = {}
+    if by == VolatilityGrouping.category:
+        category_names = dict(session.exec(select(Category.id, Category.name)).all())
+
+    return GroupVolatilityReportData(
+        by=by,
+        group_count=scored["group_key"].n_unique(),
+        total_count=scored.height,
+        outliers=[
+            GroupOutlierItem(
+                transaction=transactions[row["id"]],
+                group_name=category_names.get(row["group_key"], "Uncategorized")
+                if by == VolatilityGrouping.category
+                else row["group_key"],
+                group_avg=row["mean"],
+                group_stdev=row["stdev"],
+                z_score=row["z_score"],
+            )
+            for row in outliers.iter_rows(named=True)
+        ],
+    )
+
+
+def get_weekday_report_data(
+    *,
+    session: Session,
+    year: int | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[WeekdayReportItem]:
+    """Analyzes spending habits by day of the week, optionally within a year and/or date range."""
+    filters = _year_filters(year)
+    if start_date:
+        filters.append(pl.col("entry_date") >= start_date)
+    if end_date:
+        filters.append(pl.col("entry_date") <= end_date)
+
+    ledger = load_ledger(session=session, filters=filters)
+    if not ledger.height:
+        return []
+
+    # Polars counts weekdays from Monday (1), Python from Monday (0).
+    rows = ledger.group_by(pl.col("entry_date").dt.weekday() - 1).agg(
+        pl.col("amount").mean().alias("avg"),
+        pl.col("amount").sum().alias("total"),
+        pl.len().alias("count"),
+    )
+    days = {
+        day_idx: (avg, total, count) for day_idx, avg, total, count in rows.iter_rows()
+    }
+
+    report_data = []
+    for day_idx in range(7):
+        avg_amount, total_amount, count = days.get(day_idx, (0, 0, 0))
+        report_data.append(
+            WeekdayReportItem(
+                day_name=calendar.day_name[day_idx],
+                avg_amount=avg_amount,
+                total_amount=total_amount,
+                count=count,
+            )
+        )
+    return report_data
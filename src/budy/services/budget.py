@@ -1,13 +1,14 @@
 import calendar
-from collections import defaultdict
 from datetime import date
 from statistics import mean
 from typing import Optional
 
-from sqlmodel import Session, asc, select
+from sqlalchemy import tuple_
+from sqlmodel import Session, asc, col, func, select
 
 from budy.config import settings
-from budy.schemas import Budget, BudgetSuggestion, Transaction
+from budy.schemas import Budget, BudgetSuggestion, MonthlyTotals
+from budy.services.cache import bump_data_version
 
 
 def get_budget(
@@ -50,6 +51,7 @@ def upsert_budget(
         )
 
     session.add(budget)
+    bump_data_version(session=session, rewrites_ledger=False)
     session.commit()
     session.refresh(budget)
     return budget
@@ -79,37 +81,77 @@ def get_budgets(
     return all_months_data[offset : offset + limit]
 
 
+def get_duplicate_budgets(*, session: Session) -> list[Budget]:
+    """Fetches the budgets that share their month with a newer one, by month."""
+    newest = select(func.max(Budget.id)).group_by(
+        Budget.target_year, Budget.target_month
+    )
+    return list(
+        session.exec(
+            select(Budget)
+            .where(col(Budget.id).not_in(newest))
+            .order_by(Budget.target_year, Budget.target_month, Budget.id)
+        ).all()
+    )
+
+
+def remove_duplicate_budgets(*, session: Session) -> list[Budget]:
+    """
+    Deletes every budget but the newest of each month, and returns the deleted ones.
+    Budgets are then unique per month, so their unique index is created right away.
+    """
+    duplicates = get_duplicate_budgets(session=session)
+    for budget in duplicates:
+        session.delete(budget)
+    if duplicates:
+        bump_data_version(session=session, rewrites_ledger=False)
+    session.commit()
+
+    for index in Budget.__table__.indexes:
+        index.create(session.get_bind(), checkfirst=True)
+    return duplicates
+
+
 def generate_budgets_suggestions(
     *,
     session: Session,
-    target_year: int,
+    target_years: list[int],
     force: bool,
 ) -> list[BudgetSuggestion]:
-    """Generates budget suggestions for a given year based on historical data."""
+    """
+    Generates budget suggestions for the given years based on historical data.
+    The spending history is aggregated once and shared by every suggested month.
+    """
     existing_budgets = session.exec(
-        select(Budget).where(Budget.target_year == target_year)
+        select(Budget).where(col(Budget.target_year).in_(target_years))
     ).all()
 
-    existing_map = {b.target_month: b for b in existing_budgets}
+    existing_map = {(b.target_year, b.target_month): b for b in existing_budgets}
+    history = get_monthly_totals(
+        session=session,
+        start_date=date(settings.min_year, 1, 1),
+        end_date=date(max(target_years), 12, 1),
+    )
     suggestions = []
 
-    for month in range(1, 13):
-        if not force and month in existing_map:
-            continue
+    for target_year in sorted(target_years):
+        for month in range(1, 13):
+            if not force and (target_year, month) in existing_map:
+                continue
 
-        suggested_amount = suggest_budget_amount(
-            session=session, target_month=month, target_year=target_year
-        )
-        if suggested_amount > 0:
-            suggestions.append(
-                BudgetSuggestion(
-                    month=month,
-                    month_name=calendar.month_name[month],
-                    amount=suggested_amount,
-                    year=target_year,
-                    existing=existing_map.get(month),
-                )
+            suggested_amount = suggest_budget_amount(
+                history=history, target_month=month, target_year=target_year
             )
+            if suggested_amount > 0:
+                suggestions.append(
+                    BudgetSuggestion(
+                        month=month,
+                        month_name=calendar.month_name[month],
+                        amount=suggested_amount,
+                        year=target_year,
+                        existing=existing_map.get((target_year, month)),
+                    )
+                )
 
     return suggestions
 
@@ -133,23 +175,23 @@ def save_budget_suggestions(
                 )
             )
 
+    bump_data_version(session=session, rewrites_ledger=False)
     session.commit()
     return len(suggestions)
 
 
 def suggest_budget_amount(
     *,
-    session: Session,
+    history: dict[tuple[int, int], int],
     target_month: int,
     target_year: int,
 ) -> int:
-    """Calculates a suggested budget amount (in cents) based on historical data."""
-    start_date = date(settings.min_year, 1, 1)
-    end_date = date(target_year, target_month, 1)
-
-    historical_data = get_monthly_totals(
-        session=session, start_date=start_date, end_date=end_date
-    )
+    """Calculates a suggested budget amount (in cents) from the monthly totals before the target month."""
+    historical_data = {
+        (year, month): amount
+        for (year, month), amount in history.items()
+        if (year, month) < (target_year, target_month)
+    }
 
     if not historical_data:
         return 0
@@ -180,16 +222,18 @@ def get_monthly_totals(
     start_date: date,
     end_date: date,
 ) -> dict[tuple[int, int], int]:
-    """Fetches transactions within a range and aggregates them by year, month."""
-    transactions = session.exec(
-        select(Transaction).where(
-            Transaction.entry_date >= start_date,
-            Transaction.entry_date < end_date,
+    """
+    Fetches spending per (year, month) from the monthly rollup.
+    The range covers the months from start_date's up to, but excluding, end_date's.
+    """
+    month_key = tuple_(MonthlyTotals.year, MonthlyTotals.month)
+    rows = session.exec(
+        select(MonthlyTotals.year, MonthlyTotals.month, func.sum(MonthlyTotals.total))
+        .where(
+            month_key >= (start_date.year, start_date.month),
+            month_key < (end_date.year, end_date.month),
         )
+        .group_by(col(MonthlyTotals.year), col(MonthlyTotals.month))
     ).all()
 
-    totals = defaultdict(int)
-    for t in transactions:
-        totals[(t.entry_date.year, t.entry_date.month)] += t.amount
-
-    return totals
+    return {(year, month): total for year, month, total in rows}
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import pickle
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+from typer import get_app_dir
+
+from budy.config import settings
+from budy.schemas import DataVersion
+
+CACHE_DIR = Path(get_app_dir(settings.app_name)) / "report-cache"
+# Raised by an entry that is truncated, corrupt or otherwise unreadable, or that was pickled by
+# an older budy whose classes have since been renamed, moved or changed
+UNREADABLE_ENTRY_ERRORS = (
+    pickle.UnpicklingError,
+    EOFError,
+    OSError,
+    AttributeError,
+    ImportError,
+    TypeError,
+)
+
+
+def get_data_version(*, session: Session) -> DataVersion:
+    """Returns the database's epoch and write counters, which together identify its current contents."""
+    # Bumps are Core updates, which would not refresh an already loaded row
+    return session.exec(
+        select(DataVersion).execution_options(populate_existing=True)
+    ).one()
+
+
+def bump_data_version(*, session: Session, rewrites_ledger: bool = True) -> None:
+    """
+    Marks the data as changed, invalidating cached reports once the session commits.
+    Writes that only add transactions pass rewrites_ledger=False, so the ledger snapshot can just append them.
+    """
+    values = {"version": DataVersion.version + 1}
+    if rewrites_ledger:
+        values["ledger_rewritten"] = DataVersion.version + 1
+    session.execute(update(DataVersion).values(**values))
+
+
+def cached_report[T](
+    *,
+    session: Session,
+    name: str,
+    params: dict[str, Any],
+    compute: Callable[[], T],
+    use_cache: bool = True,
+) -> T:
+    """
+    Returns a report's result from the on-disk cache, or computes and caches it.
+    Results are keyed by report name, arguments and data version, so any write makes them miss.
+    Databases kept in memory are never cached, as their data does not outlive the process.
+    """
+    url = session.get_bind().url
+    if not use_cache or url.database in (None, "", ":memory:"):
+        return compute()
+
+    data_version = get_data_version(session=session)
+    key = repr(
+        (
+            name,
+            sorted(params.items()),
+            str(url),
+            data_version.epoch,
+            data_version.version,
+        )
+    )
+    path = CACHE_DIR / f"{hashlib.sha256(key.encode()).hexdigest()}.pickle"
+
+    try:
+        with open(path, "rb") as f:
+            result = pickle.load(f)
+        # The file's modification time doubles as its last use, for LRU eviction
+        os.utime(path)
+        return result
+    except FileNotFoundError:
+        pass
+    except UNREADABLE_ENTRY_ERRORS:
+        # An unreadable entry, e.g. one cut short by a crash or left by an older budy, is recomputed and overwritten
+        path.unlink(missing_ok=True)
+
+    result = compute()
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(partial, "wb") as f:
+        pickle.dump(result, f)
+    partial.replace(path)
+
+    _evict(max_entries=settings.report_cache_entries)
+    return result
+
+
+def _evict(*, max_entries: int) -> None:
+    """Deletes the least recently used cache entries beyond max_entries."""
+    entries = sorted(
+        CACHE_DIR.glob("*.pickle"), key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in entries[: max(len(entries) - max_entries, 0)]:
+        entry.unlink(missing_ok=True)
+
+
+def clear_report_cache() -> int:
+    """Deletes every cached report and returns how many there were."""
+    entries = list(CACHE_DIR.glob("*.pickle"))
+    for entry in entries:
+        entry.unlink(missing_ok=True)
+    return len(entries)
@@ -1,12 +1,34 @@
-from sqlmodel import Session, select
+from collections import Counter
+from datetime import date
 
-from budy.schemas import Category, CategoryRule
+import polars as pl
+from sqlalchemy import update
+from sqlmodel import Session, func, select
+
+from budy.matcher import RuleMatcher, compile_rules
+from budy.schemas import (
+    Category,
+    CategoryRule,
+    RuleApplyResult,
+    RuleHitItem,
+    Transaction,
+)
+from budy.services.cache import bump_data_version
+
+# Columns read to match a batch of existing transactions against the rules
+RULE_INPUT_SCHEMA = {
+    "id": pl.Int64,
+    "receiver": pl.String,
+    "description": pl.String,
+    "category_id": pl.Int64,
+}
 
 
 def create_category(*, session: Session, name: str, color: str = "white") -> Category:
     """Creates a new category."""
     category = Category(name=name, color=color)
     session.add(category)
+    bump_data_version(session=session, rewrites_ledger=False)
     session.commit()
     session.refresh(category)
     return category
@@ -23,6 +45,7 @@ def delete_category(*, session: Session, category_id: int) -> bool:
     if not category:
         return False
     session.delete(category)
+    bump_data_version(session=session, rewrites_ledger=False)
     session.commit()
     return True
 
@@ -34,8 +57,10 @@ def create_rule(*, session: Session, pattern: str, category_id: int) -> Category
     """Creates a new auto-categorization rule."""
     rule = CategoryRule(pattern=pattern.lower(), category_id=category_id)
     session.add(rule)
+    bump_data_version(session=session, rewrites_ledger=False)
     session.commit()
     session.refresh(rule)
+    invalidate_rule_matcher()
     return rule
 
 
@@ -51,5 +76,129 @@ def delete_rule(*, session: Session, rule_id: int) -> bool:
     if not rule:
         return False
     session.delete(rule)
+    bump_data_version(session=session, rewrites_ledger=False)
     session.commit()
+    invalidate_rule_matcher()
     return True
+
+
+def apply_rules(
+    *,
+    session: Session,
+    only_uncategorized: bool,
+    year: int | None,
+    dry_run: bool,
+    batch_size: int = 5000,
+) -> RuleApplyResult:
+    """
+    Re-applies the current rules to existing transactions with set-based UPDATE statements.
+    Transactions are processed in ID ranges of batch_size inside a single database transaction,
+    and matched with the importer's RuleMatcher, so history and new imports are categorized alike.
+    Transactions that match no rule keep their current category.
+    """
+    txn = Transaction.__table__
+    rules = session.exec(
+        select(
+            CategoryRule.id, CategoryRule.pattern, CategoryRule.category_id
+        ).order_by(CategoryRule.id)
+    ).all()
+    if not rules:
+        return RuleApplyResult(hits=[], updated=0)
+
+    matcher = compile_rules(
+        tuple((pattern, category_id) for _, pattern, category_id in rules)
+    )
+    rule_position = matcher.rule_expr(pl.col("receiver"), pl.col("description"))
+    rule_category = pl.col("rule").replace_strict(
+        dict(enumerate(category_id for _, _, category_id in rules)),
+        return_dtype=pl.Int64,
+    )
+
+    filters = []
+    if only_uncategorized:
+        filters.append(txn.c.category_id.is_(None))
+    if year:
+        filters.append(txn.c.entry_date.between(date(year, 1, 1), date(year, 12, 31)))
+
+    # Apart, each bound is a single lookup at one end of the table; together they read every row
+    min_id, max_id = session.exec(
+        select(
+            select(func.min(txn.c.id)).scalar_subquery(),
+            select(func.max(txn.c.id)).scalar_subquery(),
+        )
+    ).one()
+
+    hits: Counter[int] = Counter()
+    changes: Counter[int] = Counter()
+    updated = 0
+    for start in range(min_id or 0, (max_id or -1) + 1, batch_size):
+        rows = (
+            session.connection()
+            .execute(
+                select(
+                    txn.c.id, txn.c.receiver, txn.c.description, txn.c.category_id
+                ).where(*filters, txn.c.id.between(start, start + batch_size - 1))
+            )
+            .all()
+        )
+        matches = (
+            pl.DataFrame(rows, schema=RULE_INPUT_SCHEMA, orient="row")
+            .with_columns(rule=rule_position)
+            .drop_nulls("rule")
+            .with_columns(new_category_id=rule_category)
+            .with_columns(
+                changed=pl.col("category_id").ne_missing(pl.col("new_category_id"))
+            )
+        )
+        for position, count, changed in (
+            matches.group_by("rule").agg(pl.len(), pl.col("changed").sum()).iter_rows()
+        ):
+            hits[position] += count
+            changes[position] += changed
+
+        if dry_run:
+            continue
+        # Only touch rows whose category actually changes
+        for category_id, ids in (
+            matches.filter("changed").group_by("new_category_id").agg("id").iter_rows()
+        ):
+            updated += session.execute(
+                update(txn).where(txn.c.id.in_(ids)).values(category_id=category_id)
+            ).rowcount
+
+    category_names = dict(session.exec(select(Category.id, Category.name)).all())
+    result = RuleApplyResult(
+        hits=[
+            RuleHitItem(
+                rule_id=rules[position][0],
+                pattern=rules[position][1],
+                category_name=category_names.get(rules[position][2], "-"),
+                hits=hits[position],
+                changes=changes[position],
+            )
+            for position in sorted(hits)
+        ],
+        updated=updated,
+    )
+
+    if not updated:
+        return result
+
+    bump_data_version(session=session)
+    session.commit()
+    return result
+
+
+def get_rule_matcher(*, session: Session) -> RuleMatcher:
+    """Returns the compiled matcher for the current rules, reusing the cached one if the rules are unchanged."""
+    rules = session.exec(
+        select(CategoryRule.pattern, CategoryRule.category_id).order_by(CategoryRule.id)
+    ).all()
+    return compile_rules(
+        tuple((pattern, category_id) for pattern, category_id in rules)
+    )
+
+
+def invalidate_rule_matcher() -> None:
+    """Drops compiled matchers after the rule set changes."""
+    compile_rules.cache_clear()
@@ -1,9 +1,10 @@
 from pathlib import Path
 
 import polars as pl
-from sqlmodel import Session, col, select
+from sqlmodel import Session, select
 
-from budy.schemas import Category, Transaction
+from budy.schemas import Category
+from budy.services.snapshot import scan_ledger
 
 
 def export_transactions(
@@ -13,26 +14,41 @@ def export_transactions(
     Exports transactions to a CSV or JSON file.
     Returns the number of exported records.
     """
-    # 1. Fetch data
-    stmt = select(Transaction, Category.name).outerjoin(
-        Category, col(Transaction.category_id) == col(Category.id)
+    # 1. Scan the ledger snapshot
+    ledger = scan_ledger(session=session)
+
+    # 2. Attach category names
+    categories = pl.LazyFrame(
+        session.exec(select(Category.id, Category.name)).all(),
+        schema={"category_id": pl.Int64, "category": pl.String},
+        orient="row",
     )
-    results = session.exec(stmt).all()
-
-    # 2. Convert to list of dicts
-    data = []
-    for txn, category_name in results:
-        record = txn.model_dump()
-        record["category"] = category_name or ""
-        # Adjust amount to float for export
-        record["amount"] = record["amount"] / 100.0
-        data.append(record)
-
-    if not data:
-        return 0
 
     # 3. Create DataFrame
-    df = pl.DataFrame(data)
+    df = (
+        ledger.join(categories, on="category_id", how="left", maintain_order="left")
+        .with_columns(
+            # Adjust amount to float for export
+            pl.col("amount") / 100.0,
+            pl.col("category").fill_null(""),
+        )
+        # Same column order as exports written before the snapshot existed
+        .select(
+            "id",
+            "entry_date",
+            "description",
+            "fingerprint",
+            "receiver",
+            "amount",
+            "category_id",
+            "is_self",
+            "category",
+        )
+        .collect()
+    )
+
+    if not df.height:
+        return 0
 
     # 4. Write to file
     output_format = output_format.lower()
@@ -43,4 +59,4 @@ def export_transactions(
     else:
         raise ValueError(f"Unsupported format: {output_format}")
 
-    return len(data)
+    return df.height
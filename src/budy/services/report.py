@@ -1,119 +1,54 @@
 import calendar
-import statistics
-from collections import defaultdict
+import math
 from datetime import date
-from statistics import mean
 from typing import Optional
 
-from sqlmodel import Session, desc, select
+from sqlalchemy import ColumnElement, Integer, delete, insert
+from sqlmodel import Session, col, desc, func, select
 
-from budy.config import settings
+from budy.names import WHITESPACE
 from budy.schemas import (
     Budget,
+    Category,
     ForecastData,
+    GroupOutlierItem,
+    GroupVolatilityReportData,
     MonthlyReportData,
+    MonthlyTotals,
     PayeeRankingItem,
     Transaction,
+    VolatilityGrouping,
     VolatilityReportData,
     WeekdayReportItem,
 )
+from budy.services.cache import bump_data_version
 
+# Z-score above which a transaction counts as an outlier, approx. a 95% confidence interval
+OUTLIER_Z_SCORE = 2
 
-def _get_name_variants(name: str) -> set[str]:
-    """Generates variants of a name (lowercase, initials, mixed forms)."""
-    clean_name = name.strip().lower()
-    parts = clean_name.split()
 
-    if not parts:
-        return {clean_name}
+def _not_self() -> ColumnElement[bool]:
+    """Leaves out transfers between the user's own accounts."""
+    # Written as IS NOT 1 so the rarely set flag's index does not win over the entry_date index.
+    return col(Transaction.is_self).is_not(True)
 
-    # Banks often format names inconsistently in statement descriptions (e.g., "J. Smith" vs "J.Smith" vs "J Smith").
-    # We generate all common variations to ensure we can identify the user regardless of how the bank formatted the receiver field.
-    variants = {clean_name}
 
-    # 1. All Initials (e.g. "khl", "k.h.l.", "k. h. l.")
-    initials_chars = [p[0] for p in parts]
-    variants.add("".join(initials_chars))
-    variants.add(".".join(initials_chars) + ".")
-    variants.add(". ".join(initials_chars) + ".")
+def _payee_name(receiver) -> ColumnElement[str]:
+    """The receiver with surrounding whitespace trimmed, or "Unknown" if nothing is left."""
+    return func.coalesce(func.nullif(func.trim(receiver, WHITESPACE), ""), "Unknown")
 
-    if len(parts) > 1:
-        last_name = parts[-1]
-        first_names = parts[:-1]
-        first_initials_chars = [p[0] for p in first_names]
 
-        # 2. First name initial + Last name full (e.g. "k laurits", "k. laurits")
-        first_initial = first_names[0][0]
-        variants.add(f"{first_initial} {last_name}")
-        variants.add(f"{first_initial}. {last_name}")
-        variants.add(f"{first_initial}.{last_name}")
-
-        # 3. All first names initialed + Last name full (e.g. "k. h. laurits")
-        if len(first_names) > 1:
-            # "kh laurits"
-            variants.add(f"{''.join(first_initials_chars)} {last_name}")
-            # "k. h. laurits"
-            dotted_spaced = ". ".join(first_initials_chars) + "."
-            variants.add(f"{dotted_spaced} {last_name}")
-            # "k.h. laurits"
-            dotted_tight = ".".join(first_initials_chars) + "."
-            variants.add(f"{dotted_tight} {last_name}")
-
-    return variants
-
-
-def _is_user(receiver: str | None) -> bool:
-    """Checks if the receiver matches the configured user (fuzzy match)."""
-    if not receiver:
-        return False
-
-    if not settings.first_name or not settings.last_name:
-        return False
-
-    receiver_clean = receiver.strip().lower()
-    full_name = f"{settings.first_name} {settings.last_name}"
-
-    user_variants = _get_name_variants(full_name)
-    if receiver_clean in user_variants:
-        return True
-
-    receiver_variants = _get_name_variants(receiver)
-    if full_name.lower() in receiver_variants:
-        return True
-
-    return False
-
-
-def generate_monthly_report_data(
+def _build_monthly_report(
     *,
-    session: Session,
+    budget: Budget | None,
+    total_spent: int,
     target_month: int,
     target_year: int,
+    today: date,
 ) -> MonthlyReportData:
-    """Generates data for the monthly budget status report."""
-    today = date.today()
+    """Assembles a month's report from its budget and spending, forecasting the current month."""
     month_name = calendar.month_name[target_month]
     _, last_day = calendar.monthrange(target_year, target_month)
-    start_date = date(target_year, target_month, 1)
-    end_date = date(target_year, target_month, last_day)
-
-    budget = session.exec(
-        select(Budget).where(
-            Budget.target_year == target_year,
-            Budget.target_month == target_month,
-        )
-    ).first()
-
-    transactions = session.exec(
-        select(Transaction).where(
-            Transaction.entry_date >= start_date,
-            Transaction.entry_date <= end_date,
-        )
-    ).all()
-
-    relevant_transactions = [t for t in transactions if not _is_user(t.receiver)]
-
-    total_spent = sum(t.amount for t in relevant_transactions)
 
     forecast = None
     is_current_month = (target_month == today.month) and (target_year == today.year)
@@ -138,6 +73,37 @@ def generate_monthly_report_data(
     )
 
 
+def generate_monthly_report_data(
+    *,
+    session: Session,
+    target_month: int,
+    target_year: int,
+) -> MonthlyReportData:
+    """Generates data for the monthly budget status report."""
+    budget = session.exec(
+        select(Budget).where(
+            Budget.target_year == target_year,
+            Budget.target_month == target_month,
+        )
+    ).first()
+
+    total_spent = session.exec(
+        select(func.coalesce(func.sum(MonthlyTotals.total), 0)).where(
+            MonthlyTotals.year == target_year,
+            MonthlyTotals.month == target_month,
+            col(MonthlyTotals.is_self).is_(False),
+        )
+    ).one()
+
+    return _build_monthly_report(
+        budget=budget,
+        total_spent=total_spent,
+        target_month=target_month,
+        target_year=target_year,
+        today=date.today(),
+    )
+
+
 def get_top_payees(
     *,
     session: Session,
@@ -146,122 +112,329 @@ def get_top_payees(
     by_count: bool = False,
 ) -> list[PayeeRankingItem]:
     """Ranks payees by total spending or transaction count."""
-    query = select(Transaction)
+    # Grouping by the raw receiver lets SQLite walk the receiver index. Receivers that only differ
+    # by surrounding whitespace are then merged in the much smaller second grouping.
+    per_receiver = select(
+        col(Transaction.receiver).label("receiver"),
+        func.sum(Transaction.amount).label("total"),
+        func.count().label("count"),
+    ).where(_not_self())
     if year:
-        query = query.where(
+        per_receiver = per_receiver.where(
             Transaction.entry_date >= date(year, 1, 1),
             Transaction.entry_date <= date(year, 12, 31),
         )
+    per_receiver = per_receiver.group_by(col(Transaction.receiver)).subquery()
+
+    name = _payee_name(per_receiver.c.receiver)
+    total = func.sum(per_receiver.c.total)
+    count = func.sum(per_receiver.c.count)
+    rows = session.exec(
+        select(name, total, count, total // count)
+        .group_by(name)
+        .order_by(desc(count if by_count else total), name)
+        .limit(limit)
+    ).all()
 
-    transactions = session.exec(query).all()
-    if not transactions:
-        return []
-
-    filtered_transactions = [t for t in transactions if not _is_user(t.receiver)]
-
-    grouped = defaultdict(list)
-    for t in filtered_transactions:
-        name = (t.receiver or "Unknown").strip() or "Unknown"
-        grouped[name].append(t.amount)
-
-    summary = []
-    for name, amounts in grouped.items():
-        total = sum(amounts)
-        count = len(amounts)
-        avg = int(total / count)
-        summary.append(PayeeRankingItem(name=name, count=count, total=total, avg=avg))
-
-    key_attr = "count" if by_count else "total"
-    summary.sort(key=lambda x: getattr(x, key_attr), reverse=True)
-    return summary[:limit]
+    return [
+        PayeeRankingItem(name=payee, count=payee_count, total=payee_total, avg=avg)
+        for payee, payee_total, payee_count, avg in rows
+    ]
 
 
 def get_volatility_report_data(
-    *, session: Session, year: int | None
+    *, session: Session, year: int | None, min_samples: int = 10
 ) -> Optional[VolatilityReportData]:
-    """Calculates spending volatility and identifies outliers."""
-    query = select(Transaction)
+    """
+    Calculates spending volatility and identifies outliers.
+    Mean and standard deviation come from the count, sum and sum of squares computed in SQL,
+    and only the top outliers are fetched, so memory use does not grow with the ledger.
+    """
+    filters = [_not_self()]
     if year:
-        query = query.where(
+        filters += [
             Transaction.entry_date >= date(year, 1, 1),
             Transaction.entry_date <= date(year, 12, 31),
-        )
-
-    transactions = session.exec(query.order_by(desc(Transaction.amount))).all()
-
-    transactions = [t for t in transactions if not _is_user(t.receiver)]
-
-    # Minimum sample size of 10 is required to calculate a meaningful standard deviation and avoid flagging normal transactions as outliers in sparse datasets.
-    if not transactions or len(transactions) < 10:
+        ]
+
+    count, amount_sum, amount_sum_of_squares = session.exec(
+        select(
+            func.count(),
+            func.total(Transaction.amount),
+            # total() sums as floats, which cannot overflow like integer sum() of large squares
+            func.total(col(Transaction.amount) * col(Transaction.amount)),
+        ).where(*filters)
+    ).one()
+
+    # A minimum sample size is required to calculate a meaningful standard deviation and avoid flagging normal transactions as outliers in sparse datasets.
+    if count < min_samples:
         return None
 
-    amounts = [t.amount for t in transactions]
-    avg_amount = statistics.mean(amounts)
-
-    try:
-        stdev = statistics.stdev(amounts)
-    except statistics.StatisticsError:
-        stdev = 0
+    avg_amount = amount_sum / count
+    # Sample variance; rounding can push it slightly below zero when all amounts are equal.
+    variance = (amount_sum_of_squares - amount_sum * avg_amount) / (count - 1)
+    stdev = math.sqrt(max(variance, 0))
 
-    # We use a Z-score of 2 (approx. 95% confidence interval) to identify transactions that deviate significantly from the norm.
-    threshold = avg_amount + (2 * stdev)
+    threshold = avg_amount + (OUTLIER_Z_SCORE * stdev)
 
-    outliers = [t for t in transactions if t.amount > threshold]
-    # Sort purely by amount for the report
-    outliers.sort(key=lambda t: t.amount, reverse=True)
+    # The top IDs are picked from the covering index, so only the outliers themselves are read from the table
+    outlier_ids = (
+        select(Transaction.id)
+        .where(*filters, Transaction.amount > threshold)
+        .order_by(desc(Transaction.amount))
+        .limit(5)
+    )
+    outliers = session.exec(
+        select(Transaction)
+        .where(col(Transaction.id).in_(outlier_ids))
+        .order_by(desc(Transaction.amount))
+    ).all()
 
     return VolatilityReportData(
-        total_count=len(amounts),
+        total_count=count,
         avg_amount=avg_amount,
         stdev_amount=stdev,
-        outliers=outliers[:5],
+        outliers=list(outliers),
+    )
+
+
+def get_group_volatility_report_data(
+    *,
+    session: Session,
+    year: int | None,
+    by: VolatilityGrouping,
+    min_samples: int = 10,
+    limit: int = 10,
+) -> GroupVolatilityReportData | None:
+    """
+    Identifies transactions that are outliers within their own category or payee.
+    Each group's mean and standard deviation come from window functions, so a single scan
+    scores every transaction against its group. Groups with fewer than min_samples transactions are skipped.
+    """
+    if by == VolatilityGrouping.category:
+        group_key = func.ifnull(Transaction.category_id, 0)
+    else:
+        group_key = _payee_name(col(Transaction.receiver))
+
+    filters = [_not_self()]
+    if year:
+        filters += [
+            Transaction.entry_date >= date(year, 1, 1),
+            Transaction.entry_date <= date(year, 12, 31),
+        ]
+
+    amount = col(Transaction.amount)
+    stats = (
+        select(
+            col(Transaction.id).label("id"),
+            group_key.label("group_key"),
+            amount.label("amount"),
+            func.count().over(partition_by=group_key).label("n"),
+            func.avg(amount).over(partition_by=group_key).label("mean"),
+            func.total(amount * amount).over(partition_by=group_key).label("sum_sq"),
+        )
+        .where(*filters)
+        .subquery()
     )
 
+    # Compared squared, as SQLite may lack sqrt(). The deviation must also be positive, since only
+    # unusually large transactions are outliers.
+    variance = (stats.c.sum_sq - stats.c.n * stats.c.mean * stats.c.mean) / (
+        stats.c.n - 1
+    )
+    deviation = stats.c.amount - stats.c.mean
+    z_squared = deviation * deviation / variance
+
+    group_sizes = (
+        select(func.count().label("n"))
+        .where(*filters)
+        .group_by(group_key)
+        .having(func.count() >= min_samples)
+        .subquery()
+    )
+    group_count, total_count = session.exec(
+        select(func.count(), func.coalesce(func.sum(group_sizes.c.n), 0))
+    ).one()
+
+    if not group_count:
+        return None
+
+    rows = session.exec(
+        select(Transaction, stats.c.group_key, stats.c.mean, variance, z_squared)
+        .join(stats, stats.c.id == Transaction.id)
+        .where(
+            stats.c.n >= min_samples,
+            variance > 0,
+            deviation > 0,
+            z_squared > OUTLIER_Z_SCORE**2,
+        )
+        .order_by(desc(z_squared))
+        .limit(limit)
+    ).all()
+
+    category_names = {}
+    if by == VolatilityGrouping.category:
+        category_names = dict(session.exec(select(Category.id, Category.name)).all())
+
+    return GroupVolatilityReportData(
+        by=by,
+        group_count=group_count,
+        total_count=total_count,
+        outliers=[
+            GroupOutlierItem(
+                transaction=transaction,
+                group_name=category_names.get(key, "Uncategorized")
+                if by == VolatilityGrouping.category
+                else key,
+                group_avg=group_avg,
+                group_stdev=math.sqrt(group_variance),
+                z_score=math.sqrt(z),
+            )
+            for transaction, key, group_avg, group_variance, z in rows
+        ],
+    )
 
-def get_weekday_report_data(*, session: Session) -> list[WeekdayReportItem]:
-    """Analyzes spending habits by day of the week."""
-    transactions = session.exec(select(Transaction)).all()
 
-    transactions = [t for t in transactions if not _is_user(t.receiver)]
+def get_weekday_report_data(
+    *,
+    session: Session,
+    year: int | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[WeekdayReportItem]:
+    """Analyzes spending habits by day of the week, optionally within a year and/or date range."""
+    filters = [_not_self()]
+    if year:
+        filters += [
+            Transaction.entry_date >= date(year, 1, 1),
+            Transaction.entry_date <= date(year, 12, 31),
+        ]
+    if start_date:
+        filters.append(Transaction.entry_date >= start_date)
+    if end_date:
+        filters.append(Transaction.entry_date <= end_date)
+
+    # SQLite counts weekdays from Sunday (0), Python from Monday (0).
+    weekday = (func.cast(func.strftime("%w", Transaction.entry_date), Integer) + 6) % 7
+    rows = session.exec(
+        select(
+            weekday,
+            func.avg(Transaction.amount),
+            func.sum(Transaction.amount),
+            func.count(),
+        )
+        .where(*filters)
+        .group_by(weekday)
+    ).all()
 
-    if not transactions:
+    if not rows:
         return []
 
-    day_buckets = defaultdict(list)
-    for t in transactions:
-        day_buckets[t.entry_date.weekday()].append(t.amount)
+    days = {day_idx: (avg, total, count) for day_idx, avg, total, count in rows}
 
     report_data = []
     for day_idx in range(7):
-        amounts = day_buckets[day_idx]
-        day_name = calendar.day_name[day_idx]
-
-        if not amounts:
-            report_data.append(
-                WeekdayReportItem(
-                    day_name=day_name, avg_amount=0, total_amount=0, count=0
-                )
-            )
-            continue
-
+        avg_amount, total_amount, count = days.get(day_idx, (0, 0, 0))
         report_data.append(
             WeekdayReportItem(
-                day_name=day_name,
-                avg_amount=mean(amounts),
-                total_amount=sum(amounts),
-                count=len(amounts),
+                day_name=calendar.day_name[day_idx],
+                avg_amount=avg_amount,
+                total_amount=total_amount,
+                count=count,
             )
         )
     return report_data
 
 
-def get_yearly_report_data(*, session: Session, year: int) -> list[MonthlyReportData]:
-    """Gathers all data needed for the yearly report."""
-    monthly_data = []
-    for month in range(1, 13):
-        monthly_data.append(
-            generate_monthly_report_data(
-                session=session, target_month=month, target_year=year
+def get_multi_year_report_data(
+    *, session: Session, start_year: int, end_year: int
+) -> dict[int, list[MonthlyReportData]]:
+    """
+    Gathers the yearly report of every year in a range, keyed by year.
+    Spending is read from the monthly rollup in a single grouped query, and budgets are fetched in one more.
+    """
+    monthly_totals = session.exec(
+        select(MonthlyTotals.year, MonthlyTotals.month, func.sum(MonthlyTotals.total))
+        .where(
+            MonthlyTotals.year >= start_year,
+            MonthlyTotals.year <= end_year,
+            col(MonthlyTotals.is_self).is_(False),
+        )
+        .group_by(col(MonthlyTotals.year), col(MonthlyTotals.month))
+    ).all()
+    totals = {(y, m): total for y, m, total in monthly_totals}
+
+    return _build_yearly_reports(
+        budgets=_get_budgets(session=session, start_year=start_year, end_year=end_year),
+        totals=totals,
+        start_year=start_year,
+        end_year=end_year,
+    )
+
+
+def _get_budgets(
+    *, session: Session, start_year: int, end_year: int
+) -> dict[tuple[int, int], Budget]:
+    """Fetches the budgets of a range of years, keyed by (year, month)."""
+    return {
+        (budget.target_year, budget.target_month): budget
+        for budget in session.exec(
+            select(Budget).where(
+                Budget.target_year >= start_year, Budget.target_year <= end_year
             )
         )
-    return monthly_data
+    }
+
+
+def _build_yearly_reports(
+    *,
+    budgets: dict[tuple[int, int], Budget],
+    totals: dict[tuple[int, int], int],
+    start_year: int,
+    end_year: int,
+) -> dict[int, list[MonthlyReportData]]:
+    """Assembles the monthly reports of a range of years from budgets and spending keyed by (year, month)."""
+    today = date.today()
+    return {
+        y: [
+            _build_monthly_report(
+                budget=budgets.get((y, m)),
+                total_spent=totals.get((y, m), 0),
+                target_month=m,
+                target_year=y,
+                today=today,
+            )
+            for m in range(1, 13)
+        ]
+        for y in range(start_year, end_year + 1)
+    }
+
+
+def rebuild_monthly_totals(*, session: Session) -> int:
+    """
+    Recomputes the monthly rollup from scratch, e.g. for a database that predates it.
+    The rollup is otherwise kept current by triggers. Returns the number of rollup rows.
+    """
+    year = func.cast(func.strftime("%Y", Transaction.entry_date), Integer)
+    month = func.cast(func.strftime("%m", Transaction.entry_date), Integer)
+    category_id = func.ifnull(Transaction.category_id, 0)
+
+    session.execute(delete(MonthlyTotals))
+    session.execute(
+        insert(MonthlyTotals).from_select(
+            ["year", "month", "category_id", "is_self", "total", "count"],
+            select(
+                year,
+                month,
+                category_id,
+                Transaction.is_self,
+                func.sum(Transaction.amount),
+                func.count(),
+            ).group_by(year, month, category_id, col(Transaction.is_self)),
+        )
+    )
+    # Reports computed from a stale rollup must not be served from the cache
+    bump_data_version(session=session, rewrites_ledger=False)
+    session.commit()
+
+    return session.exec(select(func.count()).select_from(MonthlyTotals)).one()
@@ -0,0 +1,159 @@
+import shutil
+from pathlib import Path
+
+import polars as pl
+from sqlalchemy import String, type_coerce
+from sqlmodel import Session, SQLModel, col, select
+
+from budy.schemas import SnapshotResult, Transaction
+from budy.services.cache import get_data_version
+
+# Appends add a part file each, so the snapshot is rewritten into one part once it has this many.
+MAX_PARTS = 16
+
+LEDGER_SCHEMA = {
+    "id": pl.Int64,
+    "amount": pl.Int64,
+    "entry_date": pl.String,
+    "receiver": pl.String,
+    "description": pl.String,
+    "category_id": pl.Int64,
+    "fingerprint": pl.String,
+    "is_self": pl.Boolean,
+}
+
+
+class SnapshotManifest(SQLModel):
+    """Which data version a ledger snapshot holds, and the part files it is made of."""
+
+    epoch: str
+    version: int
+    ledger_rewritten: int
+    max_id: int = 0
+    rows: int = 0
+    parts: list[str] = []
+
+
+def get_snapshot_dir(*, session: Session) -> Path | None:
+    """The snapshot directory next to the database file, or None for a database kept in memory."""
+    database = session.get_bind().url.database
+    if database in (None, "", ":memory:"):
+        return None
+    path = Path(database)
+    return path.with_name(f"{path.stem}.snapshot")
+
+
+def read_ledger(*, session: Session, after_id: int = 0) -> pl.DataFrame:
+    """
+    Reads the transactions with an ID above after_id from SQLite into a DataFrame.
+    Dates are read as their stored ISO text and parsed by polars, which is much faster than per-row conversion.
+    """
+    # Executed on the connection, skipping the ORM result processing that plain column rows do not need
+    rows = (
+        session.connection()
+        .execute(
+            select(
+                col(Transaction.id),
+                col(Transaction.amount),
+                type_coerce(Transaction.entry_date, String),
+                col(Transaction.receiver),
+                col(Transaction.description),
+                col(Transaction.category_id),
+                col(Transaction.fingerprint),
+                col(Transaction.is_self),
+            )
+            .where(col(Transaction.id) > after_id)
+            .order_by(col(Transaction.id))
+        )
+        .all()
+    )
+
+    return pl.DataFrame(rows, schema=LEDGER_SCHEMA, orient="row").with_columns(
+        pl.col("entry_date").str.to_date("%Y-%m-%d")
+    )
+
+
+def _read_manifest(directory: Path) -> SnapshotManifest | None:
+    """Loads a snapshot's manifest, or returns None if there is no usable one."""
+    try:
+        return SnapshotManifest.model_validate_json(
+            (directory / "manifest.json").read_text()
+        )
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return None
+
+
+def _write_part(directory: Path, frame: pl.DataFrame, index: int) -> str:
+    """Writes rows to a new uncompressed part file, which polars can memory-map, and returns its name."""
+    name = f"part-{index:04d}.arrow"
+    partial = directory / f"{name}.tmp"
+    frame.write_ipc(partial)
+    partial.replace(directory / name)
+    return name
+
+
+def refresh_snapshot(*, session: Session, force: bool = False) -> SnapshotResult:
+    """
+    Brings the columnar snapshot of the transaction table up to date with the database.
+    Transactions added since the last refresh are appended as a new part file. The snapshot is rebuilt
+    from scratch when existing transactions changed, when it has too many parts, or when forced.
+    """
+    directory = get_snapshot_dir(session=session)
+    if directory is None:
+        raise ValueError("Databases kept in memory have no snapshot.")
+
+    data_version = get_data_version(session=session)
+    manifest = None if force else _read_manifest(directory)
+
+    if manifest and (
+        manifest.epoch == data_version.epoch
+        and manifest.ledger_rewritten == data_version.ledger_rewritten
+        and len(manifest.parts) < MAX_PARTS
+    ):
+        if manifest.version == data_version.version:
+            return SnapshotResult(rows=manifest.rows, parts=len(manifest.parts))
+
+        appended = read_ledger(session=session, after_id=manifest.max_id)
+        if appended.height:
+            manifest.parts.append(_write_part(directory, appended, len(manifest.parts)))
+            manifest.max_id = appended["id"].max()
+            manifest.rows += appended.height
+        manifest.version = data_version.version
+        result = SnapshotResult(
+            rows=manifest.rows, parts=len(manifest.parts), appended=appended.height
+        )
+    else:
+        ledger = read_ledger(session=session)
+        # Parts are only listed in the manifest once written, so a half-built snapshot is never read
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        manifest = SnapshotManifest(
+            epoch=data_version.epoch,
+            version=data_version.version,
+            ledger_rewritten=data_version.ledger_rewritten,
+            max_id=ledger["id"].max() or 0,
+            rows=ledger.height,
+            parts=[_write_part(directory, ledger, 0)],
+        )
+        result = SnapshotResult(rows=manifest.rows, parts=1, rebuilt=True)
+
+    partial = directory / "manifest.json.tmp"
+    partial.write_text(manifest.model_dump_json())
+    partial.replace(directory / "manifest.json")
+    return result
+
+
+def scan_ledger(*, session: Session) -> pl.LazyFrame:
+    """
+    Returns a lazy frame over every transaction, with the columns of the transaction table.
+    File-backed databases are read from the memory-mapped snapshot, refreshed first if needed.
+    """
+    directory = get_snapshot_dir(session=session)
+    if directory is None:
+        return read_ledger(session=session).lazy()
+
+    refresh_snapshot(session=session)
+    manifest = _read_manifest(directory)
+    return pl.scan_ipc([directory / part for part in manifest.parts])
@@ -1,12 +1,52 @@
-from collections import defaultdict
+import glob
+import hashlib
+import os
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, timedelta
+from multiprocessing import get_context
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
-from sqlmodel import Session, asc, col, desc, or_, select
+import polars as pl
+from sqlalchemy import (
+    and_,
+    bindparam,
+    false,
+    literal_column,
+    null,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, asc, col, desc, func, or_, select
 
 from budy.config import settings
-from budy.importer import BaseBankImporter
-from budy.schemas import CategoryRule, Transaction
+from budy.importer import BaseBankImporter, detect_bank
+from budy.matcher import RuleMatcher
+from budy.names import (
+    WHITESPACE,
+    get_user_name_variants,
+    is_self_receiver,
+    self_receiver_expr,
+)
+from budy.query import compile_filter, explain_query
+from budy.schemas import (
+    MIN_INDEXED_TERM,
+    ImportResult,
+    ImportWatermark,
+    PageCursor,
+    QueryPlanStep,
+    SearchPage,
+    Transaction,
+    TransactionPage,
+    transaction_fts,
+)
+from budy.services.cache import bump_data_version
+from budy.services.category import get_rule_matcher
 
 
 def get_transactions(
@@ -14,32 +54,62 @@ def get_transactions(
     session: Session,
     offset: int,
     limit: int,
-) -> list[tuple[date, list[Transaction]]]:
+    after: PageCursor | None = None,
+) -> TransactionPage:
     """
-    Fetches transactions for a date range by offset and limit, grouped by date.
+    Fetches transactions grouped by date, for a range of limit days ending offset days ago.
+    With a cursor, the page instead holds the limit transactions right before the cursor's row,
+    so browsing further back costs the same as the first page and is not shifted by passing days.
+    The page's cursor is None when there is nothing older to show.
     """
-    today = date.today()
+    position = tuple_(Transaction.entry_date, Transaction.id)
 
-    oldest_date_in_range = today - timedelta(days=offset + limit - 1)
-    dates_to_show = [oldest_date_in_range + timedelta(days=i) for i in range(limit)]
-
-    min_date_query = dates_to_show[0]
-    max_date_query = dates_to_show[-1]
-
-    transactions = list(
-        session.exec(
+    if after:
+        # One extra row tells whether there is a next page
+        rows = session.exec(
             select(Transaction)
-            .where(Transaction.entry_date >= min_date_query)
-            .where(Transaction.entry_date <= max_date_query)
-            .order_by(asc(Transaction.entry_date))
+            .where(position < (after.entry_date, after.id))
+            .order_by(desc(Transaction.entry_date), desc(Transaction.id))
+            .limit(limit + 1)
         ).all()
-    )
+        transactions = rows[:limit][::-1]
+        dates_to_show = list(dict.fromkeys(t.entry_date for t in transactions))
+        has_older = len(rows) > limit
+        if has_older:
+            oldest = (transactions[0].entry_date, transactions[0].id)
+    else:
+        newest_date_in_range = date.today() - timedelta(days=offset)
+        oldest_date_in_range = newest_date_in_range - timedelta(days=limit - 1)
+        dates_to_show = [oldest_date_in_range + timedelta(days=i) for i in range(limit)]
+        transactions = session.exec(
+            select(Transaction)
+            .where(
+                Transaction.entry_date >= oldest_date_in_range,
+                Transaction.entry_date <= newest_date_in_range,
+            )
+            .order_by(asc(Transaction.entry_date), asc(Transaction.id))
+        ).all()
+        # IDs start at 1, so a cursor with ID 0 stands for the start of its day
+        oldest = (
+            (transactions[0].entry_date, transactions[0].id)
+            if transactions
+            else (oldest_date_in_range, 0)
+        )
+        has_older = (
+            session.exec(
+                select(Transaction.id).where(position < oldest).limit(1)
+            ).first()
+            is not None
+        )
 
     tx_map = defaultdict(list)
     for t in transactions:
         tx_map[t.entry_date].append(t)
 
-    return [(d, tx_map.get(d, [])) for d in dates_to_show]
+    page = TransactionPage(days=[(d, tx_map.get(d, [])) for d in dates_to_show])
+    if has_older:
+        page.next_cursor = PageCursor(entry_date=oldest[0], id=oldest[1])
+    return page
 
 
 def create_transaction(
@@ -58,6 +128,7 @@ def create_transaction(
         category_id=category_id,
     )
     session.add(transaction)
+    bump_data_version(session=session, rewrites_ledger=False)
     session.commit()
     session.refresh(transaction)
     return transaction
@@ -84,12 +155,14 @@ def update_transaction(
         transaction.entry_date = entry_date
     if receiver is not None:
         transaction.receiver = receiver
+        transaction.is_self = is_self_receiver(receiver)
     if description is not None:
         transaction.description = description
     if category_id is not None:
         transaction.category_id = category_id
 
     session.add(transaction)
+    bump_data_version(session=session)
     session.commit()
     session.refresh(transaction)
     return transaction
@@ -102,61 +175,586 @@ def delete_transaction(*, session: Session, transaction_id: int) -> bool:
         return False
 
     session.delete(transaction)
+    bump_data_version(session=session)
     session.commit()
     return True
 
 
+def find_statement_files(paths: list[Path]) -> list[Path]:
+    """Expands directories and glob patterns into an ordered, de-duplicated list of CSV files."""
+    files = []
+    for path in paths:
+        path = path.expanduser()
+        if path.is_dir():
+            files.extend(
+                sorted(
+                    p
+                    for p in path.iterdir()
+                    if p.is_file() and p.suffix.lower() == ".csv"
+                )
+            )
+        elif path.exists():
+            files.append(path)
+        elif any(char in str(path) for char in "*?["):
+            matches = sorted(Path(m) for m in glob.glob(str(path), recursive=True))
+            files.extend(m for m in matches if m.is_file())
+            if not matches:
+                raise ValueError(f"No files match '{path}'.")
+        else:
+            raise ValueError(f"File not found: {path}")
+
+    return list(dict.fromkeys(p.resolve() for p in files))
+
+
+def detect_statement_banks(
+    file_paths: list[Path], *, bank_name: str | None = None
+) -> list[tuple[Path, str]]:
+    """
+    Pairs each statement file with the bank that exported it, keeping their order.
+    Every file is attributed to bank_name when given, and otherwise detected from its header.
+    """
+    return [
+        (file_path, bank_name or detect_bank(file_path, banks=settings.banks))
+        for file_path in file_paths
+    ]
+
+
+def _get_importer(bank_name: str) -> tuple[str, BaseBankImporter]:
+    """Looks up the importer for a configured bank."""
+    bank_name_key = bank_name.lower()
+    bank_config = settings.banks.get(bank_name_key)
+
+    if not bank_config:
+        available = ", ".join(settings.banks.keys())
+        raise ValueError(f"Unknown bank '{bank_name}'. Available banks: {available}")
+
+    return bank_name_key, BaseBankImporter(**bank_config.model_dump())
+
+
+def get_import_watermark(*, session: Session, bank_name: str) -> ImportWatermark | None:
+    """
+    Fetches the import watermark of a bank.
+    Returns None if there is none, or if any of its boundary rows has since been deleted,
+    since the watermark can then no longer be trusted.
+    """
+    watermark = session.get(ImportWatermark, bank_name.lower())
+    if not watermark:
+        return None
+
+    present = session.exec(
+        select(func.count())
+        .select_from(Transaction)
+        .where(col(Transaction.fingerprint).in_(watermark.boundary_fingerprints))
+    ).one()
+    if present < len(watermark.boundary_fingerprints):
+        return None
+
+    return watermark
+
+
+def _get_import_since(*, session: Session, bank_name: str, full: bool) -> date | None:
+    """
+    Returns the date from which a bank's statements need to be read, or None to read them in full.
+    Rows on the watermark date itself are read again, since a statement may have been exported mid-day;
+    their fingerprints skip the ones that were already imported.
+    """
+    watermark = get_import_watermark(session=session, bank_name=bank_name)
+    if not watermark:
+        # A stale watermark is rebuilt from scratch by this import.
+        stale = session.get(ImportWatermark, bank_name)
+        if stale:
+            session.delete(stale)
+            session.flush()
+        return None
+
+    return None if full else watermark.last_date
+
+
 def import_transactions(
     *,
     session: Session,
     bank_name: str,
     file_path: Path,
     dry_run: bool,
-) -> list[Transaction]:
-    """Imports transactions from a bank CSV file."""
-    bank_name_key = bank_name.lower()
-    bank_config = settings.banks.get(bank_name_key)
+    batch_size: int | None = None,
+    full: bool = False,
+    on_batch: Callable[[ImportResult], None] | None = None,
+) -> ImportResult:
+    """
+    Imports transactions from a bank CSV file.
+    The file is streamed in fixed-size chunks and on_batch is called with the running totals after each one.
+    Rows older than the bank's import watermark are skipped unless full is set, and counted in the result.
+    """
+    bank_name_key, importer = _get_importer(bank_name)
+    matcher = get_rule_matcher(session=session)
+    since = _get_import_since(session=session, bank_name=bank_name_key, full=full)
+    result = ImportResult(filename=file_path.name, bank=bank_name_key, since=since)
+    seen: dict[date, Counter[bytes]] = {}
 
-    if not bank_config:
+    # Auto-categorization rules run inside the lazy scan, so batches arrive with category_id filled in.
+    batches = importer.iter_batches(
+        file_path,
+        batch_size=batch_size or settings.import_batch_size,
+        matcher=matcher,
+        since=since,
+    )
+
+    while True:
+        started = time.perf_counter()
+        batch = next(batches, None)
+        result.parse_seconds += time.perf_counter() - started
+
+        if batch is None:
+            break
+
+        started = time.perf_counter()
+        _write_batch(
+            session=session, batch=batch, seen=seen, dry_run=dry_run, result=result
+        )
+        result.write_seconds += time.perf_counter() - started
+
+        if on_batch:
+            on_batch(result)
+
+    if since:
+        started = time.perf_counter()
+        result.older = importer.count_before(file_path, since)
+        result.parse_seconds += time.perf_counter() - started
+
+    if not dry_run and result.batches:
+        bump_data_version(session=session, rewrites_ledger=False)
+        session.commit()
+
+    return result
+
+
+def import_files(
+    *,
+    session: Session,
+    statements: list[tuple[Path, str]],
+    dry_run: bool,
+    batch_size: int | None = None,
+    workers: int | None = None,
+    full: bool = False,
+    on_file: Callable[[ImportResult], None] | None = None,
+) -> list[ImportResult]:
+    """
+    Imports several bank CSV files, given as (file, bank name) pairs.
+    Files are parsed in parallel worker processes, while this process is the single writer:
+    it saves and commits each file in the given order and calls on_file after each one.
+    Workers stream their rows to temporary Arrow files, which are saved in batches,
+    so memory use does not grow with the size or number of files.
+    Rows older than each bank's import watermark are skipped unless full is set.
+    """
+    matcher = get_rule_matcher(session=session)
+    banks = {}
+    for bank_name in dict.fromkeys(bank_name for _, bank_name in statements):
+        bank_name_key, importer = _get_importer(bank_name)
+        since = _get_import_since(session=session, bank_name=bank_name_key, full=full)
+        banks[bank_name] = bank_name_key, importer, since
+
+    batch_size = batch_size or settings.import_batch_size
+    workers = workers or min(len(statements), os.cpu_count() or 1)
+    results = []
+
+    # Polars is multithreaded, so workers are spawned rather than forked.
+    with (
+        TemporaryDirectory(prefix="budy-import-") as scratch,
+        ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn")
+        ) as pool,
+    ):
+        parsed_files = [Path(scratch) / f"{i}.arrow" for i in range(len(statements))]
+        futures = [
+            pool.submit(
+                _parse_file,
+                banks[bank_name][1],
+                file_path,
+                parsed,
+                matcher,
+                banks[bank_name][2],
+            )
+            for (file_path, bank_name), parsed in zip(statements, parsed_files)
+        ]
+
+        for (file_path, bank_name), parsed, future in zip(
+            statements, parsed_files, futures
+        ):
+            bank_name_key, _, since = banks[bank_name]
+            parse_seconds, older = future.result()
+            result = ImportResult(
+                filename=file_path.name,
+                bank=bank_name_key,
+                since=since,
+                older=older,
+                parse_seconds=parse_seconds,
+            )
+            seen: dict[date, Counter[bytes]] = {}
+
+            started = time.perf_counter()
+            for batch in pl.scan_ipc(parsed).collect_batches(chunk_size=batch_size):
+                if batch.height:
+                    _write_batch(
+                        session=session,
+                        batch=batch,
+                        seen=seen,
+                        dry_run=dry_run,
+                        result=result,
+                    )
+            if not dry_run and result.batches:
+                bump_data_version(session=session, rewrites_ledger=False)
+                session.commit()
+            result.write_seconds = time.perf_counter() - started
+            parsed.unlink()
+
+            results.append(result)
+            if on_file:
+                on_file(result)
+
+    return results
+
+
+def _parse_file(
+    importer: BaseBankImporter,
+    file_path: Path,
+    target: Path,
+    matcher: RuleMatcher,
+    since: date | None,
+) -> tuple[float, int]:
+    """
+    Parses a file into an Arrow file at target inside a worker process.
+    Reports how long it took, and how many expenses were left out for being older than since.
+    """
+    started = time.perf_counter()
+    importer.write_arrow(file_path, target, matcher=matcher, since=since)
+    older = importer.count_before(file_path, since) if since else 0
+    return time.perf_counter() - started, older
+
+
+def _write_batch(
+    *,
+    session: Session,
+    batch: pl.DataFrame,
+    seen: dict[date, Counter[bytes]],
+    dry_run: bool,
+    result: ImportResult,
+) -> None:
+    """Fingerprints and saves one batch of parsed rows, adding its totals to result."""
+    rows = batch.with_columns(
+        self_receiver_expr(pl.col("receiver")).alias("is_self")
+    ).to_dicts()
+
+    for row in rows:
+        row["fingerprint"] = _fingerprint(row=row, bank=result.bank, seen=seen)
+
+    if dry_run:
+        known = set(
+            session.exec(
+                select(Transaction.fingerprint).where(
+                    col(Transaction.fingerprint).in_(
+                        [row["fingerprint"] for row in rows]
+                    )
+                )
+            ).all()
+        )
+        amounts = [row["amount"] for row in rows if row["fingerprint"] not in known]
+    else:
+        inserted = _bulk_insert_transactions(session=session, rows=rows)
+        _advance_watermark(session=session, bank=result.bank, rows=rows)
+        amounts = [amount for _, amount in inserted]
+        if inserted:
+            ids = [row_id for row_id, _ in inserted]
+            result.first_id = result.first_id or min(ids)
+            result.last_id = max(ids)
+
+    result.count += len(amounts)
+    result.total += sum(amounts)
+    result.skipped += len(rows) - len(amounts)
+    result.batches += 1
+
+
+def _advance_watermark(*, session: Session, bank: str, rows: list[dict]) -> None:
+    """Moves the bank's watermark up to the newest of the saved rows, which are all in the database by now."""
+    if not rows:
+        return
+
+    last_date = max(row["entry_date"] for row in rows)
+    fingerprints = [
+        row["fingerprint"] for row in rows if row["entry_date"] == last_date
+    ]
+    watermark = session.get(ImportWatermark, bank)
+
+    if not watermark:
+        watermark = ImportWatermark(
+            bank=bank, last_date=last_date, boundary_fingerprints=fingerprints
+        )
+    elif last_date > watermark.last_date:
+        watermark.last_date = last_date
+        watermark.boundary_fingerprints = fingerprints
+    elif last_date == watermark.last_date:
+        # Reassigned rather than appended to, so the change to the JSON column is detected
+        watermark.boundary_fingerprints = list(
+            dict.fromkeys(watermark.boundary_fingerprints + fingerprints)
+        )
+    else:
+        return
+
+    session.add(watermark)
+
+
+def _fingerprint(*, row: dict, bank: str, seen: dict[date, Counter[bytes]]) -> str:
+    """
+    Computes the stable fingerprint of an imported row.
+    Identical rows (e.g. two coffees on the same day) are told apart by their ordinal, counted in seen.
+    The date is part of the fingerprint, so ordinals only count within a date. Rows must therefore
+    arrive grouped by date, which lets seen forget each date's rows once the next date starts.
+    """
+    if row["entry_date"] not in seen:
+        seen.clear()
+    counts = seen.setdefault(row["entry_date"], Counter())
+    key = "|".join(
+        [
+            bank,
+            row["entry_date"].isoformat(),
+            str(row["amount"]),
+            row["receiver"] or "",
+            row["description"] or "",
+        ]
+    )
+    digest = hashlib.sha1(key.encode()).digest()
+    ordinal = counts[digest]
+    counts[digest] += 1
+    return f"{digest.hex()}:{ordinal}"
+
+
+def _bulk_insert_transactions(
+    *, session: Session, rows: list[dict]
+) -> list[tuple[int, int]]:
+    """
+    Writes a batch of plain row dicts straight to the transaction table with a Core INSERT.
+    Rows whose fingerprint already exists are skipped by ON CONFLICT DO NOTHING.
+    Returns the (id, amount) of every inserted row.
+    """
+    table = Transaction.__table__
+    stmt = (
+        insert(table)
+        .on_conflict_do_nothing(index_elements=["fingerprint"])
+        .returning(table.c.id, table.c.amount)
+    )
+    return [(row_id, amount) for row_id, amount in session.execute(stmt, rows)]
+
+
+def backfill_fingerprints(
+    *,
+    session: Session,
+    bank_name: str,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> tuple[int, int]:
+    """
+    Assigns fingerprints to transactions imported before fingerprints existed, attributing them to bank_name.
+    Transactions do not record their bank, so this is run once per bank, limited to the dates its statements
+    cover when the history of several banks overlaps. Transactions added by hand, which have neither receiver
+    nor description, are never fingerprinted.
+    Returns the number of rows fingerprinted and the number of candidates. Rows whose fingerprint
+    already belongs to another transaction are duplicates and are left untouched.
+    """
+    bank_name_key = bank_name.lower()
+    if bank_name_key not in settings.banks:
         available = ", ".join(settings.banks.keys())
         raise ValueError(f"Unknown bank '{bank_name}'. Available banks: {available}")
 
-    importer = BaseBankImporter(**bank_config.model_dump())
+    table = Transaction.__table__
+    filters = [
+        table.c.fingerprint.is_(None),
+        or_(table.c.receiver.is_not(None), table.c.description.is_not(None)),
+    ]
+    if start_date:
+        filters.append(table.c.entry_date >= start_date)
+    if end_date:
+        filters.append(table.c.entry_date <= end_date)
 
-    transactions = importer.process_file(file_path)
+    candidates = session.execute(
+        select(
+            table.c.id,
+            table.c.entry_date,
+            table.c.amount,
+            table.c.receiver,
+            table.c.description,
+        )
+        .where(*filters)
+        # Grouped by date for the ordinals, in import order within each date
+        .order_by(table.c.entry_date, table.c.id)
+    ).mappings()
 
-    # Apply auto-categorization rules
-    rules = session.exec(select(CategoryRule)).all()
-    for txn in transactions:
-        # Combine receiver and description for matching
-        text_to_match = f"{txn.receiver or ''} {txn.description or ''}".lower()
+    seen: dict[date, Counter[bytes]] = {}
+    params = [
+        {
+            "row_id": row["id"],
+            "fingerprint": _fingerprint(row=row, bank=bank_name_key, seen=seen),
+        }
+        for row in candidates
+    ]
 
-        for rule in rules:
-            if rule.pattern in text_to_match:
-                txn.category_id = rule.category_id
-                break
+    if not params:
+        return 0, 0
 
-    if not dry_run and transactions:
-        session.add_all(transactions)
-        session.commit()
+    stmt = (
+        update(table)
+        .prefix_with("OR IGNORE")
+        .where(table.c.id == bindparam("row_id"))
+        .values(fingerprint=bindparam("fingerprint"))
+    )
+    updated = session.execute(stmt, params).rowcount
+    bump_data_version(session=session)
+    session.commit()
+    return updated, len(params)
+
+
+def refresh_self_transfers(*, session: Session) -> int:
+    """
+    Recomputes the is_self flag of every transaction, e.g. after the user's name has changed.
+    Returns the number of transactions flagged as transfers to oneself.
+    """
+    variants = get_user_name_variants()
+    receiver = func.unicode_lower(func.trim(col(Transaction.receiver), WHITESPACE))
+    is_self = func.coalesce(receiver.in_(variants), false()) if variants else false()
+
+    session.execute(update(Transaction).values(is_self=is_self))
+    bump_data_version(session=session)
+    session.commit()
 
-    return transactions
+    return session.exec(
+        select(func.count()).select_from(Transaction).where(col(Transaction.is_self))
+    ).one()
 
 
 def search_transactions(
-    *, session: Session, query: str, limit: int
-) -> list[Transaction]:
-    """Search for transactions by receiver or description keyword."""
-    pattern = f"%{query}%"
-    stmt = (
-        select(Transaction)
-        .where(
-            or_(
-                col(Transaction.receiver).ilike(pattern),
-                col(Transaction.description).ilike(pattern),
+    *, session: Session, query: str, limit: int, after: PageCursor | None = None
+) -> SearchPage:
+    """
+    Search for transactions by receiver or description keywords, best matches first.
+    Every term must occur in either field. A term ending in * must start a word, e.g. "rim*".
+    Terms of three or more characters are looked up in the full-text index, and shorter ones
+    only narrow down those matches, or fall back to a scan when no term is long enough.
+    Results are paged with a cursor rather than an offset: on (rank, id) when ranked, where equal
+    ranks are ordered by ID, and on (entry_date, id) otherwise.
+    """
+    receiver, description = col(Transaction.receiver), col(Transaction.description)
+    phrases, filters = [], []
+    for term in query.split():
+        word = term.rstrip("*")
+        if not word:
+            continue
+        if len(word) >= MIN_INDEXED_TERM:
+            phrases.append('"' + word.replace('"', '""') + '"')
+        if term.endswith("*"):
+            filters.append(
+                or_(
+                    receiver.istartswith(word, autoescape=True),
+                    receiver.icontains(f" {word}", autoescape=True),
+                    description.istartswith(word, autoescape=True),
+                    description.icontains(f" {word}", autoescape=True),
+                )
+            )
+        elif len(word) < MIN_INDEXED_TERM:
+            filters.append(
+                or_(
+                    receiver.icontains(word, autoescape=True),
+                    description.icontains(word, autoescape=True),
+                )
+            )
+
+    if not phrases and not filters:
+        return SearchPage(results=[])
+
+    if phrases:
+        # FTS5's rank is the bm25 score, which is lower for better matches
+        rank = transaction_fts.c.rank
+        stmt = (
+            select(Transaction, rank)
+            .join(transaction_fts, transaction_fts.c.rowid == Transaction.id)
+            .where(literal_column("transaction_fts").match(" AND ".join(phrases)))
+            .order_by(rank, desc(Transaction.id))
+        )
+        if after:
+            # Rows ranked like the cursor's are told apart by ID alone, so the next page neither
+            # repeats nor skips them even though bm25 scores often tie
+            stmt = stmt.where(
+                or_(
+                    rank > after.rank,
+                    and_(rank >= after.rank, col(Transaction.id) < after.id),
+                )
+            )
+    else:
+        rank = null()
+        stmt = select(Transaction, rank).order_by(
+            desc(Transaction.entry_date), desc(Transaction.id)
+        )
+        if after:
+            stmt = stmt.where(
+                tuple_(Transaction.entry_date, Transaction.id)
+                < (after.entry_date, after.id)
             )
+
+    # One extra row tells whether there is a next page
+    rows = session.exec(stmt.where(*filters).limit(limit + 1)).all()
+
+    page = SearchPage(results=[transaction for transaction, _ in rows[:limit]])
+    if len(rows) > limit:
+        last, last_rank = rows[limit - 1]
+        page.next_cursor = PageCursor(
+            entry_date=last.entry_date, id=last.id, rank=last_rank
         )
-        .order_by(desc(Transaction.entry_date))
-        .limit(limit)
+    return page
+
+
+def _build_query(*, expression: str, limit: int, after: PageCursor | None):
+    """Builds the statement for a filter expression, newest first, starting after the cursor."""
+    stmt = select(Transaction).where(*compile_filter(expression))
+    if after:
+        stmt = stmt.where(
+            tuple_(Transaction.entry_date, Transaction.id)
+            < (after.entry_date, after.id)
+        )
+    # One extra row tells whether there is a next page
+    return stmt.order_by(desc(Transaction.entry_date), desc(Transaction.id)).limit(
+        limit + 1
+    )
+
+
+def query_transactions(
+    *, session: Session, expression: str, limit: int, after: PageCursor | None = None
+) -> SearchPage:
+    """
+    Lists the transactions matching a filter expression (see budy.query), newest first.
+    The whole filter runs as a single SQL statement. Raises ValueError if the expression is not valid.
+    """
+    rows = session.exec(
+        _build_query(expression=expression, limit=limit, after=after)
+    ).all()
+
+    page = SearchPage(results=list(rows[:limit]))
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        page.next_cursor = PageCursor(entry_date=last.entry_date, id=last.id)
+    return page
+
+
+def explain_transaction_query(
+    *, session: Session, expression: str, limit: int, after: PageCursor | None = None
+) -> list[QueryPlanStep]:
+    """Returns SQLite's plan for the statement query_transactions would run."""
+    return explain_query(
+        session=session,
+        stmt=_build_query(expression=expression, limit=limit, after=after),
     )
-    return list(session.exec(stmt).all())
+
+
+def rebuild_search_index(*, session: Session) -> int:
+    """Rebuilds the full-text index from the transaction table and returns the number of indexed transactions."""
+    session.execute(
+        text("INSERT INTO transaction_fts (transaction_fts) VALUES ('rebuild')")
+    )
+    session.commit()
+    return session.exec(select(func.count()).select_from(Transaction)).one()
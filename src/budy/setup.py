@@ -8,7 +8,7 @@ from typer import Exit, Option, get_app_dir
 
 from budy.config import APP_NAME, BankConfig, Settings, settings
 from budy.database import engine
-from budy.services.transaction import import_transactions
+from budy.services.transaction import import_transactions, refresh_self_transfers
 from budy.views.messages import render_error
 from budy.views.transaction import render_import_summary
 
@@ -97,6 +97,11 @@ def run_setup(
     # 5. Save Configuration
     save_config(config_path, defaults)
 
+    name_changed = (settings.first_name, settings.last_name) != (
+        defaults.first_name,
+        defaults.last_name,
+    )
+
     # Update global settings in memory so imports work immediately without reload
     settings.first_name = defaults.first_name
     settings.last_name = defaults.last_name
@@ -104,6 +109,15 @@ def run_setup(
     settings.banks = defaults.banks
 
     console.print(f"\n[green]✓ Configuration saved to {config_path}[/]")
+
+    if name_changed:
+        # Transfers to yourself are recognized by name, so existing transactions are re-checked.
+        with Session(engine) as session:
+            self_transfers = refresh_self_transfers(session=session)
+        if self_transfers:
+            console.print(
+                f"[dim]Found {self_transfers} transfers between your own accounts.[/]"
+            )
     console.print(
         f"\nWelcome, [bold cyan]{first_name} {last_name}[/]! You are all set."
     )
@@ -142,6 +156,14 @@ last_name = "{settings_obj.last_name}"
             toml_content += f'receiver_col = "{bank_config.receiver_col}"\n'
         if bank_config.description_col:
             toml_content += f'description_col = "{bank_config.description_col}"\n'
+        if bank_config.date_format:
+            toml_content += f'date_format = "{bank_config.date_format}"\n'
+        if bank_config.column_types:
+            column_types = ", ".join(
+                f'"{column}" = "{type_name}"'
+                for column, type_name in bank_config.column_types.items()
+            )
+            toml_content += f"column_types = {{ {column_types} }}\n"
 
     with open(path, "w", encoding="utf-8") as f:
         f.write(toml_content)
@@ -190,6 +212,9 @@ def handle_import_workflow(config_path: Path, current_settings: Settings):
                 description_col=Prompt.ask(
                     "Description column header (optional)", default=None
                 ),
+                date_format=Prompt.ask(
+                    "Date format, e.g. %d.%m.%Y (optional)", default=None
+                ),
                 encoding="utf-8",  # Defaulting for simplicity
             )
 
@@ -237,19 +262,13 @@ debit_value = "D"
         console.print(f"\nImporting from [cyan]{selected_bank_name}[/]...")
         try:
             with Session(engine) as session:
-                transactions = import_transactions(
+                result = import_transactions(
                     session=session,
                     bank_name=selected_bank_name,
                     file_path=file_path,
                     dry_run=False,
                 )
-                console.print(
-                    render_import_summary(
-                        transactions=transactions,
-                        filename=file_path.name,
-                        dry_run=False,
-                    )
-                )
+                console.print(render_import_summary(results=[result], dry_run=False))
                 print_next_steps()
         except Exception as e:
             console.print(render_error(message=f"Import failed: {e}"))
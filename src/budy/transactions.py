@@ -1,28 +1,42 @@
+import shlex
 from datetime import date, datetime
 from pathlib import Path
 from typing import Annotated, Optional
 
 from rich.console import Console
+from rich.prompt import Prompt
 from sqlmodel import Session
-from typer import Argument, Exit, Option, Typer, confirm
+from typer import Argument, BadParameter, Exit, Option, Typer, confirm
 
 from budy.config import settings
 from budy.database import engine
+from budy.query import FILTER_HELP
+from budy.reports import parse_cursor
+from budy.services.export import export_transactions
 from budy.services.transaction import (
     create_transaction,
     delete_transaction,
+    detect_statement_banks,
+    explain_transaction_query,
+    find_statement_files,
     get_transactions,
+    import_files,
     import_transactions,
+    query_transactions,
     update_transaction,
 )
-from budy.services.export import export_transactions
 from budy.views.messages import (
     render_error,
+    render_next_page,
     render_success,
     render_warning,
 )
 from budy.views.transaction import (
+    render_import_file_progress,
+    render_import_progress,
     render_import_summary,
+    render_query_plan,
+    render_query_results,
     render_transaction_list,
 )
 
@@ -99,18 +113,120 @@ def read_transactions(
             help="Limit the number of entries shown.",
         ),
     ] = 7,
+    after: Annotated[
+        str | None,
+        Option(
+            "--after",
+            metavar="CURSOR",
+            help="Continue from the cursor printed below the previous page, showing --limit transactions instead of days.",
+        ),
+    ] = None,
 ) -> None:
     """Display transaction history in a table."""
+    if offset and after:
+        raise BadParameter("Use either --offset or --after, not both.")
+
     with Session(engine) as session:
-        transactions = get_transactions(session=session, offset=offset, limit=limit)
+        page = get_transactions(
+            session=session, offset=offset, limit=limit, after=parse_cursor(after)
+        )
 
-    if not transactions:
+    if not page.days:
         console.print(
             render_warning(message="No transactions found for the selected dates.")
         )
         return
 
-    console.print(render_transaction_list(daily_transactions=transactions))
+    console.print(render_transaction_list(daily_transactions=page.days))
+    if page.next_cursor:
+        console.print(
+            render_next_page(
+                command=f"budy transactions list --limit {limit} "
+                f"--after {page.next_cursor.encode()}"
+            ),
+            # The cursor must stay on one line to be copied
+            soft_wrap=True,
+        )
+
+
+@app.command(
+    name="query", help=f"List the transactions matching filters.\n\n{FILTER_HELP}"
+)
+def run_query(
+    expression: Annotated[
+        str,
+        Argument(help="Filters such as 'amount:>20 date:2024 -category:Rent'."),
+    ] = "",
+    limit: Annotated[
+        int,
+        Option(
+            "--limit",
+            "-l",
+            min=1,
+            help="Maximum number of transactions to display.",
+        ),
+    ] = 50,
+    after: Annotated[
+        str | None,
+        Option(
+            "--after",
+            metavar="CURSOR",
+            help="Continue from the cursor printed below the previous page.",
+        ),
+    ] = None,
+    explain: Annotated[
+        bool,
+        Option(
+            "--explain",
+            help="Show how SQLite would run the query instead of running it.",
+        ),
+    ] = False,
+) -> None:
+    try:
+        with Session(engine) as session:
+            if explain:
+                plan = explain_transaction_query(
+                    session=session,
+                    expression=expression,
+                    limit=limit,
+                    after=parse_cursor(after),
+                )
+            else:
+                page = query_transactions(
+                    session=session,
+                    expression=expression,
+                    limit=limit,
+                    after=parse_cursor(after),
+                )
+    except ValueError as e:
+        raise BadParameter(str(e))
+
+    if explain:
+        console.print(render_query_plan(plan=plan))
+        if any(step.full_scan for step in plan):
+            console.print(
+                render_warning(
+                    message="The query may read every transaction, as no filter narrows down an index."
+                )
+            )
+        return
+
+    if not page.results:
+        console.print(render_warning(message="No transactions match the filters."))
+        return
+
+    console.print(
+        render_query_results(transactions=page.results, expression=expression)
+    )
+    if page.next_cursor:
+        console.print(
+            render_next_page(
+                command=f"budy transactions query {shlex.quote(expression)} "
+                f"--limit {limit} --after {page.next_cursor.encode()}"
+            ),
+            # The cursor must stay on one line to be copied
+            soft_wrap=True,
+        )
 
 
 @app.command(name="update")
@@ -263,55 +379,104 @@ def get_bank_names(incomplete: str):
 
 @app.command(name="import")
 def run_import(
+    paths: Annotated[
+        list[Path] | None,
+        Option(
+            "--file",
+            "-f",
+            help="Path to a CSV file, a directory of CSV files or a glob pattern. Repeat to import several. Prompted for when omitted.",
+        ),
+    ] = None,
     bank: Annotated[
-        str,
+        str | None,
         Option(
             "--bank",
             "-b",
-            prompt=True,
-            help="The bank to import from (defined in config).",
+            help="The bank to import from (defined in config). Detected from each file's header when omitted.",
             autocompletion=get_bank_names,
         ),
-    ],
-    file_path: Annotated[
-        Path,
-        Option(
-            "--file",
-            "-f",
-            exists=True,
-            file_okay=True,
-            dir_okay=False,
-            readable=True,
-            resolve_path=True,
-            prompt=True,
-            help="Path to the CSV file.",
-        ),
-    ],
+    ] = None,
     dry_run: Annotated[
         bool,
         Option(
             help="Parse the file but do not save to the database.",
         ),
     ] = False,
+    batch_size: Annotated[
+        int,
+        Option(
+            "--batch-size",
+            min=1,
+            help="Number of rows to parse and save per chunk.",
+        ),
+    ] = settings.import_batch_size,
+    workers: Annotated[
+        int | None,
+        Option(
+            "--workers",
+            "-w",
+            min=1,
+            help="Number of processes parsing files in parallel (default: one per file, up to the CPU count).",
+        ),
+    ] = None,
+    full: Annotated[
+        bool,
+        Option(
+            "--full",
+            help="Read the whole file, including rows older than the last import from this bank.",
+        ),
+    ] = False,
 ) -> None:
-    """Import transactions from a bank CSV file."""
-    console.print(
-        f"Parsing [bold]{file_path.name}[/] using [cyan]{bank}[/] importer..."
-    )
-
+    """Import transactions from one or more bank CSV files."""
     try:
+        if not paths:
+            # Typer cannot prompt for a repeatable option, so a single path is asked for here
+            paths = [Path(Prompt.ask("File"))]
+
+        file_paths = find_statement_files(paths)
+        if not file_paths:
+            raise ValueError("No CSV files found to import.")
+
+        statements = detect_statement_banks(file_paths, bank_name=bank)
+
         with Session(engine) as session:
-            transactions = import_transactions(
-                session=session,
-                bank_name=bank,
-                file_path=file_path,
-                dry_run=dry_run,
-            )
-            console.print(
-                render_import_summary(
-                    transactions=transactions, filename=file_path.name, dry_run=dry_run
+            if len(statements) == 1:
+                file_path, bank_name = statements[0]
+                console.print(
+                    f"Parsing [bold]{file_path.name}[/] using [cyan]{bank_name}[/] importer..."
                 )
-            )
+                results = [
+                    import_transactions(
+                        session=session,
+                        bank_name=bank_name,
+                        file_path=file_path,
+                        dry_run=dry_run,
+                        batch_size=batch_size,
+                        full=full,
+                        on_batch=lambda progress: console.print(
+                            render_import_progress(result=progress)
+                        ),
+                    )
+                ]
+            else:
+                bank_names = list(dict.fromkeys(bank for _, bank in statements))
+                importers = "importer" if len(bank_names) == 1 else "importers"
+                console.print(
+                    f"Parsing [bold]{len(statements)}[/] files using [cyan]{', '.join(bank_names)}[/] {importers}..."
+                )
+                results = import_files(
+                    session=session,
+                    statements=statements,
+                    dry_run=dry_run,
+                    batch_size=batch_size,
+                    workers=workers,
+                    full=full,
+                    on_file=lambda result: console.print(
+                        render_import_file_progress(result=result)
+                    ),
+                )
+
+            console.print(render_import_summary(results=results, dry_run=dry_run))
     except ValueError as e:
         console.print(render_error(message=str(e)))
         raise Exit(1)
@@ -45,6 +45,23 @@ def render_budget_list(
     return table
 
 
+def render_removed_budgets(*, budgets: list[Budget]) -> Table:
+    """Renders the duplicate budgets that were removed, by month."""
+    table = Table(title="Removed Budgets")
+    table.add_column("ID", justify="right", style="dim")
+    table.add_column("Month", style="cyan")
+    table.add_column("Amount", justify="right", style="red")
+
+    for budget in budgets:
+        table.add_row(
+            str(budget.id),
+            f"{calendar.month_name[budget.target_month]} {budget.target_year}",
+            f"{settings.currency_symbol}{budget.amount / 100.0:,.0f}",
+        )
+
+    return table
+
+
 def render_budget_preview(*, suggestions: list[BudgetSuggestion], year: int) -> Table:
     """Renders the comparison table of current vs suggested budgets."""
     table = Table(title=f"Suggested Budgets ({year})")
@@ -1,6 +1,6 @@
 from rich.table import Table
 
-from budy.schemas import Category, CategoryRule
+from budy.schemas import Category, CategoryRule, RuleApplyResult
 
 
 def render_category_list(categories: list[Category]) -> Table:
@@ -39,3 +39,33 @@ def render_rule_list(rules: list[tuple[CategoryRule, Category]]) -> Table:
         )
 
     return table
+
+
+def render_rule_hits(*, result: RuleApplyResult, dry_run: bool) -> Table:
+    """Renders how many transactions each rule matched and changed."""
+    title = "Rule Matches (Dry Run)" if dry_run else "Rule Matches"
+    table = Table(title=title, show_footer=True)
+
+    table.add_column("ID", style="dim", width=4)
+    table.add_column("Pattern", style="cyan")
+    table.add_column("Assigns To", style="bold", footer="Total:")
+    table.add_column(
+        "Matched", justify="right", footer=str(sum(h.hits for h in result.hits))
+    )
+    table.add_column(
+        "Changed",
+        justify="right",
+        style="green",
+        footer=str(sum(h.changes for h in result.hits)),
+    )
+
+    for hit in result.hits:
+        table.add_row(
+            str(hit.rule_id),
+            hit.pattern,
+            hit.category_name,
+            str(hit.hits),
+            str(hit.changes),
+        )
+
+    return table
@@ -1,3 +1,6 @@
+from rich.markup import escape
+
+
 def render_error(*, message: str) -> str:
     """Helper for consistent error message styling."""
     return f"\n[red bold]{message}[/]\n"
@@ -11,3 +14,8 @@ def render_warning(*, message: str) -> str:
 def render_success(*, message: str) -> str:
     """Helper for consistent success message styling."""
     return f"\n[green bold]{message}[/]\n"
+
+
+def render_next_page(*, command: str) -> str:
+    """Helper for pointing to the next page of a paged listing."""
+    return f"[dim]Next page:[/] [green]{escape(command)}[/]"
@@ -4,6 +4,7 @@ from rich.table import Table
 
 from budy.config import settings
 from budy.schemas import (
+    GroupVolatilityReportData,
     MonthlyReportData,
     PayeeRankingItem,
     Transaction,
@@ -93,13 +94,12 @@ def render_search_results(
     query: str,
     limit: int,
 ) -> Table:
-    """Renders search results in a table."""
-    display_results = results[::-1]
-    total_cents = sum(t.amount for t in display_results)
+    """Renders search results in a table, best matches first."""
+    total_cents = sum(t.amount for t in results)
 
     title = f"Search Results: '{query}'"
     if len(results) == limit:
-        title += f" (Showing latest {limit})"
+        title += f" (Showing best {limit})"
 
     table = Table(title=title, show_footer=True)
     table.add_column("Date", style="cyan")
@@ -112,7 +112,7 @@ def render_search_results(
         footer=f"{settings.currency_symbol}{total_cents / 100:,.2f}",
     )
 
-    for t in display_results:
+    for t in results:
         desc = t.description or ""
         if len(desc) > 30:
             desc = f"{desc[:27]}..."
@@ -127,6 +127,34 @@ def render_search_results(
     return table
 
 
+def render_group_volatility_report(
+    *, data: GroupVolatilityReportData, year: int | None
+) -> Table:
+    """Renders the transactions that stand out within their own category or payee."""
+    group_label = data.by.value.capitalize()
+    table = Table(
+        title=f"Outliers by {group_label} {'(' + str(year) + ')' if year else '(All Time)'}",
+        caption=f"Compared within {data.group_count} {'group' if data.group_count == 1 else 'groups'} ({data.total_count} transactions)",
+    )
+    table.add_column("Date", style="cyan")
+    table.add_column(group_label, style="white")
+    table.add_column("Amount", justify="right", style="red bold")
+    table.add_column("Usual", justify="right", style="dim")
+    table.add_column("Z-Score", justify="right", style="bold")
+
+    for item in data.outliers:
+        t = item.transaction
+        table.add_row(
+            t.entry_date.strftime("%b %d, %Y"),
+            item.group_name,
+            f"{settings.currency_symbol}{t.amount / 100:,.2f}",
+            f"{settings.currency_symbol}{item.group_avg / 100:,.2f} ± {item.group_stdev / 100:,.2f}",
+            f"{item.z_score:.1f}",
+        )
+
+    return table
+
+
 def render_volatility_report(*, data: VolatilityReportData, year: int | None) -> Group:
     """Renders the volatility analysis panel and outliers list."""
     cv = (data.stdev_amount / data.avg_amount) if data.avg_amount else 0
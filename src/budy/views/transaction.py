@@ -1,10 +1,12 @@
 from datetime import date
 
 from rich.console import Group
+from rich.markup import escape
 from rich.table import Table
+from rich.tree import Tree
 
 from budy.config import settings
-from budy.schemas import Transaction
+from budy.schemas import ImportResult, QueryPlanStep, Transaction
 from budy.views.messages import render_success, render_warning
 
 
@@ -86,23 +88,172 @@ def render_simple_transaction_list(
     return table
 
 
-def render_import_summary(
-    *, transactions: list[Transaction], filename: str, dry_run: bool
-) -> Group | str:
-    """Renders the post-import summary message."""
-    if not transactions:
-        return render_warning(message=f"No valid expenses found in {filename}.")
+def render_query_results(*, transactions: list[Transaction], expression: str) -> Table:
+    """Renders the transactions matching a filter expression, newest first."""
+    total_cents = sum(t.amount for t in transactions)
 
-    count = len(transactions)
-    total_display = sum(t.amount for t in transactions) / 100.0
+    title = f"Transactions: '{expression}'" if expression else "Transactions"
+    table = Table(title=escape(title), show_footer=True)
+    table.add_column("ID", justify="right", style="dim")
+    table.add_column("Date", style="cyan")
+    table.add_column("Receiver / Description", style="white", footer="Total:")
+    table.add_column(
+        "Amount",
+        justify="right",
+        style="green",
+        footer=f"{settings.currency_symbol}{total_cents / 100:,.2f}",
+    )
+
+    for t in transactions:
+        details_parts = []
+        if t.receiver:
+            details_parts.append(f"[bold]{escape(t.receiver)}[/]")
+        if t.description:
+            desc = t.description
+            if len(desc) > 60:
+                desc = desc[:57] + "..."
+            details_parts.append(f"[dim]{escape(desc)}[/]")
+
+        table.add_row(
+            str(t.id),
+            t.entry_date.strftime("%b %d, %Y"),
+            "\n".join(details_parts) if details_parts else "[dim]-[/]",
+            f"{settings.currency_symbol}{t.amount / 100:,.2f}",
+        )
+
+    return table
+
+
+def render_query_plan(*, plan: list[QueryPlanStep]) -> Tree:
+    """Renders SQLite's query plan as a tree, with full table and index scans in red."""
+    tree = Tree("[bold]Query Plan[/]")
+    nodes = {0: tree}
+    for step in plan:
+        label = escape(step.detail)
+        if step.full_scan:
+            scanned = "index" if " INDEX " in step.detail else "table"
+            label = f"[red bold]{label}[/] [red](full {scanned} scan)[/]"
+        nodes[step.id] = nodes.get(step.parent, tree).add(label)
+    return tree
+
+
+def render_import_progress(*, result: ImportResult) -> str:
+    """Renders a progress line after each imported chunk."""
+    processed = result.count + result.skipped
+    return f"[dim]Chunk {result.batches}: {processed:,} transactions processed...[/]"
+
+
+def render_import_file_progress(*, result: ImportResult) -> str:
+    """Renders a progress line after each file of a multi-file import."""
+    return (
+        f"[dim]{result.filename} ({result.bank}): {result.count:,} new, {result.skipped:,} skipped "
+        f"(parsed in {result.parse_seconds:.2f}s, saved in {result.write_seconds:.2f}s)[/]"
+    )
+
+
+def render_import_summary(*, results: list[ImportResult], dry_run: bool) -> Group | str:
+    """Renders the post-import summary message, with a per-file breakdown for multi-file imports."""
+    count = sum(r.count for r in results)
+    skipped = sum(r.skipped for r in results)
+    filenames = ", ".join(r.filename for r in results)
+    # Files from different banks were read from different watermarks
+    sinces = {r.since for r in results}
+    since = sinces.pop() if len(sinces) == 1 else None
+    older = sum(r.older for r in results)
+    cutoff = f"before {since}" if since else "before their bank's last import"
+    older_note = (
+        f"{older} expenses dated {cutoff} were not imported, as earlier statements are assumed to cover them. "
+        "Use --full to import any that are missing."
+    )
+
+    if not count:
+        if skipped:
+            message = f"All {skipped} expenses in {filenames} were already imported."
+        elif since:
+            message = f"No expenses dated {since} or later found in {filenames}."
+        else:
+            message = f"No valid expenses found in {filenames}."
+        if older:
+            message += f" {older_note}"
+        return render_warning(message=message)
+
+    total_display = sum(r.total for r in results) / 100.0
+
+    parts = []
+    if len(results) > 1:
+        parts.append(render_import_files(results=results))
 
     summary_text = f"\nFound [bold]{count}[/] transactions totaling [green]{settings.currency_symbol}{total_display:,.2f}[/]."
+    if skipped:
+        summary_text += (
+            f"\n[dim]Skipped {skipped} transactions that were already imported.[/]"
+        )
+    if older:
+        summary_text += f"\n[yellow]{older_note}[/]"
+    parts.append(summary_text)
 
     if dry_run:
-        status_text = "[yellow]Dry run active. No changes made to database.[/]"
+        parts.append("[yellow]Dry run active. No changes made to database.[/]")
+    elif len(results) > 1:
+        parts.append(
+            render_success(
+                message=f"Successfully imported {count} transactions from {len(results)} files!"
+            )
+        )
     else:
         status_text = render_success(
             message=f"Successfully imported {count} transactions!"
         )
+        result = results[0]
+        if result.first_id is not None:
+            status_text += (
+                f"[dim]Assigned IDs #{result.first_id} to #{result.last_id}.[/]"
+            )
+        parts.append(status_text)
+
+    return Group(*parts)
 
-    return Group(summary_text, status_text)
+
+def render_import_files(*, results: list[ImportResult]) -> Table:
+    """Renders a per-file breakdown of a multi-file import, including timings."""
+    table = Table(title="Imported Files", show_footer=True)
+    table.add_column("File", style="cyan", footer="Total:")
+    table.add_column("Bank", style="dim")
+    table.add_column("New", justify="right", footer=str(sum(r.count for r in results)))
+    table.add_column(
+        "Skipped",
+        justify="right",
+        style="dim",
+        footer=str(sum(r.skipped for r in results)),
+    )
+    table.add_column(
+        "Amount",
+        justify="right",
+        style="green",
+        footer=f"{settings.currency_symbol}{sum(r.total for r in results) / 100:,.2f}",
+    )
+    table.add_column(
+        "Parse",
+        justify="right",
+        style="dim",
+        footer=f"{sum(r.parse_seconds for r in results):.2f}s",
+    )
+    table.add_column(
+        "Save",
+        justify="right",
+        style="dim",
+        footer=f"{sum(r.write_seconds for r in results):.2f}s",
+    )
+
+    for r in results:
+        table.add_row(
+            r.filename,
+            r.bank,
+            str(r.count),
+            str(r.skipped),
+            f"{settings.currency_symbol}{r.total / 100:,.2f}",
+            f"{r.parse_seconds:.2f}s",
+            f"{r.write_seconds:.2f}s",
+        )
+
+    return table
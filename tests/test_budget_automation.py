@@ -1,11 +1,11 @@
 from datetime import date
 
-from sqlmodel import Session, SQLModel
+from sqlmodel import Session, SQLModel, select
 from typer.testing import CliRunner
 
 from budy import app
 from budy.database import engine
-from budy.schemas import Transaction
+from budy.schemas import Budget, Transaction
 
 
 def reset_db():
@@ -61,3 +61,33 @@ def test_generate_budgets_no_data():
 
     assert result.exit_code == 0
     assert "No suggestions found" in result.stdout
+
+
+def test_generate_budgets_for_several_years():
+    """E2E: Budgets for a range of years are suggested from one pass over the history."""
+    reset_db()
+    runner = CliRunner()
+
+    with Session(engine) as session:
+        for month in range(1, 13):
+            session.add(Transaction(amount=20000, entry_date=date(2024, month, 15)))
+        # Only seen once the 2025 budgets are in the past
+        session.add(Transaction(amount=80000, entry_date=date(2025, 3, 15)))
+        session.commit()
+
+    result = runner.invoke(
+        app, ["budgets", "generate", "--years", "2025-2026", "--yes"]
+    )
+
+    assert result.exit_code == 0
+    assert "generate budgets for 2025-2026" in result.stdout
+    assert "Suggested Budgets (2025)" in result.stdout
+    assert "Suggested Budgets (2026)" in result.stdout
+    assert "Successfully saved 24 budgets" in result.stdout
+
+    with Session(engine) as session:
+        march = {
+            b.target_year: b.amount
+            for b in session.exec(select(Budget).where(Budget.target_month == 3))
+        }
+    assert march == {2025: 20000, 2026: 50000}
@@ -1,11 +1,13 @@
 from hypothesis import given
 from hypothesis import strategies as st
-from sqlmodel import SQLModel
+from sqlalchemy import inspect, text
+from sqlmodel import Session, SQLModel, select
 from typer.testing import CliRunner
 
 from budy import app
 from budy.config import settings as app_settings
 from budy.database import engine
+from budy.schemas import Budget
 
 
 def reset_db():
@@ -54,3 +56,45 @@ def test_budget_collision(month, year):
     )
 
     assert "already exists" in result.stdout
+
+
+def test_dedupe_budgets():
+    """E2E: Duplicate budgets from older versions are only removed on request, keeping the newest."""
+    import budy
+
+    reset_db()
+    runner = CliRunner()
+
+    # Older versions had no unique index, so a month could get several budgets
+    with Session(engine) as session:
+        session.exec(text("DROP INDEX ix_budget_year_month"))
+        session.add_all(
+            [
+                Budget(amount=10000, target_month=3, target_year=2024),
+                Budget(amount=20000, target_month=3, target_year=2024),
+                Budget(amount=30000, target_month=4, target_year=2024),
+            ]
+        )
+        session.commit()
+    assert budy._has_duplicate_budgets()
+
+    result = runner.invoke(app, ["db", "dedupe-budgets"], input="n\n")
+    assert "Removed Budgets" in result.stdout
+    assert "March 2024" in result.stdout
+    assert "Operation cancelled" in result.stdout
+    assert budy._has_duplicate_budgets()
+
+    result = runner.invoke(app, ["db", "dedupe-budgets", "--yes"])
+    assert result.exit_code == 0
+    assert "Removed 1 duplicate budgets" in result.stdout
+    assert not budy._has_duplicate_budgets()
+
+    with Session(engine) as session:
+        budgets = session.exec(select(Budget).order_by(Budget.id)).all()
+        assert [(b.target_month, b.amount) for b in budgets] == [(3, 20000), (4, 30000)]
+    assert "ix_budget_year_month" in {
+        index["name"] for index in inspect(engine).get_indexes("budget")
+    }
+
+    result = runner.invoke(app, ["db", "dedupe-budgets"])
+    assert "Every month has at most one budget" in result.stdout
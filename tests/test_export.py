@@ -65,3 +65,41 @@ def test_export_transactions(tmp_path):
     content = json_file.read_text()
     assert '"receiver":"Store A"' in content
     assert '"category":"Groceries"' in content
+
+
+def test_ledger_snapshot(tmp_path):
+    """The snapshot appends new transactions and is rebuilt when existing ones change."""
+    from decimal import Decimal
+
+    from sqlmodel import create_engine
+
+    from budy.services.snapshot import read_ledger, refresh_snapshot, scan_ledger
+    from budy.services.transaction import create_transaction, update_transaction
+
+    file_engine = create_engine(f"sqlite:///{tmp_path / 'budy.db'}")
+    SQLModel.metadata.create_all(file_engine)
+
+    with Session(file_engine) as session:
+        create_transaction(session=session, amount=Decimal("10.00"))
+        create_transaction(session=session, amount=Decimal("20.00"))
+
+        result = refresh_snapshot(session=session)
+        assert (result.rows, result.parts, result.rebuilt) == (2, 1, True)
+        assert (tmp_path / "budy.snapshot" / "part-0000.arrow").exists()
+
+        result = refresh_snapshot(session=session)
+        assert (result.rows, result.appended, result.rebuilt) == (2, 0, False)
+
+        # New transactions are appended as another part
+        create_transaction(session=session, amount=Decimal("30.00"))
+        result = refresh_snapshot(session=session)
+        assert (result.rows, result.parts, result.appended) == (3, 2, 1)
+        assert (
+            scan_ledger(session=session).collect().equals(read_ledger(session=session))
+        )
+
+        # Changing an existing transaction rebuilds the snapshot
+        update_transaction(session=session, transaction_id=1, amount=Decimal("15.00"))
+        ledger = scan_ledger(session=session).collect()
+        assert ledger["amount"].to_list() == [1500, 2000, 3000]
+        assert refresh_snapshot(session=session).parts == 1
@@ -4,12 +4,13 @@ from decimal import Decimal
 
 from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
-from sqlmodel import Session, SQLModel, select
+from sqlmodel import Session, SQLModel, col, select
 from typer.testing import CliRunner
 
 from budy import app
+from budy.config import settings as budy_settings
 from budy.database import engine
-from budy.schemas import Transaction
+from budy.schemas import ImportWatermark, Transaction
 
 
 def reset_db():
@@ -95,3 +96,516 @@ def test_import_csv_workflow(tmp_path, transactions):
         total_imported = sum(t.amount for t in db_txs)
         expected_total = sum(int(amt * 100) for _, amt, _, _ in transactions)
         assert total_imported == expected_total
+
+
+def test_import_streams_in_chunks(tmp_path):
+    """E2E: Large files are imported chunk by chunk with progress after each one."""
+    reset_db()
+    runner = CliRunner()
+
+    csv_file = tmp_path / "bank_statement.csv"
+    with open(csv_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "Kuupäev",
+                "Saaja/maksja nimi",
+                "Selgitus",
+                "Summa",
+                "Deebet/Kreedit (D/C)",
+            ]
+        )
+        for i in range(25):
+            writer.writerow(
+                [f"2024-01-{i + 1:02d}", f"Shop {i}", "Groceries", "1.50", "D"]
+            )
+        # Credits are not expenses and must be skipped
+        writer.writerow(["2024-01-31", "Employer", "Salary", "1000.00", "C"])
+
+    result = runner.invoke(
+        app,
+        [
+            "transactions",
+            "import",
+            "--bank",
+            "lhv",
+            "--file",
+            str(csv_file),
+            "--batch-size",
+            "10",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "Chunk 3: 25 transactions processed" in result.stdout
+    assert "Successfully imported 25 transactions" in result.stdout
+    assert "Assigned IDs #1 to #25" in result.stdout
+
+    with Session(engine) as session:
+        db_txs = session.exec(select(Transaction)).all()
+        assert len(db_txs) == 25
+        assert sum(t.amount for t in db_txs) == 25 * 150
+
+
+def write_lhv_statement(path, rows):
+    """Writes rows of (date, receiver, description, amount) as an LHV debit statement."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "Kuupäev",
+                "Saaja/maksja nimi",
+                "Selgitus",
+                "Summa",
+                "Deebet/Kreedit (D/C)",
+            ]
+        )
+        for dt, receiver, desc, amount in rows:
+            writer.writerow([dt, receiver, desc, amount, "D"])
+
+
+def test_reimport_skips_known_rows(tmp_path):
+    """E2E: Re-importing the same or an overlapping statement does not duplicate rows."""
+    reset_db()
+    runner = CliRunner()
+
+    january = [
+        ("2024-01-05", "Coffee Shop", "Latte", "3.50"),
+        # Two identical purchases on the same day are both real expenses
+        ("2024-01-05", "Coffee Shop", "Latte", "3.50"),
+        ("2024-01-20", "Rimi", "Groceries", "42.10"),
+    ]
+    overlap = january[1:] + [("2024-02-01", "Rimi", "Groceries", "12.00")]
+
+    first = tmp_path / "january.csv"
+    second = tmp_path / "overlap.csv"
+    write_lhv_statement(first, january)
+    write_lhv_statement(second, overlap)
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(first)]
+    )
+    assert result.exit_code == 0
+    assert "Successfully imported 3 transactions" in result.stdout
+
+    # --full reads past the watermark, so deduplication is left to the fingerprints
+    result = runner.invoke(
+        app,
+        ["transactions", "import", "--bank", "lhv", "--file", str(first), "--full"],
+    )
+    assert result.exit_code == 0
+    assert "All 3 expenses in january.csv were already imported" in result.stdout
+
+    # The overlapping file restarts its ordinals, so only its second coffee is new
+    result = runner.invoke(
+        app,
+        ["transactions", "import", "--bank", "lhv", "--file", str(second), "--full"],
+    )
+    assert result.exit_code == 0
+    assert "Skipped 2 transactions" in result.stdout
+    assert "Successfully imported 1 transactions" in result.stdout
+
+    with Session(engine) as session:
+        db_txs = session.exec(select(Transaction)).all()
+        assert len(db_txs) == 4
+        assert len({t.fingerprint for t in db_txs}) == 4
+
+
+def test_import_watermark(tmp_path):
+    """E2E: Rows older than the last import are never read, and the boundary date stays correct."""
+    reset_db()
+    runner = CliRunner()
+
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    write_lhv_statement(
+        first,
+        [
+            ("2024-03-01", "Rimi", "Groceries", "20.00"),
+            ("2024-03-10", "Coffee Shop", "Latte", "3.50"),
+        ],
+    )
+    # Exported later: the boundary date gained a second coffee and an older row was amended
+    write_lhv_statement(
+        second,
+        [
+            ("2024-03-01", "Rimi", "Groceries (amended)", "20.00"),
+            ("2024-03-10", "Coffee Shop", "Latte", "3.50"),
+            ("2024-03-10", "Coffee Shop", "Latte", "3.50"),
+            ("2024-03-12", "Bolt", "Taxi", "8.00"),
+        ],
+    )
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(first)]
+    )
+    assert result.exit_code == 0
+
+    with Session(engine) as session:
+        watermark = session.get(ImportWatermark, "lhv")
+        assert watermark.last_date == date(2024, 3, 10)
+        assert len(watermark.boundary_fingerprints) == 1
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(second)]
+    )
+    assert result.exit_code == 0
+    assert "Skipped 1 transactions" in result.stdout
+    assert "1 expenses dated before 2024-03-10 were not imported" in result.stdout
+    assert "Use --full" in result.stdout
+    assert "Successfully imported 2 transactions" in result.stdout
+
+    with Session(engine) as session:
+        assert len(session.exec(select(Transaction)).all()) == 4
+        watermark = session.get(ImportWatermark, "lhv")
+        assert watermark.last_date == date(2024, 3, 12)
+
+    # --full reads the amended row the watermark skipped
+    result = runner.invoke(
+        app,
+        ["transactions", "import", "--bank", "lhv", "--file", str(second), "--full"],
+    )
+    assert result.exit_code == 0
+    assert "Successfully imported 1 transactions" in result.stdout
+
+    # Deleting the boundary rows invalidates the watermark, so the next import reads everything again
+    with Session(engine) as session:
+        for t in session.exec(
+            select(Transaction).where(Transaction.entry_date == date(2024, 3, 12))
+        ):
+            session.delete(t)
+        session.commit()
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(second)]
+    )
+    assert result.exit_code == 0
+    assert "were not imported" not in result.stdout
+    assert "Skipped 3 transactions" in result.stdout
+    assert "Successfully imported 1 transactions" in result.stdout
+
+
+def test_backfill_fingerprints(tmp_path):
+    """E2E: Rows imported before fingerprinting are matched after a backfill."""
+    reset_db()
+    runner = CliRunner()
+
+    with Session(engine) as session:
+        session.add(
+            Transaction(
+                amount=4210,
+                entry_date=date(2024, 1, 20),
+                receiver="Rimi",
+                description="Groceries",
+            )
+        )
+        # Added by hand, so from no bank at all
+        session.add(Transaction(amount=500, entry_date=date(2024, 1, 21)))
+        # From another bank's statements, outside the LHV statement's dates
+        session.add(
+            Transaction(
+                amount=990,
+                entry_date=date(2023, 6, 1),
+                receiver="Selver",
+                description="",
+            )
+        )
+        session.commit()
+
+    result = runner.invoke(
+        app,
+        ["db", "backfill-fingerprints", "--bank", "lhv", "--from", "2024-01-01"],
+    )
+    assert result.exit_code == 0
+    assert "Fingerprinted 1 transactions" in result.stdout
+
+    with Session(engine) as session:
+        unmatched = session.exec(
+            select(Transaction.amount).where(col(Transaction.fingerprint).is_(None))
+        ).all()
+        assert sorted(unmatched) == [500, 990]
+
+    csv_file = tmp_path / "statement.csv"
+    write_lhv_statement(csv_file, [("2024-01-20", "Rimi", "Groceries", "42.10")])
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(csv_file)]
+    )
+    assert result.exit_code == 0
+    assert "already imported" in result.stdout
+
+    result = runner.invoke(
+        app, ["db", "backfill-fingerprints", "--bank", "swedbank", "--to", "2023-12-31"]
+    )
+    assert "Fingerprinted 1 transactions" in result.stdout
+
+    result = runner.invoke(app, ["db", "backfill-fingerprints", "--bank", "lhv"])
+    assert "No imported transactions are left to fingerprint" in result.stdout
+
+
+def test_import_directory_of_statements(tmp_path):
+    """E2E: A directory of statements is parsed in parallel and saved in file order."""
+    reset_db()
+    runner = CliRunner()
+
+    statements = tmp_path / "statements"
+    statements.mkdir()
+    write_lhv_statement(
+        statements / "2024-01.csv", [("2024-01-10", "Rimi", "Groceries", "10.00")]
+    )
+    write_lhv_statement(
+        statements / "2024-02.csv",
+        [
+            ("2024-01-10", "Rimi", "Groceries", "10.00"),
+            ("2024-02-10", "Rimi", "Groceries", "20.00"),
+        ],
+    )
+    (statements / "notes.txt").write_text("not a statement")
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(statements)]
+    )
+
+    assert result.exit_code == 0
+    assert "Imported Files" in result.stdout
+    assert "2024-01.csv" in result.stdout
+    assert "2024-02.csv" in result.stdout
+    assert "Skipped 1 transactions" in result.stdout
+    assert "Successfully imported 2 transactions from 2 files" in result.stdout
+
+    with Session(engine) as session:
+        db_txs = session.exec(select(Transaction).order_by(Transaction.id)).all()
+        assert [t.amount for t in db_txs] == [1000, 2000]
+
+
+def test_import_detects_bank(tmp_path):
+    """E2E: Without --bank, each file's bank is recognized from its header and amounts."""
+    reset_db()
+    runner = CliRunner()
+
+    statements = tmp_path / "statements"
+    statements.mkdir()
+    write_lhv_statement(
+        statements / "lhv.csv", [("2024-05-02", "Rimi", "Groceries", "12.50")]
+    )
+    # SEB exports the same columns as LHV, but separated by semicolons and with decimal commas
+    (statements / "seb.csv").write_text(
+        "Kuupäev;Saaja/maksja nimi;Selgitus;Summa;Deebet/Kreedit (D/C)\n"
+        "03.05.2024;Selver;Groceries;7,25;D\n",
+        encoding="utf-8",
+    )
+    write_lhv_statement(
+        statements / "more.csv", [("2024-05-04", "Bolt", "Ride", "4.00")]
+    )
+
+    # Files from different banks are still saved in the order they were given
+    result = runner.invoke(
+        app,
+        [
+            "transactions",
+            "import",
+            "--file",
+            str(statements / "lhv.csv"),
+            "--file",
+            str(statements / "seb.csv"),
+            "--file",
+            str(statements / "more.csv"),
+        ],
+    )
+    assert result.exit_code == 0
+    assert "using lhv, seb importers" in result.stdout
+    assert "seb.csv (seb)" in result.stdout
+    assert "Successfully imported 3 transactions from 3 files" in result.stdout
+
+    with Session(engine) as session:
+        db_txs = session.exec(select(Transaction).order_by(Transaction.id)).all()
+        assert [(t.receiver, t.amount) for t in db_txs] == [
+            ("Rimi", 1250),
+            ("Selver", 725),
+            ("Bolt", 400),
+        ]
+
+    unknown = tmp_path / "unknown.csv"
+    unknown.write_text("Date,Payee,Value\n2024-05-04,Bolt,8.00\n", encoding="utf-8")
+    result = runner.invoke(app, ["transactions", "import", "--file", str(unknown)])
+    assert result.exit_code == 1
+    assert "Could not detect the bank of unknown.csv" in result.stdout
+
+
+def test_self_transfers_are_flagged(tmp_path, monkeypatch):
+    """E2E: Transfers to the user are flagged on import and update, and re-flagged in bulk."""
+    reset_db()
+    runner = CliRunner()
+    monkeypatch.setattr(budy_settings, "first_name", "Jane")
+    monkeypatch.setattr(budy_settings, "last_name", "Doe")
+
+    statement = tmp_path / "statement.csv"
+    write_lhv_statement(
+        statement,
+        [
+            ("2024-06-01", " JANE DOE ", "Savings", "100.00"),
+            ("2024-06-01", "J. Doe", "Savings", "50.00"),
+            ("2024-06-02", "John Smith", "Rent", "500.00"),
+        ],
+    )
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(statement)]
+    )
+    assert result.exit_code == 0
+
+    def flags():
+        with Session(engine) as session:
+            return {
+                t.receiver.strip(): t.is_self for t in session.exec(select(Transaction))
+            }
+
+    assert flags() == {"JANE DOE": True, "J. Doe": True, "John Smith": False}
+
+    with Session(engine) as session:
+        rent_id = session.exec(
+            select(Transaction.id).where(Transaction.receiver == "John Smith")
+        ).one()
+    result = runner.invoke(
+        app, ["transactions", "update", str(rent_id), "--receiver", "J Doe"]
+    )
+    assert result.exit_code == 0
+    assert flags()["J Doe"] is True
+
+    monkeypatch.setattr(budy_settings, "last_name", "Roe")
+    result = runner.invoke(app, ["db", "refresh-self-transfers"])
+    assert result.exit_code == 0
+    assert "Flagged 0 transactions" in result.stdout
+    assert not any(flags().values())
+
+
+def test_import_missing_file_fails(tmp_path):
+    """E2E: Paths that do not exist or match nothing are reported before parsing."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        app,
+        ["transactions", "import", "--bank", "lhv", "--file", str(tmp_path / "*.csv")],
+    )
+    assert result.exit_code == 1
+    assert "No files match" in result.stdout
+
+
+def test_import_with_explicit_schema(tmp_path):
+    """E2E: The SEB profile parses its day-first dates and decimal commas without inference."""
+    reset_db()
+    runner = CliRunner()
+
+    csv_file = tmp_path / "seb.csv"
+    csv_file.write_text(
+        "Kuupäev;Saaja/maksja nimi;Selgitus;Summa;Deebet/Kreedit (D/C)\n"
+        "03.02.2024;Rimi;Groceries;12,50;D\n"
+        "13.02.2024;Bolt;Ride;7,05;D\n",
+        encoding="utf-8",
+    )
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "seb", "--file", str(csv_file)]
+    )
+    assert result.exit_code == 0
+
+    with Session(engine) as session:
+        db_txs = session.exec(select(Transaction).order_by(Transaction.id)).all()
+        assert [(t.entry_date, t.amount) for t in db_txs] == [
+            (date(2024, 2, 3), 1250),
+            (date(2024, 2, 13), 705),
+        ]
+
+
+def test_import_rejects_mismatched_date_format(tmp_path):
+    """E2E: Dates that do not match the bank's date format fail the import instead of being dropped."""
+    reset_db()
+    runner = CliRunner()
+
+    csv_file = tmp_path / "lhv.csv"
+    write_lhv_statement(csv_file, [("05.01.2024", "Rimi", "Groceries", "12.50")])
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(csv_file)]
+    )
+    assert result.exit_code == 1
+    assert "Could not read lhv.csv" in result.stdout
+    assert "05.01.2024" in result.stdout
+    assert "No valid expenses found" not in result.stdout
+
+    # Parsed in a worker process, the error is reported the same way
+    write_lhv_statement(
+        tmp_path / "other.csv", [("2024-01-06", "Bolt", "Ride", "4.00")]
+    )
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(tmp_path)]
+    )
+    assert result.exit_code == 1
+    assert "Could not read lhv.csv" in result.stdout
+
+    with Session(engine) as session:
+        assert not session.exec(select(Transaction)).all()
+
+
+def test_fingerprint_ordinals_only_remember_one_date(tmp_path, monkeypatch):
+    """Identical rows are numbered per date, so memory is bounded by the rows of one date."""
+    from budy.services import transaction
+
+    reset_db()
+    sizes = []
+    fingerprint = transaction._fingerprint
+
+    def recording_fingerprint(*, row, bank, seen):
+        result = fingerprint(row=row, bank=bank, seen=seen)
+        sizes.append(sum(len(counts) for counts in seen.values()))
+        return result
+
+    monkeypatch.setattr(transaction, "_fingerprint", recording_fingerprint)
+
+    # 60 dates of three rows each, two of them identical
+    rows = [
+        (f"2024-{month:02}-{day:02}", receiver, "Card", "5.00")
+        for month in (3, 4)
+        for day in range(1, 31)
+        for receiver in ("Rimi", "Rimi", "Bolt")
+    ]
+    statement = tmp_path / "statement.csv"
+    write_lhv_statement(statement, rows)
+
+    with Session(engine) as session:
+        result = transaction.import_transactions(
+            session=session,
+            bank_name="lhv",
+            file_path=statement,
+            dry_run=False,
+            batch_size=7,
+        )
+    assert result.count == 180
+    assert max(sizes) == 2
+
+
+def test_import_statement_not_grouped_by_date(tmp_path):
+    """E2E: Identical rows are told apart even when their date recurs later in the file."""
+    reset_db()
+    runner = CliRunner()
+
+    statement = tmp_path / "statement.csv"
+    write_lhv_statement(
+        statement,
+        [
+            ("2024-03-01", "Coffee Shop", "Latte", "3.50"),
+            ("2024-03-02", "Rimi", "Groceries", "20.00"),
+            ("2024-03-01", "Coffee Shop", "Latte", "3.50"),
+        ],
+    )
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(statement)]
+    )
+    assert result.exit_code == 0
+    assert "Successfully imported 3 transactions" in result.stdout
+
+    result = runner.invoke(
+        app,
+        ["transactions", "import", "--bank", "lhv", "--file", str(statement), "--full"],
+    )
+    assert "All 3 expenses in statement.csv were already imported" in result.stdout
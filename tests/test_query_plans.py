@@ -0,0 +1,277 @@
+"""
+Query plan regression suite: every statement a service runs is captured and explained with
+EXPLAIN QUERY PLAN, and fails the test if it reads the whole of a table that grows with the ledger,
+whether directly or by walking one of its indexes from end to end.
+"""
+
+import csv
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+from budy.database import engine
+from budy.schemas import (
+    Budget,
+    Category,
+    CategoryRule,
+    PageCursor,
+    QueryPlanStep,
+    Transaction,
+    VolatilityGrouping,
+)
+from budy.services import budget, category, report, transaction
+from budy.services.snapshot import read_ledger
+
+# Small tables, e.g. categories or the single data_version row, are cheaper to scan than to search.
+GROWING_TABLES = {"transaction", "monthly_totals", "budget"}
+
+SERVICE_CALLS = {
+    "monthly report": lambda session, _: report.generate_monthly_report_data(
+        session=session, target_month=3, target_year=2024
+    ),
+    "yearly report": lambda session, _: report.get_multi_year_report_data(
+        session=session, start_year=2023, end_year=2024
+    ),
+    "payees": lambda session, _: report.get_top_payees(
+        session=session, year=None, limit=5
+    ),
+    "payees of a year": lambda session, _: report.get_top_payees(
+        session=session, year=2024, limit=5, by_count=True
+    ),
+    "volatility": lambda session, _: report.get_volatility_report_data(
+        session=session, year=None
+    ),
+    "volatility of a year": lambda session, _: report.get_volatility_report_data(
+        session=session, year=2024
+    ),
+    "category volatility": lambda session, _: report.get_group_volatility_report_data(
+        session=session, year=2024, by=VolatilityGrouping.category, min_samples=2
+    ),
+    "payee volatility": lambda session, _: report.get_group_volatility_report_data(
+        session=session, year=None, by=VolatilityGrouping.payee, min_samples=2
+    ),
+    "weekdays": lambda session, _: report.get_weekday_report_data(session=session),
+    "weekdays of a range": lambda session, _: report.get_weekday_report_data(
+        session=session, start_date=date(2024, 2, 1), end_date=date(2024, 3, 31)
+    ),
+    "budget": lambda session, _: budget.upsert_budget(
+        session=session, amount=500, target_month=3, target_year=2024
+    ),
+    "budgets of a year": lambda session, _: budget.get_budgets(
+        session=session, target_year=2024, offset=0, limit=12
+    ),
+    "budget suggestions": lambda session, _: budget.save_budget_suggestions(
+        session=session,
+        suggestions=budget.generate_budgets_suggestions(
+            session=session, target_years=[2025], force=True
+        ),
+    ),
+    "rules": lambda session, _: category.get_rules(session=session),
+    "apply rules": lambda session, _: category.apply_rules(
+        session=session, only_uncategorized=True, year=2024, dry_run=False
+    ),
+    "apply all rules": lambda session, _: category.apply_rules(
+        session=session, only_uncategorized=False, year=None, dry_run=False
+    ),
+    "delete category": lambda session, _: category.delete_category(
+        session=session, category_id=2
+    ),
+    "history": lambda session, _: transaction.get_transactions(
+        session=session, offset=0, limit=7
+    ),
+    "history after a cursor": lambda session, _: transaction.get_transactions(
+        session=session,
+        offset=0,
+        limit=7,
+        after=PageCursor(entry_date=date(2024, 3, 1), id=0),
+    ),
+    "history's last page": lambda session, _: transaction.get_transactions(
+        session=session,
+        offset=0,
+        limit=7,
+        after=PageCursor(entry_date=date(2023, 11, 9), id=3),
+    ),
+    "add": lambda session, _: transaction.create_transaction(
+        session=session, amount=Decimal("12.00"), entry_date=date(2024, 3, 2)
+    ),
+    "update": lambda session, _: transaction.update_transaction(
+        session=session, transaction_id=1, amount=9.5, receiver="Selver"
+    ),
+    "delete": lambda session, _: transaction.delete_transaction(
+        session=session, transaction_id=1
+    ),
+    "import": lambda session, statement: transaction.import_transactions(
+        session=session, bank_name="lhv", file_path=statement, dry_run=False
+    ),
+    "backfill fingerprints": lambda session, _: transaction.backfill_fingerprints(
+        session=session, bank_name="lhv"
+    ),
+    "search": lambda session, _: transaction.search_transactions(
+        session=session,
+        query="rim* ke",
+        limit=5,
+        after=PageCursor(entry_date=date(2024, 3, 1), id=9, rank=-1.0),
+    ),
+    "search first page": lambda session, _: transaction.search_transactions(
+        session=session, query="rimi", limit=5
+    ),
+    "search short terms": lambda session, _: transaction.search_transactions(
+        session=session, query="ke bo*", limit=5
+    ),
+    "search short terms after a cursor": lambda session, _: (
+        transaction.search_transactions(
+            session=session,
+            query="se",
+            limit=5,
+            after=PageCursor(entry_date=date(2024, 3, 1), id=9),
+        )
+    ),
+    "query by date and amount": lambda session, _: transaction.query_transactions(
+        session=session, expression="date:2024-02..2024-03 amount:>10", limit=5
+    ),
+    "query by category": lambda session, _: transaction.query_transactions(
+        session=session, expression="category:Food date:2024", limit=5
+    ),
+    "query uncategorized": lambda session, _: transaction.query_transactions(
+        session=session, expression="is:uncategorized", limit=5
+    ),
+    "query everything": lambda session, _: transaction.query_transactions(
+        session=session, expression="", limit=5
+    ),
+    "query by payee": lambda session, _: transaction.query_transactions(
+        session=session,
+        expression="payee:rimi -is:self",
+        limit=5,
+        after=PageCursor(entry_date=date(2024, 3, 1), id=9),
+    ),
+    "ledger snapshot update": lambda session, _: read_ledger(
+        session=session, after_id=20
+    ),
+}
+
+# The only whole-table reads allowed, by service call. Each is the cheapest possible plan for its query.
+EXPECTED_SCANS = {
+    # All-time reports aggregate every transaction, from the narrowest index that covers them
+    "payees": {"SCAN transaction USING COVERING INDEX ix_transaction_receiver_amount"},
+    "volatility": {
+        "SCAN transaction USING COVERING INDEX ix_transaction_receiver_amount"
+    },
+    "payee volatility": {
+        "SCAN transaction USING COVERING INDEX ix_transaction_receiver_amount"
+    },
+    "weekdays": {
+        "SCAN transaction USING COVERING INDEX ix_transaction_receiver_amount"
+    },
+    # Newest first, so these walks stop once the page's LIMIT of matching rows is found
+    "query uncategorized": {"SCAN transaction USING INDEX ix_transaction_entry_date"},
+    "query everything": {"SCAN transaction USING INDEX ix_transaction_entry_date"},
+    "search short terms": {"SCAN transaction USING INDEX ix_transaction_entry_date"},
+}
+
+# These rebuild or export derived data from every transaction, so they read the whole table by design:
+# report.rebuild_monthly_totals, transaction.refresh_self_transfers, transaction.rebuild_search_index,
+# export.export_transactions and snapshot.read_ledger without after_id.
+
+
+@pytest.fixture(name="ledger")
+def ledger_fixture(session, tmp_path):
+    """Fills the database with a little of everything, and returns a statement file to import."""
+    food = Category(name="Food")
+    transport = Category(name="Transport")
+    session.add_all([food, transport])
+    session.commit()
+
+    session.add(CategoryRule(pattern="bolt", category_id=transport.id))
+    session.add_all(
+        Budget(amount=40000, target_month=month, target_year=2024)
+        for month in range(1, 4)
+    )
+    receivers = ["Rimi Kesklinn", "Bolt", "Selver", "Savings"]
+    session.add_all(
+        Transaction(
+            amount=500 + 137 * i,
+            entry_date=date(2023, 11, 1) + timedelta(days=4 * i),
+            receiver=receivers[i % 4],
+            description=f"Card payment {i}",
+            category_id=food.id if i % 4 == 0 else None,
+            is_self=i % 4 == 3,
+        )
+        for i in range(40)
+    )
+    session.commit()
+
+    statement = tmp_path / "statement.csv"
+    with open(statement, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "Kuupäev",
+                "Saaja/maksja nimi",
+                "Selgitus",
+                "Summa",
+                "Deebet/Kreedit (D/C)",
+            ]
+        )
+        writer.writerow(["2024-04-02", "Rimi", "Groceries", "12.50", "D"])
+    return statement
+
+
+@contextmanager
+def captured_statements():
+    """Collects the SQL and parameters of every statement executed on the engine."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # An executemany gets a list of parameter sets, which all share one plan
+        if isinstance(parameters, list):
+            parameters = parameters[0]
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def table_scans(session: Session, statement: str, parameters) -> list[str]:
+    """Returns the steps of a statement's plan that read a whole growing table."""
+    plan = session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    )
+    steps = [
+        QueryPlanStep(id=step_id, parent=parent, detail=detail)
+        for step_id, parent, _, detail in plan
+    ]
+    return [
+        step.detail
+        for step in steps
+        if step.full_scan and step.detail.split()[1] in GROWING_TABLES
+    ]
+
+
+@pytest.mark.parametrize("name", SERVICE_CALLS)
+def test_service_queries_use_indexes(session, ledger, name):
+    """No statement run by a service scans a table that grows with the ledger, unless expected."""
+    with captured_statements() as statements:
+        SERVICE_CALLS[name](session, ledger)
+
+    assert statements
+    expected = EXPECTED_SCANS.get(name, set())
+    scans = {
+        statement: scans
+        for statement, parameters in statements
+        if (scans := table_scans(session, statement, parameters))
+    }
+    unexpected = {
+        statement: leftover
+        for statement, found in scans.items()
+        if (leftover := [scan for scan in found if scan not in expected])
+    }
+    assert not unexpected, f"{name} scans whole tables: {unexpected}"
+    # An expected scan that no longer happens is dropped from EXPECTED_SCANS
+    assert expected <= {scan for found in scans.values() for scan in found}
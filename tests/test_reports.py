@@ -3,13 +3,13 @@ from decimal import Decimal
 
 from hypothesis import given
 from hypothesis import strategies as st
-from sqlmodel import Session, SQLModel
+from sqlmodel import Session, SQLModel, select
 from typer.testing import CliRunner
 
 from budy import app
 from budy.config import settings as app_settings
 from budy.database import engine
-from budy.schemas import Budget, Transaction
+from budy.schemas import Budget, MonthlyTotals, Transaction
 
 
 def reset_db():
@@ -46,3 +46,157 @@ def test_monthly_report_calculation(year, month, budget_amount, tx_amount):
     assert f"{app_settings.currency_symbol}{budget_amount:,.0f}" in result.stdout
     expected_spent = f"{app_settings.currency_symbol}{tx_amount:,.0f}"
     assert expected_spent in result.stdout
+
+
+def test_multi_year_report():
+    """E2E: The yearly report covers a range of years, leaving out self-transfers."""
+    reset_db()
+    runner = CliRunner()
+
+    with Session(engine) as session:
+        session.add(Budget(target_year=2023, target_month=3, amount=80000))
+        session.add(Transaction(entry_date=date(2023, 3, 10), amount=12300))
+        session.add(Transaction(entry_date=date(2023, 3, 31), amount=4500))
+        session.add(Transaction(entry_date=date(2024, 11, 1), amount=99900))
+        session.add(
+            Transaction(entry_date=date(2024, 11, 2), amount=500000, is_self=True)
+        )
+        # Outside the range
+        session.add(Transaction(entry_date=date(2025, 1, 1), amount=777700))
+        session.commit()
+
+    result = runner.invoke(app, ["reports", "year", "--years", "2023-2024"])
+
+    assert result.exit_code == 0
+    assert "Yearly Overview: 2023" in result.stdout
+    assert "Yearly Overview: 2024" in result.stdout
+    assert "Yearly Overview: 2025" not in result.stdout
+    symbol = app_settings.currency_symbol
+    assert f"{symbol}800" in result.stdout
+    assert f"{symbol}168" in result.stdout
+    assert f"{symbol}999" in result.stdout
+    assert f"{symbol}5,999" not in result.stdout
+    assert f"{symbol}7,777" not in result.stdout
+
+    result = runner.invoke(app, ["reports", "year", "--years", "2024-2023"])
+    assert result.exit_code == 2
+
+
+def test_monthly_totals_follow_changes():
+    """E2E: The monthly rollup tracks added, moved and deleted transactions, and can be rebuilt."""
+    reset_db()
+    runner = CliRunner()
+
+    def totals():
+        with Session(engine) as session:
+            return {
+                (row.year, row.month): (row.total, row.count)
+                for row in session.exec(select(MonthlyTotals))
+            }
+
+    for day in ("2024-01-05", "2024-01-20"):
+        result = runner.invoke(
+            app, ["transactions", "add", "--amount", "10", "--date", day]
+        )
+        assert result.exit_code == 0
+    assert totals() == {(2024, 1): (2000, 2)}
+
+    with Session(engine) as session:
+        first_id, second_id = session.exec(select(Transaction.id)).all()
+
+    result = runner.invoke(
+        app,
+        ["transactions", "update", str(first_id), "--date", "2024-02-01"],
+    )
+    assert result.exit_code == 0
+    assert totals() == {(2024, 1): (1000, 1), (2024, 2): (1000, 1)}
+
+    result = runner.invoke(app, ["transactions", "delete", str(second_id), "--force"])
+    assert result.exit_code == 0
+    assert totals() == {(2024, 2): (1000, 1)}
+
+    result = runner.invoke(app, ["db", "rebuild-rollups"])
+    assert result.exit_code == 0
+    assert "Rebuilt 1 monthly totals" in result.stdout
+    assert totals() == {(2024, 2): (1000, 1)}
+
+
+def test_report_cache(tmp_path, monkeypatch):
+    """Cached reports are reused until the data changes, and old entries are evicted."""
+    from sqlmodel import create_engine
+
+    from budy.services import cache
+    from budy.services.report import get_top_payees
+    from budy.services.transaction import create_transaction
+
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+    file_engine = create_engine(f"sqlite:///{tmp_path / 'budy.db'}")
+    SQLModel.metadata.create_all(file_engine)
+
+    computed = []
+
+    def payees(session, limit=10, use_cache=True):
+        def compute():
+            computed.append(limit)
+            return get_top_payees(session=session, year=None, limit=limit)
+
+        return cache.cached_report(
+            session=session,
+            name="payees",
+            params={"limit": limit},
+            compute=compute,
+            use_cache=use_cache,
+        )
+
+    with Session(file_engine) as session:
+        create_transaction(session=session, amount=Decimal("10.00"))
+        first = payees(session)
+        assert payees(session) == first
+        assert len(computed) == 1
+
+        assert payees(session, use_cache=False) == first
+        assert len(computed) == 2
+
+        # Any write bumps the data version, so the next report is recomputed
+        create_transaction(session=session, amount=Decimal("5.00"))
+        assert payees(session)[0].count == 2
+        assert len(computed) == 3
+
+    # A recreated database gets a new epoch and never sees the old results
+    SQLModel.metadata.drop_all(file_engine)
+    SQLModel.metadata.create_all(file_engine)
+    with Session(file_engine) as session:
+        assert payees(session) == []
+        assert len(computed) == 4
+
+        monkeypatch.setattr(app_settings, "report_cache_entries", 2)
+        for limit in (1, 2, 3):
+            payees(session, limit=limit)
+        assert len(list((tmp_path / "cache").glob("*.pickle"))) == 2
+
+        # The least recently used entry was evicted
+        computed.clear()
+        payees(session, limit=2)
+        payees(session, limit=3)
+        assert computed == []
+        payees(session, limit=1)
+        assert computed == [1]
+
+        # A truncated entry is recomputed and overwritten
+        for entry in (tmp_path / "cache").glob("*.pickle"):
+            entry.write_bytes(b"")
+        computed.clear()
+        payees(session, limit=1)
+        assert computed == [1]
+        payees(session, limit=1)
+        assert computed == [1]
+
+        # So is an entry that refers to a class or module an upgrade removed
+        for missing in (b"cbudy.schemas\nMissing\n.", b"cbudy.removed\nReport\n."):
+            for entry in (tmp_path / "cache").glob("*.pickle"):
+                entry.write_bytes(missing)
+            computed.clear()
+            payees(session, limit=1)
+            assert computed == [1]
+            payees(session, limit=1)
+            assert computed == [1]
@@ -1,13 +1,20 @@
+import statistics
 from datetime import date, timedelta
 
 from hypothesis import given
 from hypothesis import strategies as st
+from sqlalchemy import text
 from sqlmodel import Session, SQLModel
 from typer.testing import CliRunner
 
 from budy import app
 from budy.database import engine
-from budy.schemas import Transaction
+from budy.schemas import Budget, Category, Transaction
+from budy.services.transaction import (
+    delete_transaction,
+    search_transactions,
+    update_transaction,
+)
 
 runner = CliRunner()
 
@@ -81,6 +88,44 @@ def test_payee_ranking():
     assert result.stdout.find("Big Spender") < result.stdout.find("Little Spender")
 
 
+def test_payee_ranking_aggregates_in_sql():
+    """E2E: Payee totals merge receivers with surrounding whitespace, exclude self-transfers and honor the limit."""
+    reset_db()
+
+    with Session(engine) as session:
+        for receiver, amount in [
+            ("Rimi", 1000),
+            (" Rimi ", 2000),
+            ("Rimi\t", 600),
+            ("\u00a0Rimi\r\n", 400),
+            ("J. Doe", 90000),
+            (None, 300),
+            ("Bolt", 700),
+        ]:
+            session.add(
+                Transaction(
+                    amount=amount,
+                    entry_date=date.today(),
+                    receiver=receiver,
+                    is_self=receiver == "J. Doe",
+                )
+            )
+        session.commit()
+
+    result = runner.invoke(app, ["reports", "payees", "--limit", "2"])
+
+    assert result.exit_code == 0
+    rows = [
+        [cell.strip() for cell in line.split("│") if cell.strip()]
+        for line in result.stdout.splitlines()
+        if "#" in line
+    ]
+    assert rows == [
+        ["#1", "Rimi", "4", "$40.00", "$10.00"],
+        ["#2", "Bolt", "1", "$7.00", "$7.00"],
+    ]
+
+
 def test_weekday_report_structure():
     """E2E: Weekday report runs without errors on valid data."""
     reset_db()
@@ -119,3 +164,294 @@ def test_volatility_report_outliers():
     assert result.exit_code == 0
     assert "Huge Purchase" in result.stdout
     assert "Volatility Analysis" in result.stdout
+
+
+@given(
+    amounts=st.lists(
+        st.integers(min_value=1, max_value=10_000_000), min_size=10, max_size=40
+    )
+)
+def test_volatility_statistics_match_exact(amounts):
+    """Property: Mean and stdev from SQL aggregates match the exact statistics module."""
+    reset_db()
+
+    with Session(engine) as session:
+        session.add_all(
+            Transaction(amount=amount, entry_date=date(2024, 1, 1))
+            for amount in amounts
+        )
+        session.commit()
+
+    result = runner.invoke(app, ["reports", "volatility", "--year", "2024"])
+
+    assert result.exit_code == 0
+    assert f"{statistics.mean(amounts) / 100:,.2f}" in result.stdout
+    assert f"{statistics.stdev(amounts) / 100:,.2f}" in result.stdout
+
+
+def test_volatility_by_group():
+    """E2E: Outliers are judged within their own category or payee, not against all spending."""
+    reset_db()
+
+    with Session(engine) as session:
+        rent = Category(name="Rent")
+        groceries = Category(name="Groceries")
+        session.add_all([rent, groceries])
+        session.flush()
+
+        for month in range(1, 13):
+            session.add(
+                Transaction(
+                    amount=100000,
+                    entry_date=date(2024, month, 1),
+                    receiver="Landlord",
+                    category_id=rent.id,
+                )
+            )
+            session.add(
+                Transaction(
+                    amount=5000 + month * 100,
+                    entry_date=date(2024, month, 10),
+                    receiver="Rimi",
+                    category_id=groceries.id,
+                )
+            )
+        session.add(
+            Transaction(
+                amount=40000,
+                entry_date=date(2024, 6, 20),
+                receiver="Rimi",
+                description="Strange bill",
+                category_id=groceries.id,
+            )
+        )
+        session.commit()
+
+    for by, group in (("category", "Groceries"), ("payee", "Rimi")):
+        result = runner.invoke(app, ["reports", "volatility", "--by", by])
+
+        assert result.exit_code == 0
+        assert f"Outliers by {by.capitalize()}" in result.stdout
+        assert "within 2 groups (25 transactions)" in result.stdout
+        assert group in result.stdout
+        assert "$400.00" in result.stdout
+        # Rent never varies, so it is never unusual
+        assert "$1,000.00" not in result.stdout
+
+    result = runner.invoke(
+        app, ["reports", "volatility", "--by", "payee", "--min-samples", "13"]
+    )
+    assert result.exit_code == 0
+    assert "Rimi" in result.stdout
+    assert "Landlord" not in result.stdout
+    assert "within 1 group (13 transactions)" in result.stdout
+
+    result = runner.invoke(
+        app, ["reports", "volatility", "--by", "payee", "--min-samples", "20"]
+    )
+    assert result.exit_code == 0
+    assert "No payee has at least 20 transactions" in result.stdout
+
+
+def test_weekday_report_filters():
+    """E2E: Weekday totals are bucketed Monday-first and honor the year and date range."""
+    reset_db()
+
+    with Session(engine) as session:
+        for day, amount, is_self in [
+            (date(2024, 1, 1), 1000, False),  # Monday
+            (date(2024, 1, 8), 3000, False),  # Monday
+            (date(2024, 1, 7), 500, False),  # Sunday
+            (date(2024, 1, 3), 7000, True),  # Wednesday, to oneself
+            (date(2023, 12, 31), 9900, False),  # Sunday, previous year
+        ]:
+            session.add(Transaction(amount=amount, entry_date=day, is_self=is_self))
+        session.commit()
+
+    def weekdays(*args):
+        result = runner.invoke(app, ["reports", "weekday", *args])
+        assert result.exit_code == 0
+        return {
+            cells[0]: cells[1:]
+            for line in result.stdout.splitlines()
+            if (cells := [c.strip() for c in line.split("│") if c.strip()])
+            and cells[0].endswith("day")
+        }
+
+    days = weekdays("--year", "2024")
+    assert list(days) == [
+        "Monday",
+        "Tuesday",
+        "Wednesday",
+        "Thursday",
+        "Friday",
+        "Saturday",
+        "Sunday",
+    ]
+    assert days["Monday"] == ["$20.00", "2", "$40.00"]
+    assert days["Wednesday"] == ["-", "0", "-"]
+    assert days["Sunday"] == ["$5.00", "1", "$5.00"]
+
+    days = weekdays("--from", "2024-01-02", "--to", "2024-01-07")
+    assert days["Monday"] == ["-", "0", "-"]
+    assert days["Sunday"] == ["$5.00", "1", "$5.00"]
+
+    result = runner.invoke(app, ["reports", "weekday", "--year", "2022"])
+    assert "No transactions found to analyze" in result.stdout
+
+
+def test_polars_engine_matches_sql():
+    """E2E: Every report reads the same whichever engine computes it."""
+    reset_db()
+
+    with Session(engine) as session:
+        groceries = Category(name="Groceries")
+        session.add(groceries)
+        session.commit()
+
+        start = date(2024, 1, 1)
+        for i in range(300):
+            session.add(
+                Transaction(
+                    # Distinct amounts, so outliers are never tied
+                    amount=1000 + (i * 37) % 5000 + i,
+                    entry_date=start + timedelta(days=i * 2),
+                    receiver=[
+                        " Shop ",
+                        "Shop",
+                        "Cafe",
+                        None,
+                        "",
+                        "Shop\t",
+                        "\u00a0Cafe",
+                    ][i % 7],
+                    category_id=groceries.id if i % 3 else None,
+                )
+            )
+        session.add(
+            Transaction(amount=90000, entry_date=date(2024, 6, 5), receiver="Cafe")
+        )
+        session.add(
+            Transaction(
+                amount=50000, entry_date=date(2024, 6, 6), receiver="Me", is_self=True
+            )
+        )
+        session.add(Budget(amount=100000, target_month=6, target_year=2024))
+        session.commit()
+
+    for command in (
+        ["month", "--month", "6", "--year", "2024"],
+        ["year", "--years", "2024-2025"],
+        ["payees", "--year", "2024"],
+        ["payees", "--by-count"],
+        ["volatility"],
+        ["volatility", "--by", "category"],
+        ["volatility", "--by", "payee", "--year", "2024"],
+        ["weekday", "--from", "2024-03-01"],
+    ):
+        sql = runner.invoke(app, ["reports", *command, "--engine", "sql"])
+        polars = runner.invoke(app, ["reports", *command, "--engine", "polars"])
+
+        assert sql.exit_code == 0, command
+        assert polars.stdout == sql.stdout, command
+
+
+def test_search_uses_full_text_index():
+    """E2E: Search matches every term, supports word prefixes and follows edits."""
+    reset_db()
+
+    with Session(engine) as session:
+        for receiver, description in [
+            ("Coffee Corner", "Latte"),
+            ("Bookshop", "Coffee table book"),
+            ("Corner Shop", "Milk"),
+            ("Cinema", "Popcorn"),
+            ("Roastery", "Coffee beans, coffee filters"),
+        ]:
+            session.add(
+                Transaction(
+                    amount=500,
+                    entry_date=date(2024, 1, 1),
+                    receiver=receiver,
+                    description=description,
+                )
+            )
+        session.commit()
+
+    def search(query):
+        result = runner.invoke(app, ["reports", "search", query])
+        assert result.exit_code == 0
+        return {
+            name
+            for name in [
+                "Coffee Corner",
+                "Bookshop",
+                "Corner Shop",
+                "Cinema",
+                "Roastery",
+            ]
+            if name in result.stdout
+        }
+
+    assert search("coffee corner") == {"Coffee Corner"}
+    assert search("corn") == {"Coffee Corner", "Corner Shop", "Cinema"}
+    assert search("corn*") == {"Coffee Corner", "Corner Shop"}
+    assert search("mi") == {"Corner Shop"}
+
+    # Ranked best first: the roastery mentions coffee the most
+    with Session(engine) as session:
+        page = search_transactions(session=session, query="coffee", limit=10)
+        assert page.results[0].receiver == "Roastery"
+
+        update_transaction(session=session, transaction_id=4, description="Snacks")
+        delete_transaction(session=session, transaction_id=3)
+    assert search("corn") == {"Coffee Corner"}
+
+    with Session(engine) as session:
+        session.execute(
+            text("INSERT INTO transaction_fts (transaction_fts) VALUES ('delete-all')")
+        )
+        session.commit()
+    assert search("coffee") == set()
+
+    result = runner.invoke(app, ["db", "rebuild-search"])
+    assert result.exit_code == 0
+    assert "Indexed 4 transactions" in result.stdout
+    assert search("coffee") == {"Coffee Corner", "Bookshop", "Roastery"}
+
+
+def test_search_pages_with_cursor():
+    """Search pages continue where the previous one ended, ranked or not."""
+    reset_db()
+
+    with Session(engine) as session:
+        for i in range(25):
+            session.add(
+                Transaction(
+                    amount=100 + i,
+                    entry_date=date(2024, 1, 1) + timedelta(days=i % 4),
+                    receiver="Tea House",
+                    # Uneven term counts give the results different ranks
+                    description="tea " * (i % 3),
+                )
+            )
+        session.commit()
+
+        for query in ("tea", "ea"):
+            seen, after = [], None
+            while True:
+                page = search_transactions(
+                    session=session, query=query, limit=4, after=after
+                )
+                seen += [transaction.id for transaction in page.results]
+                after = page.next_cursor
+                if not after:
+                    break
+
+            assert sorted(seen) == list(range(1, 26)), query
+            assert seen == [
+                t.id
+                for t in search_transactions(
+                    session=session, query=query, limit=25
+                ).results
+            ]
@@ -1,9 +1,10 @@
 import csv
+from datetime import date
 from typer.testing import CliRunner
 from sqlmodel import Session, SQLModel, select
 from budy import app
 from budy.database import engine
-from budy.schemas import Category, Transaction
+from budy.schemas import Category, CategoryRule, Transaction
 
 runner = CliRunner()
 
@@ -106,3 +107,198 @@ def test_rule_management():
     with Session(engine) as session:
         rules = session.exec(select(CategoryRule)).all()
         assert len(rules) == 0
+
+
+def test_rule_priority_and_cache_invalidation(tmp_path):
+    reset_db()
+
+    with Session(engine) as session:
+        streaming = Category(name="Streaming")
+        shopping = Category(name="Shopping")
+        session.add(streaming)
+        session.add(shopping)
+        session.commit()
+        streaming_id, shopping_id = streaming.id, shopping.id
+
+    # The earlier rule wins even though "store" appears first in the text
+    runner.invoke(
+        app, ["categories", "rules", "add", "netflix", "-c", str(streaming_id)]
+    )
+    runner.invoke(app, ["categories", "rules", "add", "store", "-c", str(shopping_id)])
+
+    header = [
+        "Kuupäev",
+        "Saaja/maksja nimi",
+        "Selgitus",
+        "Summa",
+        "Deebet/Kreedit (D/C)",
+    ]
+
+    def import_row(receiver, description, amount):
+        csv_file = tmp_path / f"{amount}.csv"
+        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerow(["2023-01-01", receiver, description, amount, "D"])
+        result = runner.invoke(
+            app, ["transactions", "import", "--bank", "lhv", "--file", str(csv_file)]
+        )
+        assert result.exit_code == 0
+
+    import_row("App Store", "NETFLIX.COM", "15.00")
+
+    # Deleting the first rule must invalidate the compiled matcher
+    with Session(engine) as session:
+        netflix_rule = session.exec(
+            select(CategoryRule).where(CategoryRule.pattern == "netflix")
+        ).one()
+    runner.invoke(
+        app, ["categories", "rules", "delete", str(netflix_rule.id), "--force"]
+    )
+
+    import_row("App Store", "NETFLIX.COM", "16.00")
+
+    with Session(engine) as session:
+        first = session.exec(
+            select(Transaction).where(Transaction.amount == 1500)
+        ).one()
+        second = session.exec(
+            select(Transaction).where(Transaction.amount == 1600)
+        ).one()
+        assert first.category_id == streaming_id
+        assert second.category_id == shopping_id
+
+
+def test_apply_rules_to_history():
+    reset_db()
+
+    with Session(engine) as session:
+        food = Category(name="Food")
+        fun = Category(name="Fun")
+        session.add(food)
+        session.add(fun)
+        session.commit()
+        food_id, fun_id = food.id, fun.id
+
+        session.add(
+            Transaction(amount=100, entry_date=date(2023, 1, 1), receiver="RIMI")
+        )
+        session.add(
+            Transaction(
+                amount=200,
+                entry_date=date(2023, 1, 2),
+                receiver="ÕUNAPUU KOHVIK",
+                category_id=fun_id,
+            )
+        )
+        session.add(
+            Transaction(amount=300, entry_date=date(2023, 1, 3), receiver="Bolt")
+        )
+        session.commit()
+
+    runner.invoke(app, ["categories", "rules", "add", "rimi", "-c", str(food_id)])
+    runner.invoke(app, ["categories", "rules", "add", "õunapuu", "-c", str(food_id)])
+
+    # Dry run reports hits but leaves the data alone
+    result = runner.invoke(app, ["categories", "rules", "apply", "--dry-run"])
+    assert result.exit_code == 0
+    assert "Dry run active" in result.stdout
+    assert "õunapuu" in result.stdout
+
+    with Session(engine) as session:
+        assert (
+            session.exec(select(Transaction).where(Transaction.amount == 100))
+            .one()
+            .category_id
+            is None
+        )
+
+    # Only uncategorized rows are touched with --only-uncategorized
+    result = runner.invoke(app, ["categories", "rules", "apply", "-u"])
+    assert result.exit_code == 0
+    assert "Re-categorized 1 transactions" in result.stdout
+
+    result = runner.invoke(app, ["categories", "rules", "apply"])
+    assert result.exit_code == 0
+    assert "Re-categorized 1 transactions" in result.stdout
+
+    with Session(engine) as session:
+        by_amount = {t.amount: t.category_id for t in session.exec(select(Transaction))}
+        assert by_amount == {100: food_id, 200: food_id, 300: None}
+
+
+def test_apply_rules_matches_import(tmp_path):
+    """Rules categorize non-ASCII receivers alike at import and when applied to history."""
+    reset_db()
+
+    with Session(engine) as session:
+        food = Category(name="Food")
+        travel = Category(name="Travel")
+        session.add(food)
+        session.add(travel)
+        session.commit()
+        food_id, travel_id = food.id, travel.id
+
+    for pattern, category_id in [
+        ("ÕUNAPUU", food_id),
+        ("bäckerei", food_id),
+        ("straße", travel_id),
+        ("šokolaad", food_id),
+        ("izmir", travel_id),
+    ]:
+        runner.invoke(
+            app, ["categories", "rules", "add", pattern, "-c", str(category_id)]
+        )
+
+    csv_file = tmp_path / "statement.csv"
+    with open(csv_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            [
+                "Kuupäev",
+                "Saaja/maksja nimi",
+                "Selgitus",
+                "Summa",
+                "Deebet/Kreedit (D/C)",
+            ]
+        )
+        writer.writerows(
+            [
+                ["2024-01-01", "Õunapuu Kohvik", "", "4.00", "D"],
+                ["2024-01-02", "BÄCKEREI MÜLLER", "", "3.00", "D"],
+                ["2024-01-03", "Parkhaus", "HAUPTSTRASSE 5", "2.00", "D"],
+                ["2024-01-04", "Parkhaus", "HAUPTSTRAẞE 5", "6.00", "D"],
+                ["2024-01-05", "ŠOKOLAADIPOOD", "", "5.00", "D"],
+                ["2024-01-06", "İZMIR GRILL", "", "7.00", "D"],
+            ]
+        )
+
+    result = runner.invoke(
+        app, ["transactions", "import", "--bank", "lhv", "--file", str(csv_file)]
+    )
+    assert result.exit_code == 0
+
+    def categories():
+        with Session(engine) as session:
+            return {t.amount: t.category_id for t in session.exec(select(Transaction))}
+
+    imported = categories()
+    assert imported == {
+        400: food_id,
+        300: food_id,
+        200: None,
+        600: travel_id,
+        500: food_id,
+        # "İ" lowercases to "i" and a combining dot, so "izmir" does not match
+        700: None,
+    }
+
+    with Session(engine) as session:
+        for transaction in session.exec(select(Transaction)):
+            transaction.category_id = None
+            session.add(transaction)
+        session.commit()
+
+    result = runner.invoke(app, ["categories", "rules", "apply"])
+    assert result.exit_code == 0
+    assert categories() == imported
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
 
 from hypothesis import given
@@ -9,7 +9,7 @@ from typer.testing import CliRunner
 from budy import app
 from budy.config import settings as app_settings
 from budy.database import engine
-from budy.schemas import Transaction
+from budy.schemas import Category, Transaction
 
 
 def reset_db():
@@ -135,3 +135,133 @@ def test_delete_transaction(amount):
     with Session(engine) as session:
         deleted_txn = session.get(Transaction, txn_id)
         assert deleted_txn is None
+
+
+def test_list_pages_with_cursor():
+    """E2E: The printed cursor continues with the transactions right before the shown ones."""
+    reset_db()
+    runner = CliRunner()
+
+    today = date.today()
+    with Session(engine) as session:
+        for days_ago in range(6):
+            session.add(
+                Transaction(
+                    amount=100 * (days_ago + 1),
+                    entry_date=today - timedelta(days=days_ago),
+                    receiver=f"Shop {days_ago}",
+                )
+            )
+        session.add(
+            Transaction(
+                amount=450, entry_date=today - timedelta(days=4), receiver="Shop 4b"
+            )
+        )
+        session.commit()
+
+    first = runner.invoke(app, ["transactions", "list", "--limit", "3"])
+    assert first.exit_code == 0
+    assert "Shop 2" in first.stdout and "Shop 3" not in first.stdout
+
+    # Cursor pages hold a number of transactions rather than days
+    cursor = first.stdout.split("--after ")[1].split()[0]
+    second = runner.invoke(
+        app, ["transactions", "list", "--limit", "3", "--after", cursor]
+    )
+    assert second.exit_code == 0
+    assert all(amount in second.stdout for amount in ("$4.00", "$5.00", "$4.50"))
+    assert "Shop 2" not in second.stdout and "Shop 5" not in second.stdout
+
+    cursor = second.stdout.split("--after ")[1].split()[0]
+    last = runner.invoke(
+        app, ["transactions", "list", "--limit", "3", "--after", cursor]
+    )
+    assert last.exit_code == 0
+    assert "Shop 5" in last.stdout and "Shop 4" not in last.stdout
+    assert "Next page" not in last.stdout
+
+    # Nothing is older than a window reaching past the first transaction
+    result = runner.invoke(app, ["transactions", "list", "--limit", "10"])
+    assert "Shop 5" in result.stdout and "Next page" not in result.stdout
+
+    result = runner.invoke(app, ["transactions", "list", "--after", "nonsense"])
+    assert result.exit_code == 2
+
+
+def test_query_filters():
+    """E2E: Filter expressions combine, negate, page, and reject unknown filters."""
+    reset_db()
+    runner = CliRunner()
+
+    with Session(engine) as session:
+        food = Category(name="Food")
+        session.add(food)
+        session.commit()
+        session.add_all(
+            [
+                Transaction(
+                    amount=1250,
+                    entry_date=date(2024, 3, 5),
+                    receiver="Rimi Kesklinn",
+                    category_id=food.id,
+                ),
+                Transaction(
+                    amount=9900,
+                    entry_date=date(2024, 3, 20),
+                    receiver="Rimi Kesklinn",
+                    category_id=food.id,
+                ),
+                Transaction(
+                    amount=800, entry_date=date(2024, 4, 1), receiver="Bolt Taxi"
+                ),
+                Transaction(
+                    amount=5000,
+                    entry_date=date(2023, 3, 10),
+                    receiver="Savings",
+                    is_self=True,
+                ),
+            ]
+        )
+        session.commit()
+
+    def receivers(expression: str, *args: str) -> list[str]:
+        result = runner.invoke(app, ["transactions", "query", expression, *args])
+        assert result.exit_code == 0, result.stdout
+        return [
+            name
+            for name in ("Rimi Kesklinn", "Bolt Taxi", "Savings")
+            for _ in range(result.stdout.count(name))
+        ]
+
+    assert receivers("payee:rimi amount:<50") == ["Rimi Kesklinn"]
+    assert receivers("date:2024-03..2024-04 -category:food") == ["Bolt Taxi"]
+    assert receivers("is:uncategorized -is:self") == ["Bolt Taxi"]
+    assert receivers("date:<2024 is:self amount:50") == ["Savings"]
+    assert receivers('payee:"bolt t" date:>=2024-04-01') == ["Bolt Taxi"]
+
+    first = runner.invoke(app, ["transactions", "query", "date:2024", "-l", "2"])
+    assert "Bolt Taxi" in first.stdout and "$99.00" in first.stdout
+    assert "$12.50" not in first.stdout
+    cursor = first.stdout.split("--after ")[1].split()[0]
+    second = runner.invoke(
+        app, ["transactions", "query", "date:2024", "-l", "2", "--after", cursor]
+    )
+    assert "$12.50" in second.stdout and "Next page" not in second.stdout
+
+    for bad in ("rimi", "amount:ten", "date:2024-13", "is:cheap"):
+        result = runner.invoke(app, ["transactions", "query", bad])
+        assert result.exit_code == 2
+
+
+def test_query_explain():
+    """E2E: --explain shows the plan, which searches the date index for a date range."""
+    reset_db()
+    runner = CliRunner()
+
+    result = runner.invoke(
+        app, ["transactions", "query", "date:2024 amount:>10", "--explain"]
+    )
+    assert result.exit_code == 0
+    assert "ix_transaction_entry_date" in result.stdout
+    assert "full table scan" not in result.stdout
+    assert "full index scan" not in result.stdout